@@ -1,10 +1,27 @@
 """The main entry point for the data labeler."""
 import argparse
-import ast
+import importlib
+import os
+import sys
+
+
+# the command line tools that run instead of the application. they're
+# imported before the application so that they run without a display
+COMMANDS = {
+    'convert': 'src.convert',
+    'stats': 'src.dataset_stats',
+}
+if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+    COMMAND = importlib.import_module(COMMANDS[sys.argv[1]])
+    sys.exit(COMMAND.main(sys.argv[2:]))
+
 import numpy as np
-import pandas as pd
 from PIL import Image
 from src.data_labeler import DataLabeler
+from src.label_file import FORMATS, load_segmentation
+from src.label_map import make_colors
+from src.metadata import Metadata
+from src.session import Session
 
 
 # create an argument parser to read arguments from the command line
@@ -12,7 +29,7 @@ PARSER = argparse.ArgumentParser(description=__doc__)
 # add an argument for the image to segment
 PARSER.add_argument('--image', '-i',
     type=str,
-    help='the input image to segment.',
+    help='the input image, directory of images, or .csv manifest of images.',
     required=True,
 )
 # add an argument for the labeling metadata
@@ -24,46 +41,154 @@ PARSER.add_argument('--metadata', '-m',
 # add an argument for the output filename
 PARSER.add_argument('--output_file', '-o',
     type=str,
-    help='the name of the output file to save.',
+    help='the output file (or directory for a directory of images).',
     default='auto',
     required=False,
 )
 # add an argument for the an existing segmentation to start with
 PARSER.add_argument('--segmentation', '-s',
     type=str,
-    help='the a priori segmentation if there is one.',
+    help='the a priori segmentation (or directory of them) if there is one.',
+    required=False,
+    default=None,
+)
+# add an argument for the frame rate cap of the application
+PARSER.add_argument('--max_fps', '-f',
+    type=float,
+    help='the maximal number of frames to draw per second.',
+    required=False,
+    default=60,
+)
+# add an argument for the memory budget of the undo history
+PARSER.add_argument('--history_budget', '-u',
+    type=float,
+    help='the memory budget of the undo history in megabytes.',
+    required=False,
+    default=64,
+)
+# add an argument for a directory to cache super pixel segmentations in
+PARSER.add_argument('--cache_dir', '-c',
+    type=str,
+    help='a directory to cache super pixel segmentations in.',
     required=False,
     default=None,
 )
 
+# add an argument for the size of tiles to segment super pixels in
+PARSER.add_argument('--tile_size', '-t',
+    type=int,
+    help='the size of tiles to segment super pixels in parallel in.',
+    required=False,
+    default=None,
+)
+# add an argument for the number of processes to segment tiles on
+PARSER.add_argument('--workers', '-w',
+    type=int,
+    help='the number of processes to segment tiles on.',
+    required=False,
+    default=None,
+)
+
+# add an argument for the factor to downsample super pixel previews by
+PARSER.add_argument('--preview_scale', '-p',
+    type=int,
+    help='the factor to downsample super pixel previews by (1 to disable).',
+    required=False,
+    default=4,
+)
+
+# add an argument for the compression level of saved PNG files
+PARSER.add_argument('--compress_level', '-z',
+    type=int,
+    help='the zlib compression level of saved PNG files in [0, 9].',
+    required=False,
+    default=6,
+    choices=range(10),
+)
+
+# add an argument for the format of saved segmentation images
+PARSER.add_argument('--output_format', '-F',
+    type=str,
+    help='the format of saved segmentation images, .npy and .npz files are '
+        'always saved as class indexes.',
+    required=False,
+    default='rgb',
+    choices=FORMATS,
+)
+
+# add an argument for the size of the edit journal before a checkpoint
+PARSER.add_argument('--journal_budget', '-j',
+    type=float,
+    help='the size of the edit journal that triggers a checkpoint in MB.',
+    required=False,
+    default=8,
+)
+
+# add an argument for the number of images of a session to prepare ahead
+PARSER.add_argument('--prefetch', '-n',
+    type=int,
+    help='the number of images of a session to prepare in the background.',
+    required=False,
+    default=2,
+)
+
 
 # parse the options from the command line
 ARGS = PARSER.parse_args()
 
 
+# create a session if the input is a directory or a manifest of images
+SESSION = None
+if os.path.isdir(ARGS.image):
+    SESSION = Session.from_directory(ARGS.image,
+        segmentations=ARGS.segmentation,
+        outputs=None if ARGS.output_file == 'auto' else ARGS.output_file,
+    )
+elif ARGS.image.lower().endswith('.csv'):
+    SESSION = Session.from_manifest(ARGS.image)
+
+
 # load the input image to segment
-with Image.open(ARGS.image) as image_file:
-    ARGS.image = np.array(image_file)
+if SESSION is not None:
+    ARGS.image = SESSION.load_image(0)
+else:
+    with Image.open(ARGS.image) as image_file:
+        ARGS.image = np.array(image_file)
 
 
 # load the metadata
-ARGS.metadata = pd.read_csv(ARGS.metadata)
-ARGS.metadata['rgb'] = ARGS.metadata['rgb'].apply(ast.literal_eval)
+ARGS.metadata = Metadata.read_csv(ARGS.metadata)
 
 
 # set the output file if it's automatic
-if ARGS.output_file == 'auto':
+if SESSION is not None:
+    ARGS.output_file = SESSION[0].output
+elif ARGS.output_file == 'auto':
     ARGS.output_file = ARGS.segmentation
 
 
-# load the a priori segmentation if there is one
-if ARGS.segmentation is not None:
-    with Image.open(ARGS.segmentation) as segmentation_file:
-        ARGS.segmentation = np.array(segmentation_file)
+# load the a priori segmentation if there is one, detecting its format
+COLORS = make_colors(ARGS.metadata['rgb'])
+if SESSION is not None:
+    ARGS.segmentation = SESSION.load_segmentation(0, COLORS)
+elif ARGS.segmentation is not None:
+    ARGS.segmentation = load_segmentation(ARGS.segmentation, COLORS)
 
 
 # create the data labeler application
-LABELER = DataLabeler(ARGS.image, ARGS.metadata, ARGS.output_file, ARGS.segmentation)
+LABELER = DataLabeler(ARGS.image, ARGS.metadata, ARGS.output_file, ARGS.segmentation,
+    max_fps=ARGS.max_fps,
+    max_history_bytes=int(ARGS.history_budget * 2**20),
+    cache_dir=ARGS.cache_dir,
+    compress_level=ARGS.compress_level,
+    output_format=ARGS.output_format,
+    journal_bytes=int(ARGS.journal_budget * 2**20),
+    tile_size=ARGS.tile_size,
+    workers=ARGS.workers,
+    preview_scale=ARGS.preview_scale,
+    session=SESSION,
+    prefetch=ARGS.prefetch,
+)
 # run the data labeler application
 try:
     LABELER.run()
@@ -0,0 +1,97 @@
+"""A benchmark of the cold start latency of importing the application."""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# the root of the repository that the application is imported from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the statement that imports the modules the application needs to start
+STATEMENT = 'import src.data_labeler, src.metadata, src.session'
+
+
+def run(statement: str, *options: str) -> tuple:
+    """
+    Run a statement in a new interpreter.
+
+    Args:
+        statement: the Python statement to run
+        options: the options to pass to the interpreter
+
+    Returns:
+        a tuple of the wall time in seconds and the standard error
+
+    """
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, *options, '-c', statement],
+        cwd=ROOT,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return time.perf_counter() - start, process.stderr
+
+
+def slowest_imports(statement: str, count: int) -> list:
+    """
+    Return the slowest top-level imports of a statement.
+
+    Args:
+        statement: the Python statement to profile
+        count: the number of imports to return
+
+    Returns:
+        a list of (cumulative microseconds, module name) tuples, slowest first
+
+    """
+    _, stderr = run(statement, '-X', 'importtime')
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name[1:]
+        # only the top level imports of the statement, their children are
+        # included in the cumulative time
+        if name.startswith('  ') and not name.startswith('   '):
+            imports.append((int(cumulative), name.strip()))
+
+    return sorted(imports, reverse=True)[:count]
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', '-r',
+        type=int,
+        help='the number of cold starts to measure.',
+        default=10,
+    )
+    parser.add_argument('--max_ms', '-m',
+        type=float,
+        help='fail if the median import time exceeds this many ms.',
+        default=None,
+    )
+    args = parser.parse_args()
+    # the time to start an interpreter that imports nothing is subtracted
+    # from the time to start one that imports the application
+    baseline = statistics.median(run('pass')[0] for _ in range(args.runs))
+    total = statistics.median(run(STATEMENT)[0] for _ in range(args.runs))
+    import_ms = 1000 * (total - baseline)
+    print('interpreter start: {:8.1f} ms'.format(1000 * baseline))
+    print('application import: {:7.1f} ms'.format(import_ms))
+    print('slowest imports:')
+    for cumulative, name in slowest_imports(STATEMENT, 10):
+        print('  {:8.1f} ms  {}'.format(cumulative / 1000, name))
+    if args.max_ms is not None and import_ms > args.max_ms:
+        sys.exit('import time {:.1f} ms exceeds {:.1f} ms'.format(
+            import_ms,
+            args.max_ms,
+        ))
+
+
+if __name__ == '__main__':
+    main()
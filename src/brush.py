@@ -0,0 +1,104 @@
+"""Methods for painting brush strokes on a map of class indexes."""
+import numpy as np
+from .graphics.cursor import circle_mask
+from .graphics import rectangle
+
+
+def paint_circle(image: np.ndarray,
+    row: int,
+    column: int,
+    radius: int,
+    value: int,
+) -> tuple:
+    """
+    Paint a filled circle on an image in place.
+
+    Args:
+        image: the image to paint the circle on
+        row: the row of the center of the circle
+        column: the column of the center of the circle
+        radius: the radius of the circle
+        value: the value to paint the pixels in the circle with
+
+    Returns:
+        the (top, left, bottom, right) rectangle of the image that was
+        painted, or None if the circle is outside of the image
+
+    """
+    # clip the rectangle around the circle to the frame of the image
+    rect = rectangle.clip(rectangle.around(row, column, radius), image.shape)
+    if rect is None:
+        return None
+    top, left, bottom, right = rect
+    # crop the part of the cached circle stamp that is inside the image
+    top_offset = top - (row - radius)
+    left_offset = left - (column - radius)
+    stamp = circle_mask(radius)[
+        top_offset:top_offset + bottom - top,
+        left_offset:left_offset + right - left,
+    ]
+    # paint the stamp onto the window of the image
+    np.copyto(image[top:bottom, left:right], value, where=stamp)
+
+    return rect
+
+
+def paint_capsule(image: np.ndarray,
+    start: tuple,
+    end: tuple,
+    radius: int,
+    value: int,
+) -> tuple:
+    """
+    Paint a line with round caps, i.e., a capsule, on an image in place.
+
+    Args:
+        image: the image to paint the capsule on
+        start: the (row, column) of the center of the first cap
+        end: the (row, column) of the center of the last cap
+        radius: the radius of the capsule, i.e., half of the line thickness
+        value: the value to paint the pixels in the capsule with
+
+    Returns:
+        the (top, left, bottom, right) rectangle of the image that was
+        painted, or None if the capsule is outside of the image
+
+    """
+    (row_0, column_0), (row_1, column_1) = start, end
+    # clip the rectangle around both caps to the frame of the image
+    rect = rectangle.union(
+        rectangle.around(row_0, column_0, radius),
+        rectangle.around(row_1, column_1, radius),
+    )
+    rect = rectangle.clip(rect, image.shape)
+    if rect is None:
+        return None
+    top, left, bottom, right = rect
+    # get the coordinates of the pixels in the window relative to the start
+    rows = np.arange(top - row_0, bottom - row_0)[:, None]
+    columns = np.arange(left - column_0, right - column_0)[None, :]
+    # project each pixel onto the line segment between the centers of the
+    # caps, clamping the projection to the ends of the segment
+    delta_row, delta_column = row_1 - row_0, column_1 - column_0
+    length = delta_row**2 + delta_column**2
+    if length == 0:
+        projection = 0
+    else:
+        projection = (rows * delta_row + columns * delta_column) / length
+        projection = np.clip(projection, 0, 1)
+    # select the pixels that are closer to the segment than the radius. this
+    # matches the pixels of circle_mask at the caps
+    distance = (rows - projection * delta_row)**2
+    distance = distance + (columns - projection * delta_column)**2
+    stamp = distance < radius**2
+    # paint the stamp onto the window of the image
+    np.copyto(image[top:bottom, left:right], value, where=stamp)
+
+    return rect
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    paint_capsule.__name__,
+    paint_circle.__name__,
+]
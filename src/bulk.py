@@ -0,0 +1,80 @@
+"""Methods for processing many label files on a pool of processes."""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import os
+from .session import LABEL_EXTENSIONS
+
+
+# the number of tasks in flight for each worker process
+TASKS_PER_WORKER = 4
+
+
+def find_files(paths: list):
+    """
+    Find the label files in a list of files and directories.
+
+    Args:
+        paths: the label files and directories of label files to process
+
+    Returns:
+        a generator of the paths of the files in order of name within each
+        directory, files in a directory without a label extension are skipped
+
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for name in sorted(os.listdir(path)):
+            if os.path.splitext(name)[1].lower() in LABEL_EXTENSIONS:
+                yield os.path.join(path, name)
+
+
+def map_unordered(function, items,
+    workers: int=None,
+    initializer=None,
+    initargs: tuple=(),
+):
+    """
+    Apply a function to items on a pool of processes.
+
+    Args:
+        function: the picklable function to apply to each item
+        items: an iterable of the items to apply the function to
+        workers: the number of processes to use (the number of CPUs if None)
+        initializer: a picklable function to call in each process before
+                     the items (or None)
+        initargs: the arguments to pass to the initializer
+
+    Returns:
+        a generator of the results in the order they finish. only a few
+        items per worker are submitted ahead of the results that have been
+        consumed, so memory stays flat for any number of items
+
+    """
+    # process the items in this process if there is no work to share
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(function, items)
+        return
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers,
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        pending = set()
+        for item in items:
+            # wait for a result before submitting past the window
+            if len(pending) >= TASKS_PER_WORKER * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(function, item))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [find_files.__name__, map_unordered.__name__]
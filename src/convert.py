@@ -0,0 +1,315 @@
+"""Convert and validate label files in bulk on a pool of processes."""
+import argparse
+from collections import Counter, namedtuple
+import os
+import numpy as np
+from .bulk import find_files, map_unordered
+from .label_file import COMPRESS_LEVEL, FORMATS
+from .label_file import read_segmentation, save_segmentation
+from .label_map import make_colors, make_lookup, pack_rgb, rgb_to_index
+from .metadata import Metadata
+
+
+# the formats that files can be converted to
+OUTPUT_FORMATS = FORMATS + ['npy', 'npz']
+# the number of unknown colors to list in the summary
+MAX_REPORTED_COLORS = 20
+# the result of converting a file: the path of the file, the output file (or
+# None), a dictionary of the pixel counts of colors that aren't labels keyed
+# by packed color, and the error message if the file couldn't be converted
+# (or None)
+Result = namedtuple('Result', ['path', 'output', 'unknown', 'error'])
+
+
+# the options of the worker process, set by _initialize
+_COLORS = None
+_LOOKUP = None
+_OPTIONS = None
+
+
+def _initialize(colors: np.ndarray, options: dict) -> None:
+    """
+    Set up a worker process to convert files.
+
+    Args:
+        colors: the color of each class index
+        options: the compress_level, file_format, and strict options
+
+    Returns:
+        None
+
+    """
+    global _COLORS, _LOOKUP, _OPTIONS
+    _COLORS = colors
+    # the lookup table replaces the search for each color with one index
+    # per pixel, it's built once per process and reused for every file
+    _LOOKUP = make_lookup(colors)
+    _OPTIONS = options
+
+
+def to_index(rgb: np.ndarray, colors: np.ndarray,
+    lookup: np.ndarray,
+) -> tuple:
+    """
+    Convert an RGB segmentation to class indexes with a lookup table.
+
+    Args:
+        rgb: the RGB segmentation with shape (height, width, 3)
+        colors: the color of each class index
+        lookup: the lookup table of packed colors from make_lookup
+
+    Returns:
+        a tuple of the map of class indexes and a dictionary of the pixel
+        counts of colors that aren't labels keyed by packed color. pixels of
+        unknown colors map to the label with the nearest color
+
+    """
+    packed = pack_rgb(rgb)
+    index = lookup[packed]
+    unknown = index == len(colors)
+    if not unknown.any():
+        return index.astype(np.uint8, copy=False), {}
+    values, counts = np.unique(packed[unknown], return_counts=True)
+    index[unknown] = rgb_to_index(rgb[unknown], colors)
+
+    return index.astype(np.uint8), dict(zip(values.tolist(), counts.tolist()))
+
+
+def _convert(task: tuple) -> Result:
+    """
+    Convert a label file in a worker process.
+
+    Args:
+        task: a tuple of the path of the label file and the output file (or
+              None to only validate the file)
+
+    Returns:
+        the result of the conversion
+
+    """
+    path, output = task
+    try:
+        segmentation = read_segmentation(path, _COLORS)
+        unknown = {}
+        if segmentation.ndim == 3:
+            segmentation, unknown = to_index(segmentation, _COLORS, _LOOKUP)
+        # a strict conversion doesn't write files with unknown colors
+        if unknown and _OPTIONS['strict']:
+            output = None
+        if output is not None:
+            save_segmentation(output, segmentation, _COLORS,
+                compress_level=_OPTIONS['compress_level'],
+                file_format=_OPTIONS['file_format'],
+            )
+    except (OSError, ValueError) as error:
+        return Result(path, None, {}, str(error))
+
+    return Result(path, output, unknown, None)
+
+
+def _output_path(path: str, output_dir: str, file_format: str) -> str:
+    """
+    Return the output file of a label file.
+
+    Args:
+        path: the path of the label file
+        output_dir: the directory to write output files to
+        file_format: the format to convert to, one of OUTPUT_FORMATS
+
+    Returns:
+        the path in the output directory with the extension of the format
+
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    extension = '.' + file_format if file_format in ('npy', 'npz') else '.png'
+    return os.path.join(output_dir, name + extension)
+
+
+def _tasks(paths: list, output_dir: str, file_format: str):
+    """
+    Return the tasks to convert label files.
+
+    Args:
+        paths: the label files and directories of label files
+        output_dir: the directory to write output files to (or None)
+        file_format: the format to convert to, one of OUTPUT_FORMATS
+
+    Returns:
+        a generator of (path, output) tuples
+
+    """
+    outputs = set()
+    for path in find_files(paths):
+        if output_dir is None:
+            yield path, None
+            continue
+        output = _output_path(path, output_dir, file_format)
+        # files with the same name in different directories would replace
+        # each other in the output directory
+        if output in outputs:
+            raise ValueError('more than one file converts to {}'.format(
+                output
+            ))
+        outputs.add(output)
+        yield path, output
+
+
+def _format_color(packed: int) -> str:
+    """Return a string of the RGB tuple of a packed color."""
+    return str((packed >> 16, (packed >> 8) & 255, packed & 255))
+
+
+def convert(paths: list, colors: np.ndarray,
+    output_dir: str=None,
+    file_format: str='index',
+    compress_level: int=COMPRESS_LEVEL,
+    strict: bool=False,
+    workers: int=None,
+):
+    """
+    Convert or validate label files on a pool of processes.
+
+    Args:
+        paths: the label files and directories of label files
+        colors: the color of each class index
+        output_dir: the directory to write output files to (None to only
+                    validate the files)
+        file_format: the format to convert to, one of OUTPUT_FORMATS
+        compress_level: the zlib compression level of PNG files in [0, 9]
+        strict: whether to skip writing files that have unknown colors
+        workers: the number of processes to use (the number of CPUs if None)
+
+    Returns:
+        a generator of the Result of each file in the order they finish
+
+    """
+    if file_format not in OUTPUT_FORMATS:
+        raise ValueError('invalid format {}, expected one of {}'.format(
+            repr(file_format),
+            OUTPUT_FORMATS,
+        ))
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    # the extension sets the format of NumPy files, so any image format
+    # will do for them
+    options = {
+        'compress_level': compress_level,
+        'file_format': file_format if file_format in FORMATS else 'index',
+        'strict': strict,
+    }
+    return map_unordered(_convert, _tasks(paths, output_dir, file_format),
+        workers=workers,
+        initializer=_initialize,
+        initargs=(colors, options),
+    )
+
+
+# create an argument parser to read arguments from the command line
+PARSER = argparse.ArgumentParser(prog='python3 . convert', description=__doc__)
+# add an argument for the label files to convert
+PARSER.add_argument('paths',
+    type=str,
+    nargs='+',
+    help='the label files and directories of label files.',
+)
+# add an argument for the labeling metadata
+PARSER.add_argument('--metadata', '-m',
+    type=str,
+    help='the labeling metadata as a .csv file.',
+    required=True,
+)
+# add an argument for the output directory
+PARSER.add_argument('--output_dir', '-o',
+    type=str,
+    help='the directory to write converted files to (omit to validate).',
+    required=False,
+    default=None,
+)
+# add an argument for the format to convert to
+PARSER.add_argument('--format', '-F',
+    type=str,
+    help='the format to convert to.',
+    required=False,
+    default='index',
+    choices=OUTPUT_FORMATS,
+)
+# add an argument for the compression level of PNG files
+PARSER.add_argument('--compress_level', '-z',
+    type=int,
+    help='the zlib compression level of PNG files in [0, 9].',
+    required=False,
+    default=COMPRESS_LEVEL,
+    choices=range(10),
+)
+# add an argument for rejecting files with unknown colors
+PARSER.add_argument('--strict', '-s',
+    action='store_true',
+    help='skip writing files with unknown colors and exit with an error.',
+)
+# add an argument for the number of processes to convert files on
+PARSER.add_argument('--workers', '-w',
+    type=int,
+    help='the number of processes to convert files on.',
+    required=False,
+    default=None,
+)
+
+
+def main(argv: list=None) -> int:
+    """
+    Convert or validate label files from the command line.
+
+    Args:
+        argv: the command line arguments (None to use sys.argv)
+
+    Returns:
+        the exit status, 1 if any file failed (or had unknown colors with
+        --strict), otherwise 0
+
+    """
+    args = PARSER.parse_args(argv)
+    colors = make_colors(Metadata.read_csv(args.metadata)['rgb'])
+    results = convert(args.paths, colors,
+        output_dir=args.output_dir,
+        file_format=args.format,
+        compress_level=args.compress_level,
+        strict=args.strict,
+        workers=args.workers,
+    )
+    # report problems as they're found and count the rest, only the counts
+    # are kept so memory stays flat
+    files = failed = unknown_files = 0
+    pixels = Counter()
+    unknown_counts = Counter()
+    for result in results:
+        files += 1
+        if result.error is not None:
+            failed += 1
+            print('{}: {}'.format(result.path, result.error))
+        elif result.unknown:
+            unknown_files += 1
+            pixels.update(result.unknown)
+            unknown_counts.update(result.unknown.keys())
+            print('{}: {} pixels of {} unknown colors'.format(
+                result.path,
+                sum(result.unknown.values()),
+                len(result.unknown),
+            ))
+    print('{} files, {} with unknown colors, {} failed'.format(
+        files,
+        unknown_files,
+        failed,
+    ))
+    for packed, count in pixels.most_common(MAX_REPORTED_COLORS):
+        print('  {}: {} pixels in {} files'.format(
+            _format_color(packed),
+            count,
+            unknown_counts[packed],
+        ))
+    if failed or (args.strict and unknown_files):
+        return 1
+    return 0
+
+
+# explicitly define the outward facing API of this module
+__all__ = [convert.__name__, main.__name__, to_index.__name__]
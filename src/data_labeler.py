@@ -1,21 +1,56 @@
 """A semantic segmentation labeling application."""
-import multiprocessing
+import os
+import traceback
+from collections import namedtuple
 import numpy as np
-import pandas as pd
-from PIL import Image
 from pyglet.window import key
-from skimage.segmentation import mark_boundaries
-from skimage.draw import circle
 from .graphics.cursor import make_cursor, make_ring, make_circle, pyglet_cursor
 from .graphics.image_view import ImageView
 from .graphics.palette import Palette
-from .segment import segment
+from .graphics.pyramid import Pyramid
+from .graphics.tile_grid import TileGrid
+from .graphics.redraw_scheduler import RedrawScheduler
+from .graphics import rectangle
+from .journal import Journal, replay
+from .label_file import COMPRESS_LEVEL, load_segmentation, save_segmentation
+from .label_map import make_colors, rgb_to_index
+from .metadata import Metadata
+from .brush import paint_capsule, paint_circle
+from .segment import ImageContext, segment_merged
+from .segment_cache import SegmentCache
+from .segmentation_worker import SegmentationWorker
+from .double_buffer import DoubleBuffer
+from .shared_state import SharedState
+from .super_pixel_index import SuperPixelIndex
+from .history import History
+from .merge_tree import MergeTree
+from .preview import downsample, downsample_arguments, upsample
+from .prefetcher import Prefetcher
+from .session import Session
 
 
 # the keyboard code for the number 0
-KEY_ZERO = 48
+KEY_ZERO = key._0
 # the keyboard code for the number 9
-KEY_NINE = 59
+KEY_NINE = key._9
+# the height and width of the tiles that the layers are composited in
+TILE_SIZE = 256
+# the size of the edit journal that triggers a checkpoint of it
+JOURNAL_BYTES = 8 * 2**20
+# the suffixes of the journal and the checkpoint next to an output file
+JOURNAL_SUFFIX = '.journal'
+CHECKPOINT_SUFFIX = '.checkpoint.png'
+# the suffix of a journal or checkpoint that couldn't be recovered
+BAD_SUFFIX = '.bad'
+# the preprocessed forms of an image of the session that super pixels are
+# segmented from and the cache keys of the image and its preview
+PreparedImage = namedtuple('PreparedImage', [
+    'item',
+    'context',
+    'key',
+    'preview_context',
+    'preview_key',
+])
 
 
 class DataLabeler(object):
@@ -23,11 +58,22 @@ class DataLabeler(object):
 
     def __init__(self,
         image: np.ndarray,
-        metadata: pd.DataFrame,
+        metadata: Metadata,
         output_file: str,
         segmentation: np.ndarray=None,
         brush_border_color: tuple=(255, 255, 255),
         super_pixel_color: tuple=(127, 127, 127),
+        max_fps: float=60,
+        max_history_bytes: int=64 * 2**20,
+        cache_dir: str=None,
+        compress_level: int=COMPRESS_LEVEL,
+        output_format: str='rgb',
+        journal_bytes: int=JOURNAL_BYTES,
+        tile_size: int=None,
+        workers: int=None,
+        preview_scale: int=4,
+        session: Session=None,
+        prefetch: int=2,
     ) -> None:
         """
         Initialize a new data labeling application.
@@ -36,9 +82,28 @@ class DataLabeler(object):
             image: the image to segment
             metadata: the labeling metadata for the segmentation
             output_file: the output file to save segmentations to
-            segmentation: an existing segmentation if there is one
+            segmentation: an existing segmentation if there is one, either
+                          an RGB image or a map of class indexes
             brush_border_color: the border color for the brush
             super_pixel_color: the color to draw super pixel lines as
+            max_fps: the maximal number of frames to draw per second
+            max_history_bytes: the memory budget for the undo history
+            cache_dir: a directory to cache super pixel segmentations in
+            compress_level: the zlib compression level of saved PNG files
+            output_format: the format of saved segmentation images, one of
+                           'rgb', 'palette', or 'index'
+            journal_bytes: the size of the edit journal that triggers a
+                           checkpoint of the segmentation
+            tile_size: the size of the tiles to segment super pixels in
+                       parallel in (None to segment the whole image at once)
+            workers: the number of processes to segment tiles on (the number
+                     of CPUs if None)
+            preview_scale: the factor to downsample the image by to preview
+                           super pixels while segmenting the full image (1
+                           or None to disable the preview)
+            session: the session of images to label, the image, output file,
+                     and segmentation are the first item of the session
+            prefetch: the number of images of the session to prepare ahead
 
         Returns:
             None
@@ -47,93 +112,206 @@ class DataLabeler(object):
         self._image = image
         self._metadata = metadata
         self._output_file = output_file
-        self._segmentation = segmentation
+        self._compress_level = compress_level
+        self._output_format = output_format
+        self._journal_bytes = journal_bytes
         self._brush_border_color = brush_border_color
         self._super_pixel_color = super_pixel_color
-        self._opacity = 5
-        self._is_brush = multiprocessing.Value('b', True)
-        self._brush_size = multiprocessing.Value('i', 5)
-        self._is_cursor_change = multiprocessing.Value('b', True)
-        # create a raw array for sharing image data between processes
-        array = multiprocessing.RawArray('b', int(np.prod(image.shape)))
-        numpy_array = np.frombuffer(array, dtype=np.uint8)
-        self._super_pixel = numpy_array.reshape(image.shape)
-        # setup an array for the super pixel segmentation map
-        array = multiprocessing.RawArray('i', int(np.prod(image.shape[:-1])))
-        numpy_array = np.frombuffer(array, dtype='int32')
-        self._super_pixel_segments = numpy_array.reshape(image.shape[:-1])
-        # create a dictionary for looking up colors by label name
-        self._label_to_rgb = self._metadata.set_index('label')['rgb']
-        # if there is no segmentation, initialize as the first label
-        if self._segmentation is None:
-            self._segmentation = np.zeros_like(image, dtype=np.uint8)
-            self._segmentation[:, :, range(3)] = metadata['rgb'][0]
-        # set the default color to the first label
-        array = multiprocessing.RawArray('b', 3)
-        self._color = np.frombuffer(array, dtype=np.uint8)
-        self._color[:] = metadata['rgb'][0]
+        # setup the session of images to label and the index of the image in
+        # the session that is being labeled
+        self._session = session
+        self._prefetch = prefetch
+        self._item = 0
+        # setup the state shared with the palette process. the label is the
+        # class index of the label (and color) to paint with, the cursor is a
+        # generation that advances when the cursor needs to be redrawn, and
+        # saving and saved are the generations of the last requested and
+        # finished saves, and item is the index of the image in the session
+        self._state = SharedState(
+            is_brush=True,
+            brush_size=5,
+            label=0,
+            opacity=5,
+            cursor=1,
+            saving=0,
+            saved=0,
+            save_error=False,
+            item=0,
+        )
+        self._cursor_generation = 0
+        # setup a double buffer in shared memory for handing the super pixel
+        # segmentation map and boundaries from the palette process to this one.
+        # the palette process writes to the back buffer and flips it to the
+        # front, advancing the generation of the buffer. the buffer is tagged
+        # with the item of the session that it was segmented from
+        self._super_pixels = DoubleBuffer({
+            'segments': (image.shape[:-1], np.int32),
+            'boundaries': (image.shape[:-1], bool),
+            'item': ((), np.int64),
+        })
+        # setup a cache of super pixel segmentations and the preprocessed
+        # forms of the image that the algorithms use. the super pixel worker
+        # prepares the image of the item that the palette switched to
+        self._segment_cache = SegmentCache(directory=cache_dir)
+        self._tile_size = tile_size
+        self._workers = workers
+        self._preview_scale = preview_scale
+        self._prepared = None
+        self._palette_item = None
+        # setup a worker that segments the image with the latest super pixel
+        # request from the palette and the last request that was submitted
+        self._super_pixel_worker = SegmentationWorker(
+            self._segment_super_pixels,
+            self._publish_super_pixels,
+        )
+        self._super_pixel_request = None
+        # setup the merge tree of the last segmentation and its cache key
+        self._merge_tree = None
+        # create a color lookup table indexed by the class index of each
+        # label and a dictionary for looking up class indexes by label name
+        self._colors = make_colors(metadata['rgb'])
+        self._label_to_index = {l: i for i, l in enumerate(metadata['label'])}
+        # store the segmentation as a map of class indexes and recover the
+        # edits to it that weren't saved
+        if segmentation is not None and segmentation.ndim == 3:
+            segmentation = rgb_to_index(segmentation, self._colors)
+        self._load_segmentation(segmentation)
+        # setup a worker that writes checkpoints of the segmentation so that
+        # the journal can be compacted
+        self._checkpoint_worker = SegmentationWorker(
+            self._write_checkpoint,
+            self._did_checkpoint,
+        )
+        # setup a worker that writes snapshots of the segmentation to disk
+        # and the output file of the last snapshot that was submitted
+        self._save_worker = SegmentationWorker(
+            self._write_segmentation,
+            self._did_save,
+        )
+        self._save_path = None
+        # setup the loaders that prepare the next images of the session in
+        # the background. this process decodes the images and segmentations
+        # and the palette process reads, preprocesses, and segments the images
+        self._image_prefetcher = Prefetcher(self._read_item)
+        self._super_pixel_prefetcher = Prefetcher(self._prefetch_prepared)
+        # setup the last position of the mouse in the current brush stroke
+        self._last_mouse = None
+        # setup the undo / redo history of edits to the segmentation
+        self._history = History(self._segmentation, max_history_bytes)
+        # setup an index of the pixels in each super pixel, tagged with the
+        # generation of the super pixel segmentation map it was built from.
+        # a worker in this process indexes each map that the palette process
+        # publishes so that the first click doesn't sort the map
+        self._super_pixel_index = None
+        self._super_pixel_index_generation = None
+        self._super_pixel_index_worker = SegmentationWorker(
+            self._index_super_pixels,
+            self._did_index_super_pixels,
+        )
+        self._super_pixel_index_request = None
+        self._indexed_super_pixels = None
         # setup the window for the simulator and register event handlers
         self._view = ImageView('Data Labeler', image.shape[:2])
         self._view.add_on_mouse_press_handler(self._on_mouse_press)
-        self._view.add_on_mouse_drag_handler(self._on_mouse_press)
+        self._view.add_on_mouse_drag_handler(self._on_mouse_drag)
+        self._view.add_on_mouse_release_handler(self._on_mouse_release)
         self._view.add_on_key_press_handler(self._on_key_press)
-        # setup a flag to determine if the application is running
-        self._is_running = False
+        self._view.add_on_camera_change_handler(self._on_camera_change)
+        # setup the scheduler to redraw the view when its contents change
+        self._scheduler = RedrawScheduler(self._poll, self._update_screen,
+            max_fps=max_fps,
+        )
+        # setup the RGBA layers of the view. the source image only changes
+        # with the image of the session, the segmentation layer is updated in
+        # the tiles that are painted, and the boundary layer is tagged with
+        # the generation of the super pixel segmentation map that it was
+        # built from
+        layer_shape = (*image.shape[:2], 4)
+        self._segmentation_layer = np.zeros(layer_shape, dtype=np.uint8)
+        self._segmentation_rect = None
+        self._image_rect = None
+        self._super_pixel_layer = np.zeros(layer_shape, dtype=np.uint8)
+        self._super_pixel_layer_generation = 0
+        self._super_pixel_boundaries = np.zeros(image.shape[:2], dtype=bool)
+        # setup grids of the tiles of the layers that need to be composited
+        # before the window can show them
+        self._segmentation_tiles = TileGrid(image.shape, TILE_SIZE)
+        self._super_pixel_tiles = TileGrid(image.shape, TILE_SIZE)
+        self._segmentation_tiles.mark_all()
+        # setup pyramids of downsampled copies of the layers for the window to
+        # render when zoomed out
+        self._layers = [
+            self._make_image_layer(image),
+            Pyramid(self._segmentation_layer),
+            Pyramid(self._super_pixel_layer),
+        ]
 
     @property
     def is_brush(self) -> bool:
         """Return True if in brush mode or False if in super pixel mode."""
-        # get the brush mode context and return its value
-        with self._is_brush.get_lock():
-            return self._is_brush.value
+        return bool(self._state['is_brush'])
 
     @is_brush.setter
     def is_brush(self, new_value: bool) -> None:
         """Set the brush mode to brush (True) or super pixel (False)."""
-        # get the brush mode context and set its value
-        with self._is_brush.get_lock():
-            self._is_brush.value = new_value
+        self._state.write(is_brush=new_value)
 
     @property
     def brush_size(self) -> int:
         """Return the size of the brush."""
-        # get the brush size context and return its value
-        with self._brush_size.get_lock():
-            return self._brush_size.value
+        return self._state['brush_size']
 
     @brush_size.setter
     def brush_size(self, new_value: int) -> None:
         """Set the size of the brush to a new value."""
-        # get the brush size context and set its value
-        with self._brush_size.get_lock():
-            # if the brush size is different, queue a cursor update
-            if self._brush_size.value != new_value:
-                self.is_cursor_change = True
-            # set the brush size to the new value
-            self._brush_size.value = new_value
+        self._set_cursor_field('brush_size', new_value)
 
     @property
-    def is_cursor_change(self) -> bool:
-        """Return True if the cursor has changed, false otherwise."""
-        # get the brush mode context and return its value
-        with self._is_cursor_change.get_lock():
-            return self._is_cursor_change.value
-
-    @is_cursor_change.setter
-    def is_cursor_change(self, new_value: bool) -> None:
-        """Signal a cursor change (True) or clear one (False)."""
-        # get the brush mode context and set its value
-        with self._is_cursor_change.get_lock():
-            self._is_cursor_change.value = new_value
+    def label(self) -> int:
+        """Return the class index of the label to paint with."""
+        return self._state['label']
+
+    @label.setter
+    def label(self, new_value: int) -> None:
+        """Set the class index of the label to paint with."""
+        self._set_cursor_field('label', new_value)
+
+    @property
+    def opacity(self) -> int:
+        """Return the opacity of the segmentation overlay in [0, 9]."""
+        return self._state['opacity']
+
+    @opacity.setter
+    def opacity(self, new_value: int) -> None:
+        """Set the opacity of the segmentation overlay in [0, 9]."""
+        self._state.write(opacity=new_value)
+
+    def _set_cursor_field(self, name: str, new_value: int) -> None:
+        """
+        Set a field of the shared state that the cursor is drawn from.
+
+        Args:
+            name: the name of the field, i.e., 'label' or 'brush_size'
+            new_value: the new value for the field
+
+        Returns:
+            None
+
+        """
+        # if the value is different, advance the cursor generation to queue
+        # a cursor update
+        if self._state[name] != new_value:
+            self._state.write(**{
+                name: new_value,
+                'cursor': self._state['cursor'] + 1,
+            })
 
     @property
     def image(self) -> np.ndarray:
         """Return the image to display under the labeling overlay."""
-        # if brush mode, return the normal image
-        if self.is_brush:
-            return self._image
-        # otherwise in super pixel mode, return the super pixel
-        return self._super_pixel
+        # the super pixel boundaries are drawn on their own layer, so the
+        # source image is under the overlay in both modes
+        return self._image
 
     def _on_key_press(self, symbol: int) -> None:
         """
@@ -149,17 +327,355 @@ class DataLabeler(object):
         # if key is save, save the segmentation to disk
         if symbol == key.S:
             print('saving')
-            Image.fromarray(self._segmentation).save(self._output_file)
+            self._save()
         # if key is escape, save the segmentation to disk and quit
         elif symbol == key.ESCAPE:
             print('saving and quitting')
-            Image.fromarray(self._segmentation).save(self._output_file)
-            self._is_running = False
+            self._save(is_final=True)
+            self._scheduler.stop()
+        # if key is next, save the segmentation and label the next image
+        elif symbol == key.N:
+            self._switch(1)
+        # if key is previous, save the segmentation and label the last image
+        elif symbol == key.P:
+            self._switch(-1)
+        # if key is undo, undo the last edit to the segmentation
+        elif symbol == key.Z:
+            self._did_restore(self._history.undo())
+        # if key is redo, redo the last undone edit to the segmentation
+        elif symbol == key.Y:
+            self._did_restore(self._history.redo())
         # if the key is in [KEY_ZERO, KEY_NINE] it's numeric, adjust the
         # opacity overlay
         elif KEY_ZERO <= symbol <= KEY_NINE:
             print('setting opacity to {}'.format(symbol - KEY_ZERO))
-            self._opacity = symbol - KEY_ZERO
+            self.opacity = symbol - KEY_ZERO
+            self._scheduler.mark_dirty('opacity')
+
+    def _did_restore(self, rect: tuple) -> None:
+        """
+        Respond to an undo or redo of an edit to the segmentation.
+
+        Args:
+            rect: the (top, left, bottom, right) rectangle that changed (or
+                  None if nothing changed)
+
+        Returns:
+            None
+
+        """
+        if rect is None:
+            return
+        if self._journal is not None:
+            pixels = self._segmentation[rectangle.to_slice(rect)]
+            self._journal.region(rect, pixels)
+        self._mark_segmentation_dirty(rect, is_fill=False)
+
+    def _save(self, is_final: bool=False) -> None:
+        """
+        Save the segmentation to the output file in the background.
+
+        Args:
+            is_final: whether this is the last save of the image, i.e., the
+                      journal of the image is closed after the save
+
+        Returns:
+            None
+
+        """
+        if self._output_file is None:
+            print('failed to save: there is no output file')
+            self._state.write(save_error=True)
+            return
+        # finish any checkpoint of the journal before it's closed
+        if is_final:
+            self._checkpoint_worker.wait()
+        # the worker only runs the latest request, so wait for the save of
+        # another image to finish instead of superseding it
+        if self._save_path != self._output_file:
+            self._save_worker.wait()
+        self._save_path = self._output_file
+        generation = self._state['saving'] + 1
+        self._state.write(saving=generation)
+        # snapshot the segmentation so painting can continue while the
+        # worker encodes the snapshot
+        self._save_worker.submit((
+            generation,
+            self._output_file,
+            self._segmentation.copy(),
+            self._journal if is_final else None,
+            self._journal.offset,
+        ))
+
+    def _write_segmentation(self, request: tuple) -> tuple:
+        """
+        Write a snapshot of the segmentation to the output file.
+
+        Args:
+            request: a tuple of the generation of the save, the output file,
+                     the snapshot, the journal to close after the save (or
+                     None), and the offset of the journal at the snapshot
+
+        Returns:
+            a tuple of the request and whether the save succeeded
+
+        """
+        _, path, segmentation, _, _ = request
+        try:
+            save_segmentation(path, segmentation, self._colors,
+                compress_level=self._compress_level,
+                file_format=self._output_format,
+            )
+        except (OSError, ValueError):
+            traceback.print_exc()
+            return request, False
+        return request, True
+
+    def _did_save(self, result: tuple) -> None:
+        """
+        Respond to a finished save of the segmentation.
+
+        Args:
+            result: a tuple of the request and whether the save succeeded
+
+        Returns:
+            None
+
+        """
+        (generation, path, _, journal, offset), is_saved = result
+        self._state.write(saved=generation, save_error=not is_saved)
+        print('saved' if is_saved else 'failed to save')
+        if journal is None or path is None:
+            return
+        # the journal is only needed to recover edits that weren't saved, so
+        # remove it if the last save of the image contains every edit
+        if is_saved and offset == journal.offset:
+            journal.remove()
+            if os.path.exists(path + CHECKPOINT_SUFFIX):
+                os.remove(path + CHECKPOINT_SUFFIX)
+        else:
+            journal.close()
+
+    def _checkpoint(self) -> None:
+        """Checkpoint the segmentation if the journal is over its budget."""
+        if self._output_file is None or self._journal is None:
+            return
+        if self._journal.size <= self._journal_bytes:
+            return
+        if self._checkpoint_worker.is_busy:
+            return
+        # the offset and the snapshot are taken together so that the
+        # checkpoint contains every record before the offset
+        self._checkpoint_worker.submit((
+            self._journal,
+            self._output_file,
+            self._journal.offset,
+            self._segmentation.copy(),
+        ))
+
+    def _write_checkpoint(self, request: tuple) -> tuple:
+        """
+        Write a checkpoint of the segmentation next to the output file.
+
+        Args:
+            request: a tuple of the journal, the output file, the offset of
+                     the journal, and the snapshot
+
+        Returns:
+            a tuple of the journal and the offset that the checkpoint
+            contains, or None if the checkpoint failed
+
+        """
+        journal, path, offset, segmentation = request
+        # checkpoints favor speed over size, they're replaced frequently.
+        # class indexes skip the lookup of colors when writing and reading
+        try:
+            save_segmentation(path + CHECKPOINT_SUFFIX, segmentation,
+                self._colors,
+                compress_level=1,
+                file_format='index',
+            )
+        except (OSError, ValueError):
+            traceback.print_exc()
+            return None
+        return journal, offset
+
+    def _did_checkpoint(self, result: tuple) -> None:
+        """
+        Compact the journal after a checkpoint is written.
+
+        Args:
+            result: a tuple of the journal and the offset that the checkpoint
+                    contains, or None if the checkpoint failed
+
+        Returns:
+            None
+
+        """
+        if result is not None:
+            journal, offset = result
+            journal.compact(offset)
+
+    def _load_segmentation(self, segmentation: np.ndarray) -> None:
+        """
+        Load the segmentation of the image and recover its unsaved edits.
+
+        Args:
+            segmentation: the a priori map of class indexes (or None)
+
+        Returns:
+            None
+
+        """
+        # if there is no segmentation, initialize as the first label
+        if segmentation is None:
+            shape = self._image.shape[:2]
+            segmentation = np.zeros(shape, dtype=np.uint8)
+        # without an output file there is nowhere to journal the edits to
+        self._segmentation = segmentation
+        self._journal = None
+        if self._output_file is None:
+            return
+        # recover the edits of a session that didn't exit cleanly. the
+        # checkpoint contains the segmentation at the last compaction of the
+        # journal and the journal contains the edits since then
+        checkpoint_path = self._output_file + CHECKPOINT_SUFFIX
+        journal_path = self._output_file + JOURNAL_SUFFIX
+        try:
+            recovered = segmentation
+            if os.path.exists(checkpoint_path):
+                recovered = load_segmentation(checkpoint_path, self._colors)
+                if recovered.shape[:2] != segmentation.shape[:2]:
+                    raise ValueError('{} is not a {}x{} segmentation'.format(
+                        checkpoint_path, *segmentation.shape[:2]
+                    ))
+            edits = replay(journal_path, recovered)
+            self._journal = Journal(journal_path, recovered.shape)
+        # a corrupt journal or one of another image can't be recovered. set
+        # it aside and start a fresh journal of the segmentation instead
+        except (OSError, ValueError):
+            traceback.print_exc()
+            for path in (checkpoint_path, journal_path):
+                if os.path.exists(path):
+                    os.replace(path, path + BAD_SUFFIX)
+                    print('moved {} to {}'.format(path, path + BAD_SUFFIX))
+            self._journal = Journal(journal_path, segmentation.shape)
+            return
+        if edits:
+            print('recovered {} edits from the journal'.format(edits))
+        self._segmentation = recovered
+
+    def _next_items(self, index: int) -> range:
+        """Return the items of the session to prefetch after an item."""
+        if self._session is None:
+            return range(0)
+        stop = min(index + 1 + self._prefetch, len(self._session))
+        return range(index + 1, stop)
+
+    @staticmethod
+    def _make_image_layer(image: np.ndarray) -> Pyramid:
+        """
+        Make the layer of the view that shows an image.
+
+        Args:
+            image: the RGB image to show
+
+        Returns:
+            the pyramid of the opaque RGBA layer of the image
+
+        """
+        alpha = 255 * np.ones_like(image[..., 0:1])
+        layer = np.concatenate([image, alpha], axis=-1).astype(np.uint8)
+
+        return Pyramid(layer)
+
+    def _read_item(self, index: int) -> tuple:
+        """
+        Read an item of the session.
+
+        Args:
+            index: the index of the item in the session
+
+        Returns:
+            a tuple of the image, the pyramid of its layer of the view, and
+            its map of class indexes (or None if there isn't one)
+
+        """
+        image = self._session.load_image(index)
+        layer = self._make_image_layer(image)
+        # the output file of the item may be in the middle of a save
+        self._save_worker.wait()
+        segmentation = self._session.load_segmentation(index, self._colors)
+        return image, layer, segmentation
+
+    def _switch(self, step: int) -> None:
+        """
+        Save the segmentation and move to another image of the session.
+
+        Args:
+            step: the number of images to move forward (or backward)
+
+        Returns:
+            None
+
+        """
+        if self._session is None:
+            return
+        index = self._item + step
+        if not 0 <= index < len(self._session):
+            return
+        # read the next image before saving so that a file that can't be
+        # read leaves the current image open
+        try:
+            item = self._image_prefetcher.get(index)
+        except (OSError, ValueError):
+            traceback.print_exc()
+            return
+        self._history.commit()
+        self._save(is_final=True)
+        self._load(index, *item)
+        self._image_prefetcher.prefetch(self._next_items(index))
+
+    def _load(self, index: int,
+        image: np.ndarray,
+        layer: Pyramid,
+        segmentation: np.ndarray,
+    ) -> None:
+        """
+        Load an image of the session.
+
+        Args:
+            index: the index of the item in the session
+            image: the image of the item
+            layer: the pyramid of the layer of the view that shows the image
+            segmentation: the map of class indexes to start from (or None)
+
+        Returns:
+            None
+
+        """
+        item = self._session[index]
+        print('labeling {} ({} of {})'.format(
+            item.image,
+            index + 1,
+            len(self._session),
+        ))
+        self._item = index
+        self._image = image
+        self._output_file = item.output
+        self._load_segmentation(segmentation)
+        self._history = History(self._segmentation, self._history.max_bytes)
+        self._last_mouse = None
+        # the super pixels of the last image are stale until the palette
+        # process publishes super pixels for this one
+        self._super_pixel_index = None
+        self._super_pixel_index_generation = None
+        self._super_pixel_layer_generation = None
+        self._state.write(item=index)
+        # replace the layer of the image and redraw every layer
+        self._layers[0] = layer
+        self._image_rect = rectangle.full(image.shape)
+        self._scheduler.mark_dirty('opacity', 'segmentation', 'super_pixels')
 
     def _on_mouse_press(self, mouse_x: int, mouse_y: int) -> None:
         """
@@ -173,53 +689,248 @@ class DataLabeler(object):
             None
 
         """
-        shape = self._segmentation.shape
+        # start a new edit and a new brush stroke at the mouse
+        self._history.begin()
+        self._last_mouse = None
+        self._paint(mouse_x, mouse_y)
+
+    def _on_mouse_drag(self, mouse_x: int, mouse_y: int) -> None:
+        """
+        Handle a callback when a mouse drag occurs.
+
+        Args:
+            mouse_x: the x pixel of the mouse
+            mouse_y: the y pixel of the mouse
+
+        Returns:
+            None
+
+        """
+        self._paint(mouse_x, mouse_y)
+
+    def _on_mouse_release(self) -> None:
+        """Handle a callback when a mouse click is released."""
+        # finish the edit and the brush stroke
+        self._history.commit()
+        self._last_mouse = None
+        # sync the journal at the end of each stroke
+        if self._journal is not None:
+            self._journal.flush()
+        self._checkpoint()
+
+    def _paint(self, mouse_x: int, mouse_y: int) -> None:
+        """
+        Paint the segmentation at the mouse.
+
+        Args:
+            mouse_x: the x pixel of the mouse
+            mouse_y: the y pixel of the mouse
+
+        Returns:
+            None
+
+        """
+        # take a consistent snapshot of the mode, brush, and label
+        state = self._state.read()
         # if brush mode, draw on the image use the circles
-        if self.is_brush:
+        if state['is_brush']:
             # scale the brush size according to the windows zoom level
-            brush_size = int(self.brush_size / self._view.zoom_level)
-            # get the indexes of the circle in the segmentation
-            circle_x, circle_y = circle(mouse_x, mouse_y, brush_size)
-            # set the pixels outside the frame to the last pixel along the axis
-            circle_y[circle_y < 0] = 0
-            circle_y[circle_y >= shape[0]] = shape[0] - 1
-            circle_x[circle_x < 0] = 0
-            circle_x[circle_x >= shape[1]] = shape[1] - 1
-            # set the circle to the color
-            self._segmentation[circle_y, circle_x] = self._color
+            brush_size = int(state['brush_size'] / self._view.zoom_level)
+            mouse = mouse_y, mouse_x
+            # if this is the start of the stroke, stamp the brush circle. the
+            # history copies the pixels under the brush before they're painted
+            if self._last_mouse is None:
+                self._history.will_change(
+                    rectangle.around(*mouse, brush_size)
+                )
+                rect = paint_circle(self._segmentation,
+                    *mouse,
+                    brush_size,
+                    state['label'],
+                )
+                if self._journal is not None:
+                    self._journal.circle(*mouse,
+                        brush_size,
+                        state['label'],
+                    )
+            # otherwise paint the stroke between the last mouse position and
+            # this one so that fast drags don't leave gaps between the sampled
+            # positions
+            else:
+                self._history.will_change(rectangle.union(
+                    rectangle.around(*self._last_mouse, brush_size),
+                    rectangle.around(*mouse, brush_size),
+                ))
+                rect = paint_capsule(self._segmentation,
+                    self._last_mouse,
+                    mouse,
+                    brush_size,
+                    state['label'],
+                )
+                if self._journal is not None:
+                    self._journal.capsule(self._last_mouse,
+                        mouse,
+                        brush_size,
+                        state['label'],
+                    )
+            self._last_mouse = mouse
+            self._mark_segmentation_dirty(rect, is_fill=False)
         # if super pixel mode, draw on super pixels
         else:
-            # ignore the mouse if it's outside of the window frame
-            if mouse_y >= shape[0] or mouse_x >= shape[1]:
+            index = self._get_super_pixel_index()
+            if index is None:
                 return
-            # select the super pixel with the same location as the mouse cursor
-            super_pixel = self._super_pixel_segments[mouse_y, mouse_x]
-            mask = self._super_pixel_segments == super_pixel
-            self._segmentation[mask] = self._color
-
-    def _update_screen(self) -> None:
-        """Update the screen from local data structures."""
-        # setup the source image with an alpha channel
-        alpha = 255 * np.ones_like(self.image[..., 0:1])
-        image = np.concatenate([self._image, alpha], axis=-1).astype(np.uint8)
-        # setup the super pixel segmentations
-        super_pixels = np.zeros_like(self.image)
-        super_pixels = mark_boundaries(
-            super_pixels,
-            self._super_pixel_segments,
-            self._super_pixel_color
-        )
-        # concatenate the first channel of sup as the alpha channel
-        super_pixels = [super_pixels, super_pixels[..., 0:1]]
-        super_pixels = np.concatenate(super_pixels, axis=-1).astype(np.uint8)
-        # setup the segmentation image with an alpha channel scaled by the
-        # opacity parameter of the application [0, 9]
-        intensity = 255 * (self._opacity / 9)
-        intensity = intensity * np.ones_like(self._segmentation[..., 0:1])
-        segmentation = np.concatenate([self._segmentation, intensity], axis=-1)
-        segmentation = segmentation.astype(np.uint8)
-        # send the images to the window
-        self._view.show([image, segmentation, super_pixels])
+            # select the super pixel with the same location as the mouse
+            # cursor, ignoring the mouse if it's outside of the window frame
+            super_pixel = index.segment_at(mouse_y, mouse_x)
+            if super_pixel is None:
+                return
+            # fill the pixels of the super pixel. if it's already filled with
+            # the label, there is nothing to redraw
+            label = state['label']
+            self._history.will_change(index.rect(super_pixel))
+            rect = index.fill(self._segmentation, super_pixel, label)
+            if rect is not None:
+                # the pixels of the label in the rectangle are a superset of
+                # the filled pixels that only adds pixels with the label
+                if self._journal is not None:
+                    pixels = self._segmentation[rectangle.to_slice(rect)]
+                    self._journal.fill(rect, pixels == label, label)
+                self._mark_segmentation_dirty(rect, is_fill=True)
+
+    def _get_super_pixel_index(self) -> SuperPixelIndex:
+        """Return the index of the super pixels (None if they're stale)."""
+        # rebuild the index if the palette wrote a new map since it was built.
+        # use the index from the worker if it has indexed the map, otherwise
+        # index it here
+        generation = self._super_pixels.generation
+        if generation != self._super_pixel_index_generation:
+            indexed = self._indexed_super_pixels
+            if indexed is None or indexed[0] != generation:
+                indexed = self._index_super_pixels(generation)
+            generation, item, index = indexed
+            # the map of another item is stale
+            self._super_pixel_index = index if item == self._item else None
+            self._super_pixel_index_generation = generation
+        return self._super_pixel_index
+
+    def _index_super_pixels(self, generation: int) -> tuple:
+        """
+        Index the pixels of each super pixel of the published map.
+
+        Args:
+            generation: the generation of the map that was published when
+                        the index was requested
+
+        Returns:
+            a tuple of the generation of the map that was indexed, the item
+            of the session that it was segmented from, and the index
+
+        """
+        def reader(front):
+            return int(front['item']), SuperPixelIndex(front['segments'])
+        generation, (item, index) = self._super_pixels.read(reader)
+        return generation, item, index
+
+    def _did_index_super_pixels(self, result: tuple) -> None:
+        """Store the index of a super pixel map from the index worker."""
+        # a single assignment, so the UI thread never sees a partial result
+        self._indexed_super_pixels = result
+
+    def _mark_segmentation_dirty(self, rect: tuple, is_fill: bool) -> None:
+        """
+        Mark a rectangle of the segmentation as dirty for the next frame.
+
+        Args:
+            rect: the (top, left, bottom, right) rectangle that was painted
+            is_fill: whether the rectangle was painted by a super pixel fill
+
+        Returns:
+            None
+
+        """
+        # if anything other than a fill changed the segmentation, the filled
+        # super pixels may have been painted over
+        if not is_fill and self._super_pixel_index is not None:
+            self._super_pixel_index.invalidate()
+        rect = rectangle.clip(rect, self._segmentation.shape)
+        rect = rectangle.union(self._segmentation_rect, rect)
+        self._segmentation_rect = rect
+        self._scheduler.mark_dirty('segmentation')
+
+    def _on_camera_change(self) -> None:
+        """Handle a callback when the camera of the view changes."""
+        self._scheduler.mark_dirty('camera')
+
+    def _update_screen(self, dirty: set) -> None:
+        """
+        Update the screen from local data structures.
+
+        Args:
+            dirty: the set of flags for the parts of the screen that changed
+
+        Returns:
+            None
+
+        """
+        # mark the tiles of the layers that changed as dirty. the source
+        # image only changes when the session moves to another image
+        rects = [self._image_rect, None, None]
+        self._image_rect = None
+        self._segmentation_tiles.mark(self._segmentation_rect)
+        self._segmentation_rect = None
+        if 'opacity' in dirty:
+            self._segmentation_tiles.mark_all()
+        if 'super_pixels' in dirty and self._update_super_pixel_boundaries():
+            self._super_pixel_tiles.mark_all()
+        # composite the dirty tiles that are visible. tiles off of the screen
+        # stay dirty until the camera moves over them
+        visible = self._view.visible_rect()
+        # copy the colors of the labels and the alpha channel scaled by the
+        # opacity parameter of the application [0, 9] into the segmentation
+        alpha = min(255, max(0, int(255 * (self.opacity / 9))))
+        for rect in self._segmentation_tiles.take(visible):
+            index = rectangle.to_slice(rect)
+            layer = self._segmentation_layer[index]
+            layer[..., :3] = self._colors[self._segmentation[index]]
+            layer[..., 3] = alpha
+            self._layers[1].update(rect)
+            rects[1] = rectangle.union(rects[1], rect)
+        # draw the boundaries in the super pixel color with the first channel
+        # of the color as the alpha channel
+        color = (*self._super_pixel_color, self._super_pixel_color[0])
+        color = np.array(color, dtype=np.uint8)
+        for rect in self._super_pixel_tiles.take(visible):
+            index = rectangle.to_slice(rect)
+            boundaries = self._super_pixel_boundaries[index][..., None]
+            self._super_pixel_layer[index] = np.where(boundaries, color, 0)
+            self._layers[2].update(rect)
+            rects[2] = rectangle.union(rects[2], rect)
+        # send the pyramids of the layers and their changed rectangles to the
+        # window
+        self._view.show(self._layers, rects)
+
+    def _update_super_pixel_boundaries(self) -> bool:
+        """
+        Copy the super pixel boundaries from the palette if they're stale.
+
+        Returns:
+            True if the boundaries were copied, False if they were up to date
+
+        """
+        if self._super_pixels.generation == self._super_pixel_layer_generation:
+            return False
+        # copy the boundaries between super pixels that the palette computed
+        # along with the segmentation map, unless they're for another image
+        def reader(front):
+            if front['item'] != self._item:
+                return np.zeros_like(front['boundaries'])
+            return front['boundaries'].copy()
+        generation, boundaries = self._super_pixels.read(reader)
+        self._super_pixel_layer_generation = generation
+        self._super_pixel_boundaries = boundaries
+
+        return True
 
     def _on_palette_change(self, palette_data: dict) -> None:
         """
@@ -232,63 +943,289 @@ class DataLabeler(object):
             None
 
         """
-        # set the color from the metadata
-        color = self._label_to_rgb[palette_data['label']]
-        # if the selected color is different, queue a cursor update
-        if not np.array_equal(self._color, color):
-            self.is_cursor_change = True
-        # store the color with the new value
-        self._color[:] = color
+        # move to the image if the palette changed before its first poll
+        self._sync_item()
+        # set the label from the metadata
+        self.label = self._label_to_index[palette_data['label']]
         # set the is brush flag
         self.is_brush = palette_data['paint'] == 'brush'
         # store the brush size with the new value
         self.brush_size = palette_data['brush_size']
-        # if the palette is in super pixel mode, get that data
+        # if the palette is in super pixel mode, request the segmentation
+        # with the algorithm, arguments, and granularity from the palette
+        request = None
         if palette_data['paint'] == 'super_pixel':
-            # get the algorithm from the dictionary
             algorithm = palette_data['super_pixel']
-            # get the arguments for the specific algorithm
             arguments = palette_data[algorithm]
-            # get the segments using the given algorithm and arguments
-            segs = segment(self._image, algorithm, **arguments)
-            # apply the segmented image pixels and segments to local structures
-            self._super_pixel_segments[:], self._super_pixel[:] = segs
+            request = algorithm, arguments, palette_data['granularity']
+        # submit the request to the worker if it changed. in brush mode, the
+        # request is None to clear the super pixels
+        if request != self._super_pixel_request:
+            self._super_pixel_request = request
+            self._super_pixel_worker.submit((self._palette_item, request))
+
+    def _prepare(self, index: int, image: np.ndarray) -> PreparedImage:
+        """
+        Prepare an image of the session for segmenting super pixels.
+
+        Args:
+            index: the index of the image in the session
+            image: the image to prepare
+
+        Returns:
+            the preprocessed forms of the image and their cache keys
+
+        """
+        # setup a downsampled copy of the image to preview super pixels on
+        preview_context = None
+        preview_key = None
+        if self._preview_scale is not None and self._preview_scale > 1:
+            preview_image = downsample(image, self._preview_scale)
+            preview_context = ImageContext(preview_image)
+            preview_key = SegmentCache.image_key(preview_image)
+        return PreparedImage(index,
+            ImageContext(image),
+            SegmentCache.image_key(image),
+            preview_context,
+            preview_key,
+        )
+
+    def _super_pixel_arguments(self, arguments: dict) -> dict:
+        """Return the arguments of an algorithm with the tile size."""
+        # segment in tiles if there is a tile size. the tile size changes the
+        # segmentation, so it's one of the arguments to cache by
+        if self._tile_size is not None:
+            arguments = dict(arguments, tile_size=self._tile_size)
+        return arguments
+
+    def _prefetch_prepared(self, index: int) -> PreparedImage:
+        """
+        Read and prepare an image of the session and segment its super pixels.
+
+        Args:
+            index: the index of the image in the session
+
+        Returns:
+            the prepared image. unless it's the image of the palette, its
+            super pixels are segmented into the cache with the latest
+            settings of the palette (or the defaults) so that switching to
+            it doesn't wait for them
+
+        """
+        prepared = self._prepare(index, self._session.load_image(index))
+        # the worker previews the super pixels of the image of the palette
+        # while it segments them, so it shouldn't wait for them here
+        if index == self._palette_item:
+            return prepared
+        request = self._super_pixel_request
+        if request is None:
+            algorithm = Palette.DEFAULTS['super_pixel']
+            arguments = Palette.DEFAULTS[algorithm]
+        else:
+            algorithm, arguments, _ = request
+        self._segment_cache.segment(prepared.context, algorithm,
+            image_key=prepared.key,
+            workers=self._workers,
+            **self._super_pixel_arguments(arguments)
+        )
+        return prepared
+
+    def _get_prepared(self, index: int) -> PreparedImage:
+        """
+        Return the prepared image of an item (on the super pixel worker).
+
+        Args:
+            index: the index of the image in the session
+
+        Returns:
+            the prepared image, waiting for it if it's being prefetched
+
+        """
+        if self._prepared is None or self._prepared.item != index:
+            # the image of the main process may have moved on to another
+            # item, so only a labeler without a session prepares it
+            if self._session is None:
+                self._prepared = self._prepare(index, self._image)
+            else:
+                self._prepared = self._super_pixel_prefetcher.get(index)
+        return self._prepared
+
+    def _sync_item(self) -> None:
+        """Move the palette process to the image that's being labeled."""
+        index = self._state['item']
+        if index == self._palette_item:
+            return
+        # segment the new image with the current request from the palette.
+        # the worker prepares the image, so the palette never waits for it
+        if self._palette_item is not None:
+            request = self._super_pixel_request
+            self._super_pixel_worker.submit((index, request))
+        self._palette_item = index
+        # without a session the worker prepares the image of the labeler, so
+        # there is nothing to prefetch
+        if self._session is None:
+            return
+        # the item itself stays in the prefetcher until the worker takes it
+        self._super_pixel_prefetcher.prefetch(
+            [index, *self._next_items(index)]
+        )
+
+    def _segment_super_pixels(self, request: tuple):
+        """
+        Compute the super pixel segmentation for a request from the palette.
+
+        Args:
+            request: a tuple of the index of the item of the session to
+                     segment and the request from the palette, i.e., a
+                     tuple of the
+                     algorithm, its arguments, and the granularity in
+                     [0, 100] to merge the segments to, or None to clear
+                     the super pixel segmentation
+
+        Yields:
+            tuples of the item of the session that was segmented and a
+            preview of the segmentation from the downsampled image (unless
+            the segmentation is cached), then the tuple of segments and
+            boundaries, or None to clear them
+
+        """
+        index, request = request
+        if request is None:
+            yield index, None
+            return
+        prepared = self._get_prepared(index)
+        algorithm, arguments, granularity = request
+        arguments = self._super_pixel_arguments(arguments)
+        # if the segmentation isn't cached, segment the downsampled image
+        # first and publish it upsampled as a preview
+        key = self._segment_cache.key(prepared.key, algorithm, arguments)
+        is_cached = self._segment_cache.get(key) is not None
+        if prepared.preview_context is not None and not is_cached:
+            preview = self._segment_cache.segment(
+                prepared.preview_context,
+                algorithm,
+                image_key=prepared.preview_key,
+                **downsample_arguments(request[1], self._preview_scale)
+            )
+            shape = prepared.context.image.shape
+            yield prepared.item, tuple(upsample(x, shape) for x in preview)
+        # get the segments using the given algorithm and arguments
+        segs = self._segment_cache.segment(prepared.context, algorithm,
+            image_key=prepared.key,
+            workers=self._workers,
+            **arguments
+        )
+        # if there is a granularity, cut the merge tree of the segmentation.
+        # the tree is only built once for each segmentation
+        if granularity:
+            if self._merge_tree is None or self._merge_tree[0] != key:
+                tree = MergeTree(prepared.context.lab, segs[0])
+                self._merge_tree = key, tree
+            segs = segment_merged(self._merge_tree[1], granularity / 100)
+        yield prepared.item, segs
+
+    def _publish_super_pixels(self, result: tuple) -> None:
+        """
+        Publish a super pixel segmentation to the main process.
+
+        Args:
+            result: a tuple of the item of the session that was segmented
+                    and the tuple of segments and boundaries, or None to
+                    clear them
+
+        Returns:
+            None
+
+        """
+        item, segs = result
+        back = self._super_pixels.back
+        back['item'][...] = item
+        # if there is a segmentation, write the segments and boundaries to
+        # the back buffer
+        if segs is not None:
+            back['segments'][:], back['boundaries'][:] = segs
         # otherwise set the super pixel data back to 0
         else:
-            self._super_pixel_segments[:] = 0
-            self._super_pixel[:] = 0
+            back['segments'][:] = 0
+            back['boundaries'][:] = False
+        # publish the back buffer to the main process
+        self._super_pixels.flip()
+
+    def _status(self) -> str:
+        """Return the status of the background work for the palette."""
+        status = 'Busy' if self._super_pixel_worker.is_busy else 'Ready'
+        state = self._state.read()
+        if state['saving'] > state['saved']:
+            status += ' | Saving'
+        elif state['save_error']:
+            status += ' | Save failed'
+        elif state['saved']:
+            status += ' | Saved'
+        return status
 
     def _update_cursor(self) -> None:
         """Update the mouse cursor for the application window."""
-        # get the brush size (get a local reference in case another process
-        # changes it between the different accesses in this method)
-        brush_size = self.brush_size
+        # take a consistent snapshot of the brush size, label, and cursor
+        # generation in case the palette changes them while drawing
+        state = self._state.read()
         # if there is not update, return
-        if not self.is_cursor_change:
+        if state['cursor'] == self._cursor_generation:
             return
         # otherwise dequeue the update
-        self.is_cursor_change = False
+        self._cursor_generation = state['cursor']
+        brush_size = state['brush_size']
         # make a static border ring for the cursor
         ring = make_ring(brush_size - 1, brush_size)
         cursor = make_cursor(ring, self._brush_border_color)
         # make a circle with the current color
         brush_circle = make_circle(brush_size) - ring
-        cursor = cursor + make_cursor(brush_circle, self._color)
+        color = self._colors[state['label']]
+        cursor = cursor + make_cursor(brush_circle, color)
         # create the pyglet cursor object and set it
         mouse = pyglet_cursor(cursor)
         self._view.set_cursor(mouse)
 
+    def _poll(self) -> None:
+        """Poll the view and the palette for events that change the screen."""
+        # dispatch the window events to the mouse and keyboard handlers
+        self._view.dispatch_events()
+        # if the palette wrote a new super pixel map, redraw the boundaries
+        generation = self._super_pixels.generation
+        if generation != self._super_pixel_layer_generation:
+            self._scheduler.mark_dirty('super_pixels')
+        # index the new super pixel map in the background before it's clicked
+        if generation != self._super_pixel_index_request:
+            self._super_pixel_index_request = generation
+            self._super_pixel_index_worker.submit(generation)
+        self._update_cursor()
+        # sync the journal if edits have been buffered for too long
+        if self._journal is not None:
+            self._journal.poll()
+
     def run(self) -> None:
         """Run the simulation."""
         # start the palette as a background thread
-        Palette.thread(self._metadata, self._on_palette_change)
-        # start the application loop
-        self._is_running = True
-        while self._is_running:
-            self._update_cursor()
-            self._update_screen()
-        # close the image view
+        Palette.thread(self._metadata,
+            self._on_palette_change,
+            self._status,
+            self._sync_item,
+        )
+        # start reading the next images of the session
+        self._image_prefetcher.prefetch(self._next_items(self._item))
+        # draw the first frame and start the application loop
+        self._scheduler.mark_dirty('opacity', 'segmentation', 'super_pixels')
+        self._scheduler.run()
+        # wait for any pending save to finish before exiting. if the last
+        # save didn't close the journal, keep it to recover the edits from
+        self._save_worker.wait()
+        self._checkpoint_worker.wait()
+        if self._journal is not None and not self._journal.closed:
+            self._journal.close()
+        # close the image view and free the shared memory
         self._view.close()
+        for shared in (self._state, self._super_pixels):
+            shared.close()
+            shared.unlink()
 
 
 # explicitly define the outward facing API of this module
@@ -0,0 +1,400 @@
+"""Compute class statistics of label files on a pool of processes."""
+import argparse
+from collections import namedtuple
+import csv
+import json
+import os
+import numpy as np
+from .bulk import find_files, map_unordered
+from .label_file import read_segmentation
+from .label_map import make_colors, make_lookup, pack_rgb
+from .metadata import Metadata
+
+
+# the name of the class of pixels with colors that aren't labels
+UNKNOWN = '(unknown)'
+# the name of the cache of the statistics of each file in the output
+# directory of an incremental run
+CACHE_FILE = 'cache.json'
+# the statistics of a label file: the path of the file, its modification
+# time in nanoseconds and size in bytes when it was read, the number of
+# pixels of each class (the last class is unknown colors), a list of
+# [class, class, count] triples of the neighboring pixels of each pair of
+# different classes, and the error message if the file couldn't be read
+# (or None)
+Record = namedtuple('Record',
+    ['path', 'mtime', 'size', 'pixels', 'pairs', 'error'],
+)
+
+
+# the colors and lookup table of the worker process, set by _initialize
+_COLORS = None
+_LOOKUP = None
+
+
+def _initialize(colors: np.ndarray) -> None:
+    """
+    Set up a worker process to compute statistics.
+
+    Args:
+        colors: the color of each class index
+
+    Returns:
+        None
+
+    """
+    global _COLORS, _LOOKUP
+    _COLORS = colors
+    _LOOKUP = make_lookup(colors)
+
+
+def count_classes(segmentation: np.ndarray, classes: int) -> tuple:
+    """
+    Count the pixels and the neighboring pixels of each class.
+
+    Args:
+        segmentation: the map of class indexes
+        classes: the number of classes
+
+    Returns:
+        a tuple of the number of pixels of each class and a matrix of the
+        number of horizontally or vertically neighboring pixels of each pair
+        of classes. the matrix is upper triangular, the count of each pair
+        is at [lower class, higher class]
+
+    """
+    segmentation = segmentation.astype(np.int64)
+    pixels = np.bincount(segmentation.ravel(), minlength=classes)
+    # pair each pixel with its right and bottom neighbor and count the
+    # pairs of different classes by a packed code of the two classes
+    codes = []
+    for a, b in [
+        (segmentation[:, :-1], segmentation[:, 1:]),
+        (segmentation[:-1, :], segmentation[1:, :]),
+    ]:
+        edge = a != b
+        low = np.minimum(a[edge], b[edge])
+        high = np.maximum(a[edge], b[edge])
+        codes.append(low * classes + high)
+    adjacency = np.bincount(np.concatenate(codes), minlength=classes**2)
+
+    return pixels, adjacency.reshape(classes, classes)
+
+
+def _stats(task: tuple) -> Record:
+    """
+    Compute the statistics of a label file in a worker process.
+
+    Args:
+        task: a tuple of the path, modification time, and size of the file
+
+    Returns:
+        the statistics of the file
+
+    """
+    path, mtime, size = task
+    classes = len(_COLORS) + 1
+    try:
+        segmentation = read_segmentation(path, _COLORS)
+    except (OSError, ValueError) as error:
+        return Record(path, mtime, size, None, None, str(error))
+    # unknown colors map to the last class
+    if segmentation.ndim == 3:
+        segmentation = _LOOKUP[pack_rgb(segmentation)]
+    pixels, adjacency = count_classes(segmentation, classes)
+    # the matrix is sparse for most images, so only its nonzero pairs are
+    # sent back to the main process and cached
+    pairs = np.argwhere(adjacency)
+    counts = adjacency[pairs[:, 0], pairs[:, 1]]
+    pairs = np.column_stack([pairs, counts]).tolist()
+
+    return Record(path, mtime, size, pixels.tolist(), pairs, None)
+
+
+def _read_cache(path: str, colors: np.ndarray) -> dict:
+    """
+    Read the cached statistics of the files of an earlier run.
+
+    Args:
+        path: the path of the cache file
+        colors: the color of each class index
+
+    Returns:
+        a dictionary of Records keyed by the absolute path of each file,
+        empty if there is no cache or it was made with other colors
+
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as cache_file:
+        cache = json.load(cache_file)
+    if cache.get('colors') != colors.tolist():
+        return {}
+    return {key: Record(*values) for key, values in cache['files'].items()}
+
+
+def _write_cache(path: str, colors: np.ndarray, records: dict) -> None:
+    """
+    Write the statistics of the files of a run to the cache.
+
+    Args:
+        path: the path of the cache file
+        colors: the color of each class index
+        records: a dictionary of Records keyed by the absolute path of each
+                 file
+
+    Returns:
+        None
+
+    """
+    cache = {
+        'colors': colors.tolist(),
+        'files': {key: list(record) for key, record in records.items()},
+    }
+    # write to a temporary file and move it into place so that a crash
+    # while writing never leaves a partial cache
+    with open(path + '.tmp', 'w') as cache_file:
+        json.dump(cache, cache_file)
+    os.replace(path + '.tmp', path)
+
+
+def collect(paths: list, colors: np.ndarray,
+    workers: int=None,
+    cache: dict=None,
+):
+    """
+    Compute the statistics of label files on a pool of processes.
+
+    Args:
+        paths: the label files and directories of label files
+        colors: the color of each class index
+        workers: the number of processes to use (the number of CPUs if None)
+        cache: a dictionary of the Records of an earlier run keyed by the
+               absolute path of each file, files with the same modification
+               time and size are not read again (None to read every file)
+
+    Returns:
+        a generator of (key, Record, is_cached) tuples of each file where
+        key is the absolute path of the file, cached files come first
+
+    """
+    cache = cache or {}
+    tasks = []
+    for path in find_files(paths):
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError as error:
+            yield key, Record(path, None, None, None, None, str(error)), False
+            continue
+        record = cache.get(key)
+        if record is not None and record.error is None and \
+            (record.mtime, record.size) == (stat.st_mtime_ns, stat.st_size):
+            yield key, record._replace(path=path), True
+            continue
+        tasks.append((path, stat.st_mtime_ns, stat.st_size))
+    results = map_unordered(_stats, tasks,
+        workers=workers,
+        initializer=_initialize,
+        initargs=(colors,),
+    )
+    for record in results:
+        yield os.path.abspath(record.path), record, False
+
+
+def _write_csv(path: str, header: list, rows) -> None:
+    """
+    Write a CSV file.
+
+    Args:
+        path: the path of the file to write
+        header: the names of the columns
+        rows: an iterable of the rows to write
+
+    Returns:
+        None
+
+    """
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+class Statistics(object):
+    """The merged class statistics of a set of label files."""
+
+    def __init__(self, labels: list) -> None:
+        """
+        Initialize new empty statistics.
+
+        Args:
+            labels: the name of each label in order of their class indexes
+
+        Returns:
+            None
+
+        """
+        self.labels = list(labels) + [UNKNOWN]
+        classes = len(self.labels)
+        self.files = 0
+        self.pixels = np.zeros(classes, dtype=np.int64)
+        self.images = np.zeros(classes, dtype=np.int64)
+        self.adjacency = np.zeros((classes, classes), dtype=np.int64)
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(labels={})'.format(self.__class__.__name__, self.labels)
+
+    def add(self, record: Record) -> None:
+        """
+        Merge the statistics of a file.
+
+        Args:
+            record: the statistics of the file
+
+        Returns:
+            None
+
+        """
+        pixels = np.array(record.pixels, dtype=np.int64)
+        self.files += 1
+        self.pixels += pixels
+        self.images += pixels > 0
+        if record.pairs:
+            pairs = np.array(record.pairs, dtype=np.int64)
+            # the matrix is symmetric, the order of a pair doesn't matter
+            np.add.at(self.adjacency, (pairs[:, 0], pairs[:, 1]), pairs[:, 2])
+            np.add.at(self.adjacency, (pairs[:, 1], pairs[:, 0]), pairs[:, 2])
+
+    def to_dict(self) -> dict:
+        """Return a dictionary of the statistics for JSON."""
+        total = max(int(self.pixels.sum()), 1)
+        return {
+            'files': self.files,
+            'labels': self.labels,
+            'pixels': self.pixels.tolist(),
+            'fraction': (self.pixels / total).tolist(),
+            'images': self.images.tolist(),
+            'adjacency': self.adjacency.tolist(),
+        }
+
+    def write(self, directory: str, records: list) -> None:
+        """
+        Write the statistics to CSV and JSON files in a directory.
+
+        Args:
+            directory: the directory to write the files to
+            records: the Records of the files to list in images.csv
+
+        Returns:
+            None
+
+        """
+        summary = self.to_dict()
+        with open(os.path.join(directory, 'statistics.json'), 'w') as stats:
+            json.dump(summary, stats, indent=2)
+        _write_csv(os.path.join(directory, 'classes.csv'),
+            ['label', 'pixels', 'fraction', 'images'],
+            zip(
+                self.labels,
+                summary['pixels'],
+                summary['fraction'],
+                summary['images'],
+            ),
+        )
+        _write_csv(os.path.join(directory, 'images.csv'),
+            ['path'] + self.labels,
+            ([record.path] + record.pixels for record in records),
+        )
+        _write_csv(os.path.join(directory, 'adjacency.csv'),
+            [''] + self.labels,
+            ([l] + row for l, row in zip(self.labels, summary['adjacency'])),
+        )
+
+
+# create an argument parser to read arguments from the command line
+PARSER = argparse.ArgumentParser(prog='python3 . stats', description=__doc__)
+# add an argument for the label files to compute statistics of
+PARSER.add_argument('paths',
+    type=str,
+    nargs='+',
+    help='the label files and directories of label files.',
+)
+# add an argument for the labeling metadata
+PARSER.add_argument('--metadata', '-m',
+    type=str,
+    help='the labeling metadata as a .csv file.',
+    required=True,
+)
+# add an argument for the output directory
+PARSER.add_argument('--output_dir', '-o',
+    type=str,
+    help='the directory to write the CSV and JSON summaries to.',
+    required=True,
+)
+# add an argument for reusing the statistics of unchanged files
+PARSER.add_argument('--incremental', '-I',
+    action='store_true',
+    help='only read files that changed since the last run to this output.',
+)
+# add an argument for the number of processes to read files on
+PARSER.add_argument('--workers', '-w',
+    type=int,
+    help='the number of processes to read files on.',
+    required=False,
+    default=None,
+)
+
+
+def main(argv: list=None) -> int:
+    """
+    Compute the statistics of label files from the command line.
+
+    Args:
+        argv: the command line arguments (None to use sys.argv)
+
+    Returns:
+        the exit status, 1 if any file failed, otherwise 0
+
+    """
+    args = PARSER.parse_args(argv)
+    metadata = Metadata.read_csv(args.metadata)
+    colors = make_colors(metadata['rgb'])
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache_path = os.path.join(args.output_dir, CACHE_FILE)
+    cache = _read_cache(cache_path, colors) if args.incremental else {}
+    statistics = Statistics(metadata['label'])
+    records = {}
+    failed = read = 0
+    for key, record, is_cached in collect(args.paths, colors,
+        workers=args.workers,
+        cache=cache,
+    ):
+        if record.error is not None:
+            failed += 1
+            print('{}: {}'.format(record.path, record.error))
+            continue
+        read += not is_cached
+        statistics.add(record)
+        records[key] = record
+    # list the files in a stable order regardless of the order they finish
+    records = dict(sorted(records.items()))
+    statistics.write(args.output_dir, list(records.values()))
+    # the cache only holds the files of this run, so removed files drop out
+    _write_cache(cache_path, colors, records)
+    print('{} files, {} read, {} failed'.format(
+        statistics.files + failed,
+        read,
+        failed,
+    ))
+    return 1 if failed else 0
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    collect.__name__,
+    count_classes.__name__,
+    main.__name__,
+    Statistics.__name__,
+]
@@ -0,0 +1,112 @@
+"""A double buffer of arrays in shared memory with a generation counter."""
+from multiprocessing import shared_memory
+import numpy as np
+
+
+# the number of bytes to align each array in shared memory to
+ALIGNMENT = 64
+
+
+class DoubleBuffer(object):
+    """A double buffer of arrays in shared memory with a generation counter."""
+
+    def __init__(self, fields: dict) -> None:
+        """
+        Initialize a new double buffer.
+
+        Args:
+            fields: a dictionary mapping the names of the arrays in the
+                    buffer to tuples of their shape and dtype
+
+        Returns:
+            None
+
+        """
+        self.fields = fields
+        # determine the offset of each array in each of the two slots. the
+        # header of the block is the 8 byte generation counter
+        offset = ALIGNMENT
+        offsets = []
+        for _ in range(2):
+            slot = {}
+            for name, (shape, dtype) in fields.items():
+                slot[name] = offset
+                size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                offset += -(-size // ALIGNMENT) * ALIGNMENT
+            offsets.append(slot)
+        # create the block of shared memory and the views into it. children
+        # forked from this process share the block
+        self._memory = shared_memory.SharedMemory(create=True, size=offset)
+        self._generation = np.ndarray((1,), np.int64, self._memory.buf)
+        self._generation[0] = 0
+        self._slots = []
+        for slot in offsets:
+            self._slots.append({
+                name: np.ndarray(shape, dtype, self._memory.buf, slot[name])
+                for name, (shape, dtype) in fields.items()
+            })
+        # zero the front slot so the first generation is an empty buffer
+        for array in self.front.values():
+            array[...] = 0
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(fields={})'.format(self.__class__.__name__, self.fields)
+
+    @property
+    def generation(self) -> int:
+        """Return the generation of the published arrays."""
+        return int(self._generation[0])
+
+    @property
+    def front(self) -> dict:
+        """Return the dictionary of published arrays to read from."""
+        return self._slots[self.generation % 2]
+
+    @property
+    def back(self) -> dict:
+        """Return the dictionary of arrays to write the next generation to."""
+        return self._slots[(self.generation + 1) % 2]
+
+    def flip(self) -> None:
+        """Publish the back arrays as the next generation."""
+        # the generation is a single aligned 64-bit word, so readers see
+        # either the old generation or the new one and never a torn value.
+        # only one process may write to the buffer
+        self._generation[0] += 1
+
+    def read(self, reader) -> tuple:
+        """
+        Read the published arrays without tearing.
+
+        Args:
+            reader: a callable that takes the dictionary of published arrays
+                    and returns a value computed from them (that doesn't
+                    reference the arrays)
+
+        Returns:
+            a tuple of the generation that was read and the value from the
+            reader
+
+        """
+        while True:
+            generation = self.generation
+            value = reader(self._slots[generation % 2])
+            # after a flip, the writer writes the next generation over the
+            # slot that was just read, so retry if the generation changed
+            if generation == self.generation:
+                return generation, value
+
+    def close(self) -> None:
+        """Close the view of the shared memory in this process."""
+        self._generation = None
+        self._slots = []
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """Destroy the block of shared memory (from the creating process)."""
+        self._memory.unlink()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [DoubleBuffer.__name__]
@@ -0,0 +1,36 @@
+"""A method to give temporary files the permissions of regular files."""
+import os
+import stat
+
+
+# the umask can only be read by setting it, so it's read once on import,
+# before any threads are writing files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+# the permissions of a new file, read and write for everyone less the umask
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def set_file_mode(temp_path: str, path: str) -> None:
+    """
+    Set the permissions of a temporary file that will replace a file.
+
+    Args:
+        temp_path: the path of the temporary file, e.g., from mkstemp
+        path: the path of the file that the temporary file will replace
+
+    Returns:
+        None
+
+    """
+    # mkstemp creates files that only the owner can read, keep the mode of
+    # the file being replaced or use the mode of a new file instead
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = FILE_MODE
+    os.chmod(temp_path, mode)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [set_file_mode.__name__]
@@ -1,32 +1,53 @@
 """A method for setting up a brush cursor."""
+from functools import lru_cache
 import numpy as np
 import pyglet
-from skimage.draw import circle as draw_circle
 
 
-def make_circle(radius: int, dtype: str='uint8') -> np.ndarray:
+@lru_cache(maxsize=None)
+def circle_mask(radius: int) -> np.ndarray:
     """
-    Make a circle with a given radius.
+    Make a boolean mask of a circle with a given radius.
 
     Args:
         radius: the radius of the circle to draw
 
     Returns:
-        a NumPy matrix of size 2 * radius + 1 with a circle in it.
+        a read-only boolean NumPy matrix of size 2 * radius + 1 with a circle
+        in it. masks are cached by radius, so the brush cursor and the brush
+        stamps share the same geometry
 
     """
     # if the radius is even, make it odd
     length = 2 * radius + 1
-    # create an RGBA box to house the circle in
-    box = np.zeros((length, length), dtype=dtype)
-    # get the coordinates for the circle
+    # create a box to house the circle in
+    box = np.zeros((length, length), dtype=bool)
+    # get the coordinates for the circle. skimage is slow to import, so
+    # import it on first use
+    from skimage.draw import circle as draw_circle
     x_pixels, y_pixels = draw_circle(radius, radius, radius)
     # set the coordinates of the circle in the box
-    box[x_pixels, y_pixels] = 1
+    box[x_pixels, y_pixels] = True
+    # make the cached mask read-only so callers can't corrupt the cache
+    box.setflags(write=False)
 
     return box
 
 
+def make_circle(radius: int, dtype: str='uint8') -> np.ndarray:
+    """
+    Make a circle with a given radius.
+
+    Args:
+        radius: the radius of the circle to draw
+
+    Returns:
+        a NumPy matrix of size 2 * radius + 1 with a circle in it.
+
+    """
+    return circle_mask(radius).astype(dtype)
+
+
 def make_ring(inner_radius: int, outer_radius: int,
     dtype: str='uint8'
 ) -> np.ndarray:
@@ -45,6 +66,8 @@ def make_ring(inner_radius: int, outer_radius: int,
     length = 2 * outer_radius + 1
     # create an RGBA box to house the circle in
     box = np.zeros((length, length), dtype=dtype)
+    # import skimage on first use since it's slow to import
+    from skimage.draw import circle as draw_circle
     # get the coordinates for the outer circle
     x_pixels, y_pixels = draw_circle(outer_radius, outer_radius, outer_radius)
     # set the coordinates of the circle in the box
@@ -113,6 +136,7 @@ def pyglet_cursor(img: np.ndarray,
 
 # explicitly define the outward facing API of this module
 __all__ = [
+    circle_mask.__name__,
     make_circle.__name__,
     make_cursor.__name__,
     make_ring.__name__,
@@ -1,26 +1,42 @@
 """An image view using NumPy and Pyglet."""
 import pyglet
-from .window import Window
+from .window import VIEW_MARGIN, Window
+
+
+# the largest height and width of the window. larger images are zoomed out
+# to fit in the window instead of opening a window the size of the image
+MAX_WINDOW_SHAPE = (900, 1600)
 
 
 class ImageView(object):
     """An image view using NumPy and Pyglet."""
 
-    def __init__(self, caption: str, image_shape: tuple) -> None:
+    def __init__(self, caption: str, image_shape: tuple,
+        max_window_shape: tuple=MAX_WINDOW_SHAPE,
+    ) -> None:
         """
         Initialize a new driving simulator.
 
         Args:
             caption:
             image_shape:
+            max_window_shape: the largest height and width of the window
 
         Returns:
             None
 
         """
-        # setup the window for this view
+        # setup the window for this view, scaling the image to fit in the
+        # largest window size
         self.image_shape = image_shape
-        self._window = Window(caption, *image_shape)
+        fit = min(1,
+            max_window_shape[0] / image_shape[0],
+            max_window_shape[1] / image_shape[1],
+        )
+        window_shape = [max(int(round(fit * x)), 1) for x in image_shape[:2]]
+        self._window = Window(caption, *window_shape,
+            image_shape=image_shape,
+        )
 
     @property
     def zoom_level(self) -> float:
@@ -99,6 +115,40 @@ class ImageView(object):
         # add the method as an event handler to the window
         self.add_event_handler(on_mouse_drag)
 
+    def add_on_mouse_release_handler(self, handler) -> None:
+        """
+        Add an on mouse release event handler to the view.
+
+        Args:
+            handler: a callable with no arguments to call when the left mouse
+                     button is released
+
+        Returns:
+            None
+
+        """
+        def on_mouse_release(x, y, buttons, _) -> None:
+            """Respond to a pyglet mouse release event."""
+            # if the button is the left button, call the handler
+            if buttons == pyglet.window.mouse.LEFT:
+                handler()
+        # add the method as an event handler to the window
+        self.add_event_handler(on_mouse_release)
+
+    def add_on_camera_change_handler(self, handler) -> None:
+        """
+        Add an on camera change event handler to the view.
+
+        Args:
+            handler: a callable with no arguments to call when the camera
+                     zooms, pans, or resets
+
+        Returns:
+            None
+
+        """
+        self._window.set_camera_handler(handler)
+
     def add_on_key_press_handler(self, handler) -> None:
         """
         Add an on key press event handler to the view.
@@ -116,18 +166,39 @@ class ImageView(object):
         # add the method as an event handler to the window
         self.add_event_handler(on_key_press)
 
-    def show(self, image: 'np.ndarray') -> None:
+    def dispatch_events(self) -> None:
+        """Dispatch any pending events from the view to its handlers."""
+        self._window.dispatch_events()
+
+    def visible_rect(self, margin: int=VIEW_MARGIN) -> tuple:
+        """
+        Return the rectangle of the image that is visible in the view.
+
+        Args:
+            margin: the number of screen pixels around the view to include
+
+        Returns:
+            the (top, left, bottom, right) rectangle of the image, or None if
+            no part of the image is visible
+
+        """
+        return self._window.visible_rect(margin)
+
+    def show(self, image: 'np.ndarray', dirty: list=None) -> None:
         """
         Show the window with the given data.
 
         Args:
-            image: the image to display on the image view
+            image: the image (or list of layers as arrays or pyramids) to
+                   display on the image view
+            dirty: a list with a dirty rectangle for each layer in image, or
+                   None to upload all the layers
 
         Returns:
             None
 
         """
-        self._window.show(image)
+        self._window.show(image, dirty)
 
     def close(self):
         """Close the view."""
@@ -1,9 +1,7 @@
 """A palette for working with semantic segmentation labeling."""
 from copy import deepcopy
-from threading import Thread
 from multiprocessing import Process
-from appJar import gui
-import pandas as pd
+from ..metadata import Metadata
 
 
 class Palette(object):
@@ -15,11 +13,14 @@ class Palette(object):
     HEIGHT = 700
     # the height per label entry
     LABEL_HEIGHT = 10
+    # the number of milliseconds between polls of the status callback
+    STATUS_POLL_TIME = 100
     # the default arguments for the view controller
     DEFAULTS = {
         'paint': 'brush',
         'brush_size': 5,
         'super_pixel': 'felzenszwalb',
+        'granularity': 0,
         'felzenszwalb': {
             'scale': 100,
             'sigma': 0.5,
@@ -42,13 +43,19 @@ class Palette(object):
         'label': None,
     }
 
-    def __init__(self, metadata: pd.DataFrame, callback=None) -> None:
+    def __init__(self, metadata: Metadata,
+        callback=None,
+        status=None,
+        poll=None,
+    ) -> None:
         """
         Initialize a new palette.
 
         Args:
             metadata: the label metadata for the palette
             callback: a callback method for getting updates from the palette
+            status: a callback method that returns a status string to show
+            poll: a callback method to call each time the status is polled
 
         Returns:
             None
@@ -56,9 +63,13 @@ class Palette(object):
         """
         self.metadata = metadata
         self._callback = callback if callable(callback) else lambda x: x
+        self._status = status if callable(status) else lambda: 'Ready'
+        self._poll = poll if callable(poll) else lambda: None
         self.segmentation_args = deepcopy(self.DEFAULTS)
         self.segmentation_args['label'] = self.metadata['label'][0]
-        # create the application window
+        # create the application window. the GUI toolkit is only imported in
+        # the process that runs the palette
+        from appJar import gui
         height = self.LABEL_HEIGHT * len(metadata) + self.HEIGHT
         self._app = gui(
             title=self.__class__.__name__,
@@ -69,19 +80,26 @@ class Palette(object):
         self._view_did_load(self._app)
 
     def callback(self) -> None:
-        """Call the callback on a background thread."""
-        # create a thread for the callback and start it. this process is
-        # already a daemon so this thread cant – and need not – be a daemon
-        Thread(target=self._callback, args=(self.segmentation_args,)).start()
+        """Call the callback with a copy of the segmentation arguments."""
+        # the callback must return quickly, long running work (i.e., super
+        # pixel segmentation) is queued by the callback on its own worker.
+        # pass a copy so the callback can keep the arguments as they change
+        self._callback(deepcopy(self.segmentation_args))
 
     @classmethod
-    def thread(cls, metadata: pd.DataFrame, callback=None):
+    def thread(cls, metadata: Metadata,
+        callback=None,
+        status=None,
+        poll=None,
+    ):
         """
         Initialize and start a palette on a background thread.
 
         Args:
             metadata: the label metadata for the palette
             callback: a callback method for getting updates from the palette
+            status: a callback method that returns a status string to show
+            poll: a callback method to call each time the status is polled
 
         Returns:
             a tuple of:
@@ -91,13 +109,17 @@ class Palette(object):
         """
         # instantiate a palette with the standard arguments
         def run():
-            cls(metadata, callback).run()
+            cls(metadata, callback, status, poll).run()
         # create the background thread (process in Python abstract) as a daemon
         Process(target=run, daemon=True).start()
 
     def _view_did_load(self, app) -> None:
         """Setup the sub-views after the view is loaded into memory."""
         app.setFont(14)
+        # setup the status of the background work
+        app.addLabel('status', self._status())
+        app.setPollTime(self.STATUS_POLL_TIME)
+        app.registerEvent(self._did_poll_status)
         # setup the paint style
         app.startLabelFrame("Paint Style")
         app.addRadioButton("paint", "Brush")
@@ -112,6 +134,13 @@ class Palette(object):
         app.showScaleValue('Brush Size', show=True)
         app.setScaleChangeFunction('Brush Size', self._did_change_brush_size)
         app.setScale('Brush Size', 5)
+        # setup the granularity slider for merging super pixels
+        app.addLabelScale('Granularity')
+        app.setScaleRange('Granularity', 0, 100)
+        app.showScaleIntervals('Granularity', 25)
+        app.showScaleValue('Granularity', show=True)
+        app.setScaleChangeFunction('Granularity', self._did_change_granularity)
+        app.setScale('Granularity', 0)
         # super pixel algorithm parameters
         app.startTabbedFrame("super_pixel")
         # Felzenszwalb
@@ -277,6 +306,13 @@ class Palette(object):
 
     # MARK: Callbacks
 
+    def _did_poll_status(self) -> None:
+        """Respond to a poll of the status callback."""
+        self._poll()
+        status = self._status()
+        if status != self._app.getLabel('status'):
+            self._app.setLabel('status', status)
+
     def _did_change_paint(self, _) -> None:
         """Respond to changes in mode of painting."""
         selected = self._app.getRadioButton('paint')
@@ -289,6 +325,12 @@ class Palette(object):
         self.segmentation_args['brush_size'] = int(selected)
         self.callback()
 
+    def _did_change_granularity(self, _) -> None:
+        """Respond to changes in the granularity of the super pixels."""
+        selected = self._app.getScale('Granularity')
+        self.segmentation_args['granularity'] = int(selected)
+        self.callback()
+
     def _did_change_super_pixel(self, _) -> None:
         """Respond to changes in the selected super pixel algorithm."""
         # get the currently selected tab from the super pixel tab bar
@@ -0,0 +1,139 @@
+"""A pyramid of downsampled copies of a layer for rendering zoomed out."""
+import numpy as np
+
+
+# the size of the largest side of the smallest level of a pyramid
+MIN_LEVEL_SIZE = 256
+
+
+def scale(rect: tuple, level: int) -> tuple:
+    """
+    Scale a rectangle from the base of a pyramid to a level of it.
+
+    Args:
+        rect: the (top, left, bottom, right) rectangle in the base level
+        level: the level to scale the rectangle to
+
+    Returns:
+        the smallest rectangle in the level that covers the rectangle, or
+        None if the rectangle is None
+
+    """
+    if rect is None:
+        return None
+    top, left, bottom, right = rect
+    size = 2**level
+
+    return top // size, left // size, -(-bottom // size), -(-right // size)
+
+
+def _reduce(source: np.ndarray, rect: tuple) -> np.ndarray:
+    """
+    Downsample a rectangle of the next level down by averaging 2x2 blocks.
+
+    Args:
+        source: the level below the level to compute
+        rect: the rectangle to compute in the coordinates of the new level
+
+    Returns:
+        the pixels of the rectangle in the new level
+
+    """
+    top, left, bottom, right = rect
+    height, width = bottom - top, right - left
+    block = source[2 * top:2 * bottom, 2 * left:2 * right]
+    # repeat the last row and column of odd sized levels
+    if block.shape[0] < 2 * height:
+        block = np.concatenate([block, block[-1:]], axis=0)
+    if block.shape[1] < 2 * width:
+        block = np.concatenate([block, block[:, -1:]], axis=1)
+    # average each 2x2 block, rounding to the nearest integer
+    block = block.reshape(height, 2, width, 2, *source.shape[2:])
+    total = block.sum(axis=(1, 3), dtype=np.uint32)
+
+    return ((total + 2) // 4).astype(source.dtype)
+
+
+class Pyramid(object):
+    """A pyramid of downsampled copies of a layer for rendering zoomed out."""
+
+    def __init__(self, base: np.ndarray, levels: int=None) -> None:
+        """
+        Initialize a new pyramid.
+
+        Args:
+            base: the full resolution layer, which is shared (not copied) so
+                  that it can be edited in place before calling update
+            levels: the number of levels including the base (None to halve
+                    the layer until it's smaller than MIN_LEVEL_SIZE)
+
+        Returns:
+            None
+
+        """
+        if levels is None:
+            levels = 1
+            while max(base.shape[:2]) > MIN_LEVEL_SIZE * 2**(levels - 1):
+                levels += 1
+        self._levels = [base]
+        for level in range(1, levels):
+            shape = scale((0, 0, *base.shape[:2]), level)[2:]
+            shape = (*shape, *base.shape[2:])
+            self._levels.append(np.empty(shape, dtype=base.dtype))
+        self.update((0, 0, *base.shape[:2]))
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(shape={}, levels={})'.format(
+            self.__class__.__name__,
+            self._levels[0].shape,
+            len(self._levels),
+        )
+
+    def __len__(self) -> int:
+        """Return the number of levels in the pyramid."""
+        return len(self._levels)
+
+    def __getitem__(self, level: int) -> np.ndarray:
+        """Return a level of the pyramid (0 is the base)."""
+        return self._levels[level]
+
+    def update(self, rect: tuple) -> None:
+        """
+        Update the levels above the base after editing a rectangle of it.
+
+        Args:
+            rect: the (top, left, bottom, right) rectangle of the base that
+                  changed or None if nothing changed
+
+        Returns:
+            None
+
+        """
+        for level in range(1, len(self._levels)):
+            rect = scale(rect, 1)
+            if rect is None:
+                return
+            pixels = _reduce(self._levels[level - 1], rect)
+            self._levels[level][rect[0]:rect[2], rect[1]:rect[3]] = pixels
+
+    def level_for(self, zoom_level: float) -> int:
+        """
+        Return the level to render at a zoom level.
+
+        Args:
+            zoom_level: the ratio of screen pixels to base pixels
+
+        Returns:
+            the coarsest level with at least one pixel per screen pixel
+
+        """
+        if zoom_level >= 1:
+            return 0
+        level = int(np.floor(np.log2(1 / zoom_level)))
+
+        return min(level, len(self._levels) - 1)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [Pyramid.__name__, scale.__name__]
@@ -0,0 +1,149 @@
+"""Methods for working with rectangles of pixels in an image.
+
+A rectangle is a tuple of (top, left, bottom, right) in image coordinates,
+i.e., rows and columns, where the bottom and right edges are exclusive. The
+pixels in a rectangle of an image are thus image[top:bottom, left:right].
+"""
+
+
+def full(shape: tuple) -> tuple:
+    """
+    Return the rectangle that covers an entire image.
+
+    Args:
+        shape: the shape of the image with height and width first
+
+    Returns:
+        a rectangle covering all the pixels in the image
+
+    """
+    return 0, 0, shape[0], shape[1]
+
+
+def around(row: int, column: int, radius: int) -> tuple:
+    """
+    Return the rectangle around a square with given center and radius.
+
+    Args:
+        row: the row of the center of the square
+        column: the column of the center of the square
+        radius: the number of pixels in the square on each side of the center
+
+    Returns:
+        a rectangle covering all the pixels in the square
+
+    """
+    return row - radius, column - radius, row + radius + 1, column + radius + 1
+
+
+def clip(rect: tuple, shape: tuple) -> tuple:
+    """
+    Clip a rectangle to the frame of an image.
+
+    Args:
+        rect: the rectangle to clip (or None for an empty rectangle)
+        shape: the shape of the image with height and width first
+
+    Returns:
+        the rectangle inside the image or None if they don't intersect
+
+    """
+    if rect is None:
+        return None
+    top, left, bottom, right = rect
+    top, left = max(top, 0), max(left, 0)
+    bottom, right = min(bottom, shape[0]), min(right, shape[1])
+    # if the rectangle is empty after clipping, it's outside of the image
+    if top >= bottom or left >= right:
+        return None
+    return top, left, bottom, right
+
+
+def expand(rect: tuple, margin: int) -> tuple:
+    """
+    Expand a rectangle by a margin on each side.
+
+    Args:
+        rect: the rectangle to expand (or None for an empty rectangle)
+        margin: the number of pixels to add to each side
+
+    Returns:
+        the expanded rectangle (which may extend outside of the image)
+
+    """
+    if rect is None:
+        return None
+    top, left, bottom, right = rect
+    return top - margin, left - margin, bottom + margin, right + margin
+
+
+def intersect(rect_a: tuple, rect_b: tuple) -> tuple:
+    """
+    Return the intersection of two rectangles.
+
+    Args:
+        rect_a: the first rectangle (or None for an empty rectangle)
+        rect_b: the second rectangle (or None for an empty rectangle)
+
+    Returns:
+        the rectangle of pixels in both rectangles or None if they don't
+        intersect
+
+    """
+    if rect_a is None or rect_b is None:
+        return None
+    top, left = max(rect_a[0], rect_b[0]), max(rect_a[1], rect_b[1])
+    bottom, right = min(rect_a[2], rect_b[2]), min(rect_a[3], rect_b[3])
+    if top >= bottom or left >= right:
+        return None
+    return top, left, bottom, right
+
+
+def union(rect_a: tuple, rect_b: tuple) -> tuple:
+    """
+    Return the bounding rectangle of two rectangles.
+
+    Args:
+        rect_a: the first rectangle (or None for an empty rectangle)
+        rect_b: the second rectangle (or None for an empty rectangle)
+
+    Returns:
+        the smallest rectangle that contains both of the rectangles
+
+    """
+    if rect_a is None:
+        return rect_b
+    if rect_b is None:
+        return rect_a
+    return (
+        min(rect_a[0], rect_b[0]),
+        min(rect_a[1], rect_b[1]),
+        max(rect_a[2], rect_b[2]),
+        max(rect_a[3], rect_b[3]),
+    )
+
+
+def to_slice(rect: tuple) -> tuple:
+    """
+    Return a tuple of slices to index the pixels of a rectangle with.
+
+    Args:
+        rect: the rectangle to convert to a tuple of slices
+
+    Returns:
+        a tuple of row and column slices for indexing an image
+
+    """
+    return slice(rect[0], rect[2]), slice(rect[1], rect[3])
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    around.__name__,
+    clip.__name__,
+    expand.__name__,
+    full.__name__,
+    intersect.__name__,
+    to_slice.__name__,
+    union.__name__,
+]
@@ -0,0 +1,109 @@
+"""A scheduler for redrawing a view only when its contents change."""
+import time
+import pyglet
+
+
+class RedrawScheduler(object):
+    """A scheduler for redrawing a view only when its contents change."""
+
+    def __init__(self, poll, redraw,
+        max_fps: float=60,
+        poll_rate: float=120,
+    ) -> None:
+        """
+        Initialize a new redraw scheduler.
+
+        Args:
+            poll: a callable to poll for events that may dirty the view
+            redraw: a callable to redraw the view given the set of dirty flags
+            max_fps: the maximal number of frames to draw per second
+            poll_rate: the number of times per second to poll for events
+
+        Returns:
+            None
+
+        """
+        self._poll = poll
+        self._redraw = redraw
+        self.max_fps = max_fps
+        self.poll_rate = poll_rate
+        self._clock = pyglet.clock.Clock()
+        self._dirty = set()
+        self._last_frame = -float('inf')
+        self._is_frame_scheduled = False
+        self._is_running = False
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(max_fps={}, poll_rate={})'.format(
+            self.__class__.__name__,
+            self.max_fps,
+            self.poll_rate,
+        )
+
+    @property
+    def is_running(self) -> bool:
+        """Return a boolean determining if the scheduler is running."""
+        return self._is_running
+
+    @property
+    def is_dirty(self) -> bool:
+        """Return a boolean determining if the view needs to be redrawn."""
+        return len(self._dirty) > 0
+
+    def mark_dirty(self, *flags: str) -> None:
+        """
+        Mark parts of the view as dirty and schedule a frame to redraw them.
+
+        Args:
+            flags: the names of the parts of the view that changed
+
+        Returns:
+            None
+
+        """
+        self._dirty.update(flags)
+        # if a frame is already on the way, it will pick up the new flags
+        if self._is_frame_scheduled:
+            return
+        # wait until the frame rate cap allows for another frame
+        frame_time = self._last_frame + 1 / self.max_fps
+        delay = max(0, frame_time - self._clock.time())
+        self._clock.schedule_once(self._draw_frame, delay)
+        self._is_frame_scheduled = True
+
+    def _poll_events(self, _) -> None:
+        """Poll for events on a regular interval of the clock."""
+        self._poll()
+
+    def _draw_frame(self, _) -> None:
+        """Redraw the dirty parts of the view."""
+        self._is_frame_scheduled = False
+        self._last_frame = self._clock.time()
+        # dequeue the dirty flags before drawing so that events raised while
+        # drawing schedule a new frame
+        dirty, self._dirty = self._dirty, set()
+        self._redraw(dirty)
+
+    def run(self) -> None:
+        """Run the scheduler until it is stopped."""
+        self._clock.schedule_interval(self._poll_events, 1 / self.poll_rate)
+        self._is_running = True
+        while self._is_running:
+            # call any functions that are due and sleep until the next one
+            self._clock.tick()
+            sleep_time = self._clock.get_sleep_time(True)
+            if sleep_time is not None and sleep_time > 0:
+                time.sleep(sleep_time)
+        # remove the scheduled functions from the clock
+        self._clock.unschedule(self._poll_events)
+        self._clock.unschedule(self._draw_frame)
+        self._is_frame_scheduled = False
+
+    def stop(self) -> None:
+        """Stop the scheduler after the current iteration."""
+        self._is_running = False
+
+
+# explicitly define the outward facing API of this module
+__all__ = [RedrawScheduler.__name__]
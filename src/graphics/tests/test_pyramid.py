@@ -0,0 +1,47 @@
+"""Test cases for the pyramid module."""
+from unittest import TestCase
+import numpy as np
+from ..pyramid import Pyramid, scale
+
+
+class ShouldScaleRectanglesToLevels(TestCase):
+    def test(self):
+        self.assertEqual((0, 1, 3, 4), scale((1, 2, 5, 7), 1))
+        self.assertEqual((0, 0, 2, 2), scale((1, 2, 5, 7), 2))
+        self.assertIsNone(scale(None, 3))
+
+
+class ShouldBuildLevelsByAveraging(TestCase):
+    def test(self):
+        base = np.arange(5 * 6 * 4, dtype=np.uint8).reshape(5, 6, 4)
+        pyramid = Pyramid(base, levels=3)
+        self.assertEqual(3, len(pyramid))
+        self.assertIs(base, pyramid[0])
+        self.assertEqual((3, 3, 4), pyramid[1].shape)
+        self.assertEqual((2, 2, 4), pyramid[2].shape)
+        expected = base[:2, :2].reshape(4, 4).mean(axis=0).round()
+        self.assertTrue(np.array_equal(expected, pyramid[1][0, 0]))
+        self.assertTrue(np.array_equal(base[4, :2].mean(axis=0).round(),
+            pyramid[1][2, 0],
+        ))
+
+
+class ShouldUpdateLevelsInRectangle(TestCase):
+    def test(self):
+        base = np.zeros((64, 64, 4), dtype=np.uint8)
+        pyramid = Pyramid(base, levels=4)
+        base[10:20, 30:40] = 200
+        pyramid.update((10, 30, 20, 40))
+        expected = Pyramid(base.copy(), levels=4)
+        for level in range(4):
+            self.assertTrue(np.array_equal(expected[level], pyramid[level]))
+
+
+class ShouldPickLevelForZoom(TestCase):
+    def test(self):
+        pyramid = Pyramid(np.zeros((2048, 1024, 4), dtype=np.uint8))
+        self.assertEqual(4, len(pyramid))
+        self.assertEqual(0, pyramid.level_for(1.5))
+        self.assertEqual(0, pyramid.level_for(0.6))
+        self.assertEqual(2, pyramid.level_for(0.2))
+        self.assertEqual(3, pyramid.level_for(0.01))
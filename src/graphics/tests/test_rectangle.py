@@ -0,0 +1,45 @@
+"""Test cases for the rectangle module."""
+from unittest import TestCase
+from .. import rectangle
+
+
+class ShouldClipRectangleToImage(TestCase):
+    def test(self):
+        rect = rectangle.clip((-2, 3, 5, 12), (4, 10))
+        self.assertEqual((0, 3, 4, 10), rect)
+
+
+class ShouldClipRectangleOutsideImageToNone(TestCase):
+    def test(self):
+        self.assertIsNone(rectangle.clip((4, 0, 8, 2), (4, 10)))
+
+
+class ShouldUnionRectangles(TestCase):
+    def test(self):
+        rect = rectangle.union((1, 5, 3, 6), (2, 0, 4, 4))
+        self.assertEqual((1, 0, 4, 6), rect)
+
+
+class ShouldUnionRectangleWithNone(TestCase):
+    def test(self):
+        self.assertEqual((1, 5, 3, 6), rectangle.union(None, (1, 5, 3, 6)))
+        self.assertIsNone(rectangle.union(None, None))
+
+
+class ShouldCreateRectangleAroundPoint(TestCase):
+    def test(self):
+        self.assertEqual((3, 8, 8, 13), rectangle.around(5, 10, 2))
+
+
+class ShouldExpandRectangle(TestCase):
+    def test(self):
+        self.assertEqual((-1, 1, 5, 7), rectangle.expand((1, 3, 3, 5), 2))
+        self.assertIsNone(rectangle.expand(None, 2))
+
+
+class ShouldIntersectRectangles(TestCase):
+    def test(self):
+        actual = rectangle.intersect((0, 0, 4, 4), (2, 3, 6, 6))
+        self.assertEqual((2, 3, 4, 4), actual)
+        self.assertIsNone(rectangle.intersect((0, 0, 2, 2), (2, 0, 4, 2)))
+        self.assertIsNone(rectangle.intersect(None, (0, 0, 1, 1)))
@@ -0,0 +1,27 @@
+"""Test cases for the redraw_scheduler module."""
+from unittest import TestCase
+from ..redraw_scheduler import RedrawScheduler
+
+
+class ShouldNotRedrawWhenClean(TestCase):
+    def test(self):
+        frames = []
+        scheduler = RedrawScheduler(lambda: scheduler.stop(), frames.append)
+        scheduler.run()
+        self.assertFalse(scheduler.is_dirty)
+        self.assertEqual([], frames)
+
+
+class ShouldRedrawDirtyFlagsOnce(TestCase):
+    def test(self):
+        frames = []
+        def poll():
+            if frames:
+                scheduler.stop()
+            else:
+                scheduler.mark_dirty('segmentation')
+                scheduler.mark_dirty('camera')
+        scheduler = RedrawScheduler(poll, frames.append)
+        scheduler.run()
+        self.assertFalse(scheduler.is_dirty)
+        self.assertEqual([{'segmentation', 'camera'}], frames)
@@ -0,0 +1,26 @@
+"""Test cases for the tile_grid module."""
+from unittest import TestCase
+from ..tile_grid import TileGrid
+
+
+class ShouldFindTilesInRectangle(TestCase):
+    def test(self):
+        grid = TileGrid((100, 70), 32)
+        self.assertEqual((96, 64, 100, 70), grid.tile_rect(3, 2))
+        self.assertEqual([(0, 1), (0, 2), (1, 1), (1, 2)],
+            grid.tiles((10, 40, 33, 80)),
+        )
+        self.assertEqual([], grid.tiles((200, 0, 300, 10)))
+
+
+class ShouldTakeDirtyTilesInRectangle(TestCase):
+    def test(self):
+        grid = TileGrid((100, 70), 32)
+        self.assertFalse(grid.is_dirty)
+        grid.mark((0, 0, 40, 10))
+        self.assertEqual([(0, 0, 32, 32)], grid.take((0, 0, 10, 10)))
+        self.assertTrue(grid.is_dirty)
+        self.assertEqual([(32, 0, 64, 32)], grid.take((0, 0, 100, 70)))
+        self.assertFalse(grid.is_dirty)
+        grid.mark_all()
+        self.assertEqual(12, len(grid.take((0, 0, 100, 70))))
@@ -0,0 +1,36 @@
+"""Test cases for the window module."""
+from unittest import TestCase
+from ..window import Window
+
+
+class ShouldFitImageInWindow(TestCase):
+    def test(self):
+        window = Window('test', 450, 800, image_shape=(900, 1600))
+        self.assertEqual(0.5, window.zoom_level)
+        self.assertEqual((0, 900), window.transform(0, 450))
+        self.assertEqual((1598, 0), window.transform(799, 0))
+
+
+class ShouldZoomAboutMouse(TestCase):
+    def test(self):
+        window = Window('test', 450, 800, image_shape=(900, 1600))
+        before = window.transform(200, 100)
+        window.on_mouse_scroll(200, 100, 0, 1)
+        self.assertGreater(window.zoom_level, 0.5)
+        self.assertEqual(before, window.transform(200, 100))
+        window.on_mouse_scroll(200, 100, 0, -1)
+        window.on_mouse_scroll(200, 100, 0, -1)
+        self.assertAlmostEqual(0.5 / 1.2, window.zoom_level)
+
+
+class ShouldFindVisibleRectangle(TestCase):
+    def test(self):
+        window = Window('test', 450, 800, image_shape=(900, 1600))
+        self.assertEqual((0, 0, 900, 1600), window.visible_rect())
+        for _ in range(4):
+            window.on_mouse_scroll(0, 450, 0, 1)
+        top, left, bottom, right = window.visible_rect()
+        self.assertEqual((0, 0), (top, left))
+        self.assertAlmostEqual(900 / 2.0736, bottom, delta=1)
+        self.assertAlmostEqual(1600 / 2.0736, right, delta=1)
+        self.assertEqual((0, 0, 900, 1600), window.visible_rect(10000))
@@ -0,0 +1,138 @@
+"""A grid of square tiles over an image with a dirty flag for each tile."""
+import numpy as np
+from . import rectangle
+
+
+class TileGrid(object):
+    """A grid of square tiles over an image with a dirty flag for each tile."""
+
+    def __init__(self, shape: tuple, tile_size: int=256) -> None:
+        """
+        Initialize a new tile grid.
+
+        Args:
+            shape: the shape of the image with height and width first
+            tile_size: the height and width of each tile
+
+        Returns:
+            None
+
+        """
+        if tile_size <= 0:
+            raise ValueError('tile_size must be positive')
+        self.shape = tuple(shape[:2])
+        self.tile_size = tile_size
+        grid_shape = [-(-x // tile_size) for x in self.shape]
+        self._dirty = np.zeros(grid_shape, dtype=bool)
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(shape={}, tile_size={})'.format(
+            self.__class__.__name__,
+            self.shape,
+            self.tile_size,
+        )
+
+    @property
+    def is_dirty(self) -> bool:
+        """Return a boolean determining if any tile is dirty."""
+        return bool(self._dirty.any())
+
+    def tile_rect(self, row: int, column: int) -> tuple:
+        """
+        Return the rectangle of a tile.
+
+        Args:
+            row: the row of the tile in the grid
+            column: the column of the tile in the grid
+
+        Returns:
+            the rectangle of the tile, clipped to the image
+
+        """
+        size = self.tile_size
+        rect = row * size, column * size, (row + 1) * size, (column + 1) * size
+        return rectangle.clip(rect, self.shape)
+
+    def indexes(self, rect: tuple) -> tuple:
+        """
+        Return the slices of the grid for the tiles that touch a rectangle.
+
+        Args:
+            rect: the rectangle in image coordinates (or None)
+
+        Returns:
+            a tuple of row and column slices into the grid, or None if the
+            rectangle is outside of the image
+
+        """
+        rect = rectangle.clip(rect, self.shape)
+        if rect is None:
+            return None
+        size = self.tile_size
+        return (
+            slice(rect[0] // size, -(-rect[2] // size)),
+            slice(rect[1] // size, -(-rect[3] // size)),
+        )
+
+    def tiles(self, rect: tuple) -> list:
+        """
+        Return the tiles that touch a rectangle.
+
+        Args:
+            rect: the rectangle in image coordinates (or None)
+
+        Returns:
+            a list of (row, column) tuples in row-major order
+
+        """
+        index = self.indexes(rect)
+        if index is None:
+            return []
+        rows = range(index[0].start, index[0].stop)
+        columns = range(index[1].start, index[1].stop)
+        return [(row, column) for row in rows for column in columns]
+
+    def mark(self, rect: tuple) -> None:
+        """
+        Mark the tiles that touch a rectangle as dirty.
+
+        Args:
+            rect: the rectangle that changed (or None for no change)
+
+        Returns:
+            None
+
+        """
+        index = self.indexes(rect)
+        if index is not None:
+            self._dirty[index] = True
+
+    def mark_all(self) -> None:
+        """Mark every tile as dirty."""
+        self._dirty[:] = True
+
+    def take(self, rect: tuple) -> list:
+        """
+        Return and clear the dirty tiles that touch a rectangle.
+
+        Args:
+            rect: the rectangle to take dirty tiles from, e.g., the visible
+                  region of the image
+
+        Returns:
+            a list of the rectangles of the dirty tiles in row-major order
+
+        """
+        index = self.indexes(rect)
+        if index is None:
+            return []
+        rows, columns = np.nonzero(self._dirty[index])
+        self._dirty[index] = False
+        rows = (rows + index[0].start).tolist()
+        columns = (columns + index[1].start).tolist()
+        return [self.tile_rect(*tile) for tile in zip(rows, columns)]
+
+
+# explicitly define the outward facing API of this module
+__all__ = [TileGrid.__name__]
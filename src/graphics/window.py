@@ -1,5 +1,10 @@
 """A simple class for viewing images using a pyglet window."""
+import numpy as np
 import pyglet
+from . import pyramid
+from . import rectangle
+from .pyramid import Pyramid
+from .tile_grid import TileGrid
 
 
 # the factor to zoom in by
@@ -10,13 +15,18 @@ ZOOM_OUT = 1 / ZOOM_IN
 MAX_ZOOM = 5
 # the min factor to zoom in by
 MIN_ZOOM = 0.2
+# the height and width of the textures that each layer is uploaded in
+TEXTURE_SIZE = 512
+# the number of screen pixels around the window to upload ahead of panning
+VIEW_MARGIN = 64
 
 
 class Window(object):
     """A simple class for viewing images using a pyglet window."""
 
     def __init__(self, caption: str, height: int, width: int,
-        encoding: str='RGBA'
+        encoding: str='RGBA',
+        image_shape: tuple=None,
     ) -> None:
         """
         Initialize a new image viewer.
@@ -26,6 +36,8 @@ class Window(object):
             height: the height of the window
             width: the width of the window
             encoding: the encoding of the images to display
+            image_shape: the height and width of the images to display (the
+                         size of the window if None)
 
         Returns:
             None
@@ -35,14 +47,24 @@ class Window(object):
         self.height = height
         self.width = width
         self.encoding = encoding
+        if image_shape is None:
+            image_shape = height, width
+        self.image_shape = tuple(image_shape[:2])
+        # the zoom level that fits the image in the window. the camera can
+        # zoom out to fit even if it's below the minimal zoom
+        self._fit_zoom = min(1,
+            height / self.image_shape[0],
+            width / self.image_shape[1],
+        )
+        self._min_zoom = min(MIN_ZOOM, self._fit_zoom)
         self._window = None
-        self._left = 0
-        self._right = width
-        self._bottom = 0
-        self._top = height
-        self._zoom_level = 1
-        self._zoomed_width = width
-        self._zoomed_height = height
+        self._camera_handler = None
+        # setup the cache of textures for the visible tiles of each layer,
+        # keyed by layer, level, row, and column, and the pyramid level that
+        # each layer is cached at
+        self._textures = {}
+        self._levels = {}
+        self.reset_camera()
 
     def __repr__(self) -> str:
         """Return an executable string representing this object."""
@@ -104,24 +126,20 @@ class Window(object):
         # Get the scaling factor
         scale = ZOOM_IN if dy > 0 else ZOOM_OUT if dy < 0 else 1
         # check If zoom_level is in the legal range
-        if not MIN_ZOOM < self._zoom_level * scale < MAX_ZOOM:
+        if not self._min_zoom <= self._zoom_level * scale < MAX_ZOOM:
             return
         # scale the zoom level
         self._zoom_level *= scale
-        # calculate the position of the mouse
-        mouse_x = x / self.width
-        mouse_y = y / self.height
-        # determine the position of the mouse within the image
-        mouse_x_in_img = self._left + mouse_x * self._zoomed_width
-        mouse_y_in_img = self._bottom + mouse_y * self._zoomed_height
         # update the zoomed width and height variables
         self._zoomed_width *= scale
         self._zoomed_height *= scale
-        # update the points of the image view frame
-        self._left = mouse_x_in_img - mouse_x * self._zoomed_width
-        self._right = mouse_x_in_img + (1 - mouse_x) * self._zoomed_width
-        self._bottom = mouse_y_in_img - mouse_y * self._zoomed_height
-        self._top = mouse_y_in_img + (1 - mouse_y) * self._zoomed_height
+        # scale the image view frame about the mouse so that the pixel of
+        # the image under the mouse stays under it
+        self._left = x - (x - self._left) * scale
+        self._bottom = y - (y - self._bottom) * scale
+        self._right = self._left + self._zoomed_width
+        self._top = self._bottom + self._zoomed_height
+        self._did_change_camera()
 
     def set_cursor(self, cursor) -> None:
         """
@@ -136,15 +154,35 @@ class Window(object):
         """
         self._window.set_mouse_cursor(cursor)
 
+    def set_camera_handler(self, handler) -> None:
+        """
+        Set a handler to call when the camera of the window changes.
+
+        Args:
+            handler: a callable with no arguments to call on camera changes
+
+        Returns:
+            None
+
+        """
+        self._camera_handler = handler
+
+    def _did_change_camera(self) -> None:
+        """Notify the camera handler that the camera changed."""
+        if self._camera_handler is not None:
+            self._camera_handler()
+
     def reset_camera(self) -> None:
         """Reset the camera to it's default position."""
+        # zoom to fit the image in the window at the top left
+        self._zoom_level = self._fit_zoom
+        self._zoomed_width = self.image_shape[1] * self._zoom_level
+        self._zoomed_height = self.image_shape[0] * self._zoom_level
         self._left = 0
-        self._right = self.width
-        self._bottom = 0
-        self._top = self.width
-        self._zoom_level = 1
-        self._zoomed_width = self.width
-        self._zoomed_height = self.height
+        self._right = self._zoomed_width
+        self._top = self.height
+        self._bottom = self.height - self._zoomed_height
+        self._did_change_camera()
 
     def move_camera(self, dx: float, dy: float) -> None:
         """
@@ -165,6 +203,34 @@ class Window(object):
         self._right += dx * speed
         self._bottom += dy * speed
         self._top += dy * speed
+        self._did_change_camera()
+
+    def visible_rect(self, margin: int=0) -> tuple:
+        """
+        Return the rectangle of the image that is visible in the window.
+
+        Args:
+            margin: the number of screen pixels around the window to include
+
+        Returns:
+            the (top, left, bottom, right) rectangle of the image, or None if
+            no part of the image is visible
+
+        """
+        # invert the transform from the image to the screen at the corners
+        # of the window. the rows of the image count down from the top
+        left = (-margin - self._left) / self._zoom_level
+        right = (self.width + margin - self._left) / self._zoom_level
+        top = (self.height + margin - self._bottom) / self._zoom_level
+        bottom = (-margin - self._bottom) / self._zoom_level
+        rect = (
+            int(np.floor(self.image_shape[0] - top)),
+            int(np.floor(left)),
+            int(np.ceil(self.image_shape[0] - bottom)),
+            int(np.ceil(right)),
+        )
+
+        return rectangle.clip(rect, self.image_shape)
 
     def transform(self, screen_x: int, screen_y: int) -> tuple:
         """
@@ -185,12 +251,82 @@ class Window(object):
 
         return image_x, image_y
 
-    def show(self, data: list) -> None:
+    def dispatch_events(self) -> None:
+        """Dispatch any pending events from the window to its handlers."""
+        # open the window if it isn't open already
+        if not self.is_open:
+            self.open()
+        self._window.switch_to()
+        self._window.dispatch_events()
+
+    def _upload(self, key: tuple, frame: 'np.ndarray',
+        tile: tuple,
+        rect: tuple,
+    ) -> None:
+        """
+        Upload a rectangle of a frame to the texture of one of its tiles.
+
+        Args:
+            key: the key of the texture of the tile
+            frame: the frame of pixels for the entire layer (or level of it)
+            tile: the rectangle of the tile in the frame
+            rect: the rectangle of the frame that changed
+
+        Returns:
+            None
+
+        """
+        texture = self._textures.get(key)
+        # if there is no texture for the tile, upload the entire tile
+        if texture is None:
+            rect = tile
+        # if the rectangle doesn't touch the tile, the texture is up to date
+        rect = rectangle.intersect(rect, tile)
+        if rect is None:
+            return
+        # create an image data object from the pixels in the rectangle
+        pixels = np.ascontiguousarray(frame[rectangle.to_slice(rect)])
+        pixels = pyglet.image.ImageData(
+            pixels.shape[1],
+            pixels.shape[0],
+            self.encoding,
+            pixels.tobytes(),
+            pitch=pixels.shape[1] * -len(self.encoding)
+        )
+        # if there is no texture, create one from the entire tile
+        if texture is None:
+            self._textures[key] = pixels.get_texture()
+            return
+        # otherwise copy the rectangle into the existing texture. textures
+        # are indexed from the bottom left of the tile instead of the top left
+        texture.blit_into(pixels, rect[1] - tile[1], tile[2] - rect[2], 0)
+
+    def _drop(self, is_dropped) -> None:
+        """
+        Drop the textures that match a condition.
+
+        Args:
+            is_dropped: a callable that takes the key of a texture and returns
+                        True if the texture should be dropped
+
+        Returns:
+            None
+
+        """
+        for key in [key for key in self._textures if is_dropped(key)]:
+            del self._textures[key]
+
+    def show(self, data: list, dirty: list=None) -> None:
         """
         Show an array of pixels on the window.
 
         Args:
-            data: the data to show on the window
+            data: the layers to show on the window as arrays or pyramids. the
+                  level of each pyramid that matches the zoom level is shown
+            dirty: a list with a dirty rectangle for each layer in data, i.e.,
+                   the (top, left, bottom, right) region of the layer that
+                   changed since the last call, or None if the layer didn't
+                   change. if dirty is None, all the layers are uploaded
 
         Returns:
             None
@@ -199,33 +335,70 @@ class Window(object):
         if not self.is_open:
             self.open()
         # prepare the window for the next frame
-        self._window.clear()
         self._window.switch_to()
-        self._window.dispatch_events()
+        self._window.clear()
         # create the list of frames from the inputs
         frames = data if isinstance(data, (list, tuple)) else [data]
+        # wrap arrays as pyramids with only the base level
+        frames = [
+            f if isinstance(f, Pyramid) else Pyramid(f, levels=1)
+            for f in frames
+        ]
+        # if there are no dirty rectangles, the entire frames are dirty
+        if dirty is None:
+            dirty = [rectangle.full(frame[0].shape) for frame in frames]
         # setup alpha channel blending
         pyglet.gl.glEnable(pyglet.gl.GL_BLEND)
+        # set the alpha channel blend mode for the images
+        pyglet.gl.glBlendFunc(
+            pyglet.gl.GL_SRC_ALPHA,
+            pyglet.gl.GL_ONE_MINUS_SRC_ALPHA
+        )
+        # find the region of the image to upload, i.e., the visible region
+        # and a margin around it
+        visible = self.visible_rect(VIEW_MARGIN)
         # iterate over the frames in the input
-        for frame in frames:
-            # create an image data object
-            frame = pyglet.image.ImageData(
-                frame.shape[1],
-                frame.shape[0],
-                self.encoding,
-                frame.tobytes(),
-                pitch=frame.shape[1] * -len(self.encoding)
-            )
-            # set the alpha channel blend mode for the image
-            pyglet.gl.glBlendFunc(
-                pyglet.gl.GL_SRC_ALPHA,
-                pyglet.gl.GL_ONE_MINUS_SRC_ALPHA
-            )
-            # blit the image to the window
-            frame.blit(self._left, self._bottom,
-                width=self._zoomed_width,
-                height=self._zoomed_height
-            )
+        for index, (frame, rect) in enumerate(zip(frames, dirty)):
+            # if the zoom level moved to another level of the pyramid, drop
+            # the textures of the old level
+            level = frame.level_for(self._zoom_level)
+            if self._levels.get(index) != level:
+                self._drop(lambda key: key[0] == index)
+                self._levels[index] = level
+            pixels = frame[level]
+            grid = TileGrid(pixels.shape, TEXTURE_SIZE)
+            # find the tiles to draw and update the textures that changed.
+            # tiles that changed off of the screen are dropped and uploaded
+            # again if they're panned back onto the screen
+            tiles = grid.tiles(pyramid.scale(visible, level))
+            rect = pyramid.scale(rect, level)
+            for tile in grid.tiles(rect):
+                key = index, level, *tile
+                if key in self._textures and tile not in tiles:
+                    del self._textures[key]
+                elif key in self._textures:
+                    self._upload(key, pixels, grid.tile_rect(*tile), rect)
+            # blit the tiles, uploading any that aren't cached (e.g., after
+            # panning), to the window
+            size = 2**level * self._zoom_level
+            for tile in tiles:
+                key = index, level, *tile
+                tile_rect = grid.tile_rect(*tile)
+                if key not in self._textures:
+                    self._upload(key, pixels, tile_rect, tile_rect)
+                self._textures[key].blit(
+                    self._left + tile_rect[1] * size,
+                    self._bottom + self.image_shape[0] * self._zoom_level
+                    - tile_rect[2] * size,
+                    width=(tile_rect[3] - tile_rect[1]) * size,
+                    height=(tile_rect[2] - tile_rect[0]) * size,
+                )
+            # drop the textures of tiles far from the screen
+            keep = set(grid.tiles(rectangle.expand(
+                pyramid.scale(visible, level),
+                TEXTURE_SIZE,
+            )))
+            self._drop(lambda k: k[0] == index and tuple(k[2:]) not in keep)
 
         # flip the changes to the window
         self._window.flip()
@@ -236,6 +409,9 @@ class Window(object):
         if self.is_open:
             self._window.close()
             self._window = None
+        # the textures belong to the context of the closed window
+        self._textures = {}
+        self._levels = {}
 
 
 # explicitly define the outward facing API of this module
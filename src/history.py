@@ -0,0 +1,236 @@
+"""An undo / redo history of the edits to an image."""
+from collections import deque
+import numpy as np
+from .graphics import rectangle
+
+
+# the height and width of the tiles of the image that are copied before an
+# edit changes them
+SNAPSHOT_TILE_SIZE = 64
+
+
+class History(object):
+    """An undo / redo history of the edits to an image."""
+
+    def __init__(self, image: np.ndarray, max_bytes: int=64 * 2**20) -> None:
+        """
+        Initialize a new history.
+
+        Args:
+            image: the image that is edited in place
+            max_bytes: the maximal number of bytes to store edits in. when the
+                       history exceeds the budget, the oldest edits are lost
+
+        Returns:
+            None
+
+        """
+        self._image = image
+        self.max_bytes = max_bytes
+        # setup a snapshot of the tiles of the image that the current edit
+        # changes, copied before it changes them and keyed by their (row,
+        # column) in the grid of tiles, and the rectangle that it changed.
+        # only the tiles under the edit are copied, so the snapshot stays
+        # small next to the image
+        self._snapshot = {}
+        self._rect = None
+        self._is_editing = False
+        # setup the stacks of edits and the number of bytes stored in them
+        self._undo = deque()
+        self._redo = []
+        self.nbytes = 0
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(max_bytes={})'.format(
+            self.__class__.__name__,
+            self.max_bytes,
+        )
+
+    @property
+    def can_undo(self) -> bool:
+        """Return a boolean determining if there is an edit to undo."""
+        return len(self._undo) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        """Return a boolean determining if there is an edit to redo."""
+        return len(self._redo) > 0
+
+    def begin(self) -> None:
+        """Begin a new edit, e.g., at the start of a brush stroke."""
+        # if an edit is already in progress, finish it first
+        self.commit()
+        self._is_editing = True
+
+    def will_change(self, rect: tuple) -> None:
+        """
+        Record that a rectangle of the image is about to change.
+
+        Args:
+            rect: the (top, left, bottom, right) rectangle that the current
+                  edit is about to change. the pixels must not be changed
+                  before they are recorded
+
+        Returns:
+            None
+
+        """
+        if not self._is_editing:
+            return
+        rect = rectangle.clip(rect, self._image.shape)
+        if rect is None:
+            return
+        self._rect = rectangle.union(self._rect, rect)
+        # copy the tiles under the rectangle that aren't in the snapshot yet
+        size = SNAPSHOT_TILE_SIZE
+        top, left, bottom, right = rect
+        for row in range(top // size, (bottom - 1) // size + 1):
+            for column in range(left // size, (right - 1) // size + 1):
+                if (row, column) not in self._snapshot:
+                    tile = self._image[
+                        row * size:(row + 1) * size,
+                        column * size:(column + 1) * size,
+                    ]
+                    self._snapshot[row, column] = tile.copy()
+
+    def _before(self, rect: tuple) -> np.ndarray:
+        """
+        Return the pixels of a rectangle from before the current edit.
+
+        Args:
+            rect: the (top, left, bottom, right) rectangle of the edit
+
+        Returns:
+            a copy of the pixels in the rectangle with the changed pixels
+            restored from the snapshot
+
+        """
+        before = self._image[rectangle.to_slice(rect)].copy()
+        size = SNAPSHOT_TILE_SIZE
+        for (row, column), tile in self._snapshot.items():
+            tile_rect = (
+                row * size,
+                column * size,
+                row * size + tile.shape[0],
+                column * size + tile.shape[1],
+            )
+            overlap = rectangle.intersect(tile_rect, rect)
+            if overlap is None:
+                continue
+            # copy the overlap from the tile to the same pixels of the copy
+            top, left, bottom, right = overlap
+            rows = slice(top - rect[0], bottom - rect[0])
+            columns = slice(left - rect[1], right - rect[1])
+            tile_rows = slice(top - tile_rect[0], bottom - tile_rect[0])
+            tile_columns = slice(left - tile_rect[1], right - tile_rect[1])
+            before[rows, columns] = tile[tile_rows, tile_columns]
+
+        return before
+
+    def commit(self) -> None:
+        """Finish the current edit and push it onto the undo stack."""
+        if not self._is_editing:
+            return
+        self._is_editing = False
+        if self._rect is None:
+            return
+        # find the pixels that changed inside the rectangle of the edit and
+        # release the snapshot
+        before = self._before(self._rect)
+        after = self._image[rectangle.to_slice(self._rect)]
+        rect = self._rect
+        self._snapshot = {}
+        self._rect = None
+        mask = before != after
+        if not mask.any():
+            return
+        # shrink the rectangle to the pixels that changed
+        rows = np.flatnonzero(mask.any(axis=1))
+        columns = np.flatnonzero(mask.any(axis=0))
+        index = rectangle.to_slice(
+            (rows[0], columns[0], rows[-1] + 1, columns[-1] + 1)
+        )
+        top = int(rect[0] + rows[0])
+        left = int(rect[1] + columns[0])
+        mask = mask[index]
+        rect = top, left, top + mask.shape[0], left + mask.shape[1]
+        # store the changed pixels as a bit-packed mask with the values of
+        # the masked pixels before and after the edit
+        delta = (
+            rect,
+            np.packbits(mask),
+            before[index][mask],
+            after[index][mask],
+        )
+        # a new edit invalidates the edits that were undone
+        self.nbytes -= sum(map(self._size, self._redo))
+        self._redo.clear()
+        self._undo.append(delta)
+        self.nbytes += self._size(delta)
+        # drop the oldest edits until the history is within its budget
+        while self.nbytes > self.max_bytes and self._undo:
+            self.nbytes -= self._size(self._undo.popleft())
+
+    @staticmethod
+    def _size(delta: tuple) -> int:
+        """Return the number of bytes in the arrays of an edit."""
+        return sum(array.nbytes for array in delta[1:])
+
+    def _apply(self, delta: tuple, values: int) -> tuple:
+        """
+        Apply the before or after values of an edit to the image.
+
+        Args:
+            delta: the edit to apply to the image
+            values: the index of the values in the edit to apply (2 for the
+                    values before the edit or 3 for the values after it)
+
+        Returns:
+            the (top, left, bottom, right) rectangle that changed
+
+        """
+        rect, bits = delta[:2]
+        shape = rect[2] - rect[0], rect[3] - rect[1]
+        # unpack the mask of the changed pixels in the rectangle
+        mask = np.unpackbits(bits, count=shape[0] * shape[1])
+        mask = mask.reshape(shape).astype(bool)
+        self._image[rectangle.to_slice(rect)][mask] = delta[values]
+
+        return rect
+
+    def undo(self) -> tuple:
+        """
+        Undo the last edit to the image.
+
+        Returns:
+            the (top, left, bottom, right) rectangle that changed, or None if
+            there is nothing to undo
+
+        """
+        self.commit()
+        if not self._undo:
+            return None
+        delta = self._undo.pop()
+        self._redo.append(delta)
+        return self._apply(delta, 2)
+
+    def redo(self) -> tuple:
+        """
+        Redo the last edit that was undone.
+
+        Returns:
+            the (top, left, bottom, right) rectangle that changed, or None if
+            there is nothing to redo
+
+        """
+        self.commit()
+        if not self._redo:
+            return None
+        delta = self._redo.pop()
+        self._undo.append(delta)
+        return self._apply(delta, 3)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [History.__name__]
@@ -0,0 +1,446 @@
+"""An append-only journal of the edits to a segmentation."""
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+import numpy as np
+from .brush import paint_capsule, paint_circle
+from .file_mode import set_file_mode
+from .graphics import rectangle
+
+
+# the magic bytes at the start of a journal file
+MAGIC = b'DLJ1'
+# the header of a journal file: the magic bytes, height, and width
+HEADER = struct.Struct('<4sII')
+# the header of a record: the kind, the length of the payload, and the CRC32
+# of the payload
+RECORD = struct.Struct('<BII')
+# the kinds of records in a journal
+CIRCLE = 1
+CAPSULE = 2
+FILL = 3
+REGION = 4
+# the fixed part of the payload of each kind of record. a fill is followed by
+# the bit-packed mask of the filled pixels in its rectangle and a region is
+# followed by the raw pixels of its rectangle
+PAYLOADS = {
+    CIRCLE: struct.Struct('<iiiB'),
+    CAPSULE: struct.Struct('<iiiiiB'),
+    FILL: struct.Struct('<iiiiB'),
+    REGION: struct.Struct('<iiii'),
+}
+# the number of buffered bytes that triggers a write to disk
+FLUSH_BYTES = 64 * 2**10
+# the number of seconds that records may stay in the buffer
+FLUSH_INTERVAL = 1.0
+
+
+def _read_header(journal_file, shape: tuple) -> None:
+    """
+    Read the header of a journal file and check it against an image.
+
+    Args:
+        journal_file: the binary file to read the header from
+        shape: the shape of the segmentation that the journal edits
+
+    Returns:
+        None
+
+    """
+    header = journal_file.read(HEADER.size)
+    if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+        raise ValueError('{} is not a journal file'.format(journal_file.name))
+    _, height, width = HEADER.unpack(header)
+    if (height, width) != tuple(shape[:2]):
+        raise ValueError('{} edits a {}x{} segmentation, not {}x{}'.format(
+            journal_file.name, height, width, *shape[:2]
+        ))
+
+
+def _records(journal_file):
+    """
+    Read the records of a journal file after its header.
+
+    Args:
+        journal_file: the binary file to read records from
+
+    Returns:
+        a generator of (kind, payload, end) tuples where end is the position
+        in the file after the record. reading stops at the first record that
+        is incomplete or corrupt, e.g., a record torn by a crash
+
+    """
+    while True:
+        header = journal_file.read(RECORD.size)
+        if len(header) < RECORD.size:
+            return
+        kind, length, checksum = RECORD.unpack(header)
+        payload = journal_file.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        if kind not in PAYLOADS or length < PAYLOADS[kind].size:
+            return
+        yield kind, payload, journal_file.tell()
+
+
+def _apply(image: np.ndarray, kind: int, payload: bytes) -> tuple:
+    """
+    Apply a record to a segmentation.
+
+    Args:
+        image: the map of class indexes to edit in place
+        kind: the kind of the record
+        payload: the payload of the record
+
+    Returns:
+        the (top, left, bottom, right) rectangle that changed (or None)
+
+    """
+    fixed = PAYLOADS[kind]
+    values = fixed.unpack_from(payload)
+    data = payload[fixed.size:]
+    if kind == CIRCLE:
+        return paint_circle(image, *values)
+    if kind == CAPSULE:
+        row_0, column_0, row_1, column_1, radius, label = values
+        return paint_capsule(image,
+            (row_0, column_0),
+            (row_1, column_1),
+            radius,
+            label,
+        )
+    rect = values[:4]
+    shape = rect[2] - rect[0], rect[3] - rect[1]
+    index = rectangle.to_slice(rect)
+    if kind == FILL:
+        mask = np.unpackbits(np.frombuffer(data, dtype=np.uint8),
+            count=shape[0] * shape[1],
+        )
+        image[index][mask.reshape(shape).astype(bool)] = values[4]
+    else:
+        image[index] = np.frombuffer(data, dtype=np.uint8).reshape(shape)
+
+    return rect
+
+
+def replay(path: str, image: np.ndarray) -> int:
+    """
+    Replay the edits in a journal file onto a segmentation.
+
+    Args:
+        path: the path of the journal file
+        image: the map of class indexes to edit in place
+
+    Returns:
+        the number of edits that were replayed (0 if there is no journal)
+
+    """
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, 'rb') as journal_file:
+        _read_header(journal_file, image.shape)
+        for kind, payload, _ in _records(journal_file):
+            _apply(image, kind, payload)
+            count += 1
+
+    return count
+
+
+class Journal(object):
+    """An append-only journal of the edits to a segmentation."""
+
+    def __init__(self, path: str, shape: tuple,
+        flush_bytes: int=FLUSH_BYTES,
+        flush_interval: float=FLUSH_INTERVAL,
+    ) -> None:
+        """
+        Open a journal file, creating it if it doesn't exist.
+
+        Args:
+            path: the path of the journal file
+            shape: the shape of the segmentation that the journal edits
+            flush_bytes: the number of buffered bytes that triggers a write
+            flush_interval: the number of seconds records may stay buffered
+
+        Returns:
+            None
+
+        """
+        self.path = path
+        self.shape = tuple(shape[:2])
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        # every record is an absolute write of pixels, so replaying records
+        # onto a segmentation that already contains them is harmless. this
+        # lets compaction drop records only after the checkpoint is on disk
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._buffer_time = None
+        # the offsets of the first record in the file and the end of the
+        # last record, counted in record bytes since the journal was created
+        self._start = 0
+        self._end = 0
+        if os.path.exists(path):
+            # drop any torn record at the end of an existing journal so that
+            # new records are appended after the last complete one
+            with open(path, 'r+b') as journal_file:
+                _read_header(journal_file, self.shape)
+                end = HEADER.size
+                for _, _, end in _records(journal_file):
+                    pass
+                journal_file.truncate(end)
+            self._end = end - HEADER.size
+        else:
+            self._write_file(b'')
+        self._file = open(path, 'ab')
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(path={}, shape={})'.format(
+            self.__class__.__name__,
+            repr(self.path),
+            self.shape,
+        )
+
+    @property
+    def size(self) -> int:
+        """Return the number of record bytes in the journal."""
+        with self._lock:
+            return self._end - self._start
+
+    @property
+    def closed(self) -> bool:
+        """Return a boolean determining if the journal file is closed."""
+        return self._file.closed
+
+    @property
+    def offset(self) -> int:
+        """Return the offset of the end of the last record in the journal."""
+        with self._lock:
+            return self._end
+
+    def _write_file(self, records: bytes) -> None:
+        """
+        Atomically replace the journal file with a header and records.
+
+        Args:
+            records: the records to write after the header
+
+        Returns:
+            None
+
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(handle, 'wb') as journal_file:
+                journal_file.write(HEADER.pack(MAGIC, *self.shape))
+                journal_file.write(records)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            set_file_mode(temp_path, self.path)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _append(self, kind: int, payload: bytes) -> None:
+        """
+        Append a record to the journal.
+
+        Args:
+            kind: the kind of the record
+            payload: the payload of the record
+
+        Returns:
+            None
+
+        """
+        record = RECORD.pack(kind, len(payload), zlib.crc32(payload))
+        with self._lock:
+            if not self._buffer:
+                self._buffer_time = time.monotonic()
+            self._buffer += record + payload
+            self._end += len(record) + len(payload)
+            if len(self._buffer) >= self.flush_bytes:
+                self._flush()
+
+    def circle(self, row: int, column: int, radius: int, label: int) -> None:
+        """
+        Record a brush stamp.
+
+        Args:
+            row: the row of the center of the stamp
+            column: the column of the center of the stamp
+            radius: the radius of the brush
+            label: the class index that was painted
+
+        Returns:
+            None
+
+        """
+        self._append(CIRCLE, PAYLOADS[CIRCLE].pack(row, column, radius, label))
+
+    def capsule(self, start: tuple, end: tuple,
+        radius: int,
+        label: int,
+    ) -> None:
+        """
+        Record a brush stroke between two mouse positions.
+
+        Args:
+            start: the (row, column) of the start of the stroke
+            end: the (row, column) of the end of the stroke
+            radius: the radius of the brush
+            label: the class index that was painted
+
+        Returns:
+            None
+
+        """
+        payload = PAYLOADS[CAPSULE].pack(*start, *end, radius, label)
+        self._append(CAPSULE, payload)
+
+    def fill(self, rect: tuple, mask: np.ndarray, label: int) -> None:
+        """
+        Record a fill of the pixels in a mask.
+
+        Args:
+            rect: the (top, left, bottom, right) rectangle of the mask
+            mask: the boolean mask of the filled pixels in the rectangle
+            label: the class index that was filled
+
+        Returns:
+            None
+
+        """
+        payload = PAYLOADS[FILL].pack(*rect, label)
+        self._append(FILL, payload + np.packbits(mask).tobytes())
+
+    def region(self, rect: tuple, pixels: np.ndarray) -> None:
+        """
+        Record the pixels of a rectangle, e.g., after an undo.
+
+        Args:
+            rect: the (top, left, bottom, right) rectangle of the pixels
+            pixels: the class indexes of the pixels in the rectangle
+
+        Returns:
+            None
+
+        """
+        payload = PAYLOADS[REGION].pack(*rect)
+        pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        self._append(REGION, payload + pixels.tobytes())
+
+    def _flush(self) -> None:
+        """Write the buffer to disk and sync it (with the lock held)."""
+        if not self._buffer:
+            return
+        self._file.write(self._buffer)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._buffer.clear()
+
+    def flush(self) -> None:
+        """Write the buffered records to disk and sync them."""
+        with self._lock:
+            self._flush()
+
+    def poll(self) -> None:
+        """Flush the buffer if it has been waiting longer than the interval."""
+        with self._lock:
+            if not self._buffer:
+                return
+            if time.monotonic() - self._buffer_time >= self.flush_interval:
+                self._flush()
+
+    def compact(self, offset: int) -> None:
+        """
+        Drop the records before an offset, e.g., after a checkpoint.
+
+        Args:
+            offset: the offset of the journal that the checkpoint contains
+
+        Returns:
+            None
+
+        """
+        with self._lock:
+            if offset <= self._start or self._file.closed:
+                return
+            # the records before the offset may still be buffered
+            self._flush()
+            start = self._start
+        # copy the records after the offset into a new journal file without
+        # the lock so that edits can be recorded while it's written. records
+        # that are flushed to the old file meanwhile are copied after them
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with open(self.path, 'rb') as journal_file, \
+                os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(HEADER.pack(MAGIC, *self.shape))
+                journal_file.seek(HEADER.size + offset - start)
+                while True:
+                    temp_file.write(journal_file.read())
+                    temp_file.flush()
+                    os.fsync(temp_file.fileno())
+                    if self._swap(journal_file, temp_file, temp_path, offset):
+                        break
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _swap(self, journal_file, temp_file, temp_path: str,
+        offset: int,
+    ) -> bool:
+        """
+        Replace the journal file with a compacted copy if it's up to date.
+
+        Args:
+            journal_file: the old journal file, read up to the copied records
+            temp_file: the compacted copy of the journal file
+            temp_path: the path of the compacted copy
+            offset: the offset of the first record in the copy
+
+        Returns:
+            True if the copy replaced the journal file (or the journal was
+            closed), False if records were flushed after the copy
+
+        """
+        with self._lock:
+            if self._file.closed:
+                return True
+            # records are only flushed with the lock held, so the old file
+            # can't grow until the lock is released
+            if journal_file.tell() != os.fstat(journal_file.fileno()).st_size:
+                return False
+            # the buffered records are written to the new file on the next
+            # flush, so only the file and its first offset are swapped here
+            self._file.close()
+            temp_file.close()
+            set_file_mode(temp_path, self.path)
+            os.replace(temp_path, self.path)
+            self._file = open(self.path, 'ab')
+            self._start = offset
+            return True
+
+    def close(self) -> None:
+        """Flush the buffered records and close the journal file."""
+        with self._lock:
+            self._flush()
+            self._file.close()
+
+    def remove(self) -> None:
+        """Close and delete the journal file."""
+        self.close()
+        os.remove(self.path)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [Journal.__name__, replay.__name__]
@@ -0,0 +1,253 @@
+"""Methods to read and write segmentation files."""
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+from .file_mode import set_file_mode
+from .label_map import index_to_rgb, rgb_to_index
+
+
+# the default zlib compression level of PNG files in [0, 9]
+COMPRESS_LEVEL = 6
+# the formats of segmentation images: an RGB image of the label colors, an
+# 8-bit palette image of class indexes with the label colors embedded, and
+# an 8-bit grayscale image of class indexes
+FORMATS = ['rgb', 'palette', 'index']
+# the extensions of NumPy files of class indexes, these are always saved as
+# class indexes regardless of the format
+NUMPY_EXTENSIONS = {'.npy', '.npz'}
+# the name of the array of class indexes in a .npz file
+NPZ_KEY = 'segmentation'
+
+
+def _make_image(segmentation: np.ndarray,
+    colors: np.ndarray,
+    file_format: str,
+) -> Image.Image:
+    """
+    Make an image of a segmentation in a format.
+
+    Args:
+        segmentation: the map of class indexes as uint8
+        colors: the color of each class index
+        file_format: the format of the image, one of FORMATS
+
+    Returns:
+        the image of the segmentation
+
+    """
+    if file_format == 'rgb':
+        return Image.fromarray(index_to_rgb(segmentation, colors))
+    image = Image.fromarray(segmentation)
+    if file_format == 'index':
+        return image
+    if file_format == 'palette':
+        # putting a palette on the grayscale image keeps its pixels, so the
+        # file stores the class indexes and viewers show the label colors
+        image.putpalette(colors.astype(np.uint8).ravel().tolist())
+        return image
+    raise ValueError('invalid file format {}, expected one of {}'.format(
+        repr(file_format),
+        FORMATS,
+    ))
+
+
+def _write(path: str, image: Image.Image, segmentation: np.ndarray,
+    compress_level: int,
+) -> None:
+    """
+    Write a segmentation to a file at the given path.
+
+    Args:
+        path: the path of the file to write, the extension sets the format
+        image: the image of the segmentation to write to image files
+        segmentation: the map of class indexes to write to NumPy files
+        compress_level: the zlib compression level of PNG files in [0, 9]
+
+    Returns:
+        None
+
+    """
+    extension = os.path.splitext(path)[1].lower()
+    # write to a temporary file in the same directory and move it into
+    # place so that a crash while writing never leaves a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix=extension)
+    try:
+        with os.fdopen(handle, 'wb') as segmentation_file:
+            if extension == '.npy':
+                np.save(segmentation_file, segmentation)
+            elif extension == '.npz':
+                np.savez_compressed(segmentation_file,
+                    **{NPZ_KEY: segmentation}
+                )
+            else:
+                image_format = Image.registered_extensions().get(extension,
+                    'PNG',
+                )
+                image.save(segmentation_file, image_format,
+                    compress_level=compress_level,
+                )
+            segmentation_file.flush()
+            os.fsync(segmentation_file.fileno())
+        set_file_mode(temp_path, path)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def save_segmentation(path: str, segmentation: np.ndarray,
+    colors: np.ndarray,
+    compress_level: int=COMPRESS_LEVEL,
+    file_format: str='rgb',
+) -> None:
+    """
+    Save a segmentation to a file atomically.
+
+    Args:
+        path: the path of the file to save, the extension sets the format.
+              .npy and .npz files are saved as arrays of class indexes
+        segmentation: the map of class indexes to save
+        colors: the color of each class index
+        compress_level: the zlib compression level of PNG files in [0, 9]
+        file_format: the format of image files, one of FORMATS
+
+    Returns:
+        None
+
+    """
+    segmentation = segmentation.astype(np.uint8, copy=False)
+    image = None
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in NUMPY_EXTENSIONS:
+        image = _make_image(segmentation, colors, file_format)
+    _write(path, image, segmentation, compress_level)
+
+
+def _check_indexes(segmentation: np.ndarray,
+    colors: np.ndarray,
+    path: str,
+) -> np.ndarray:
+    """
+    Check that a map of class indexes read from a file is valid.
+
+    Args:
+        segmentation: the map of class indexes that was read
+        colors: the color of each class index
+        path: the path of the file for error messages
+
+    Returns:
+        the map of class indexes as uint8
+
+    """
+    if segmentation.ndim != 2:
+        raise ValueError('{} has shape {}, expected (height, width)'.format(
+            path,
+            segmentation.shape,
+        ))
+    if segmentation.size and segmentation.max() >= len(colors):
+        message = '{} has class index {}, but there are {} labels'
+        raise ValueError(message.format(
+            path,
+            segmentation.max(),
+            len(colors),
+        ))
+    return segmentation.astype(np.uint8, copy=False)
+
+
+def _read_numpy(path: str) -> np.ndarray:
+    """
+    Read an array of class indexes from a .npy or .npz file.
+
+    Args:
+        path: the path of the file to read
+
+    Returns:
+        the array in the file
+
+    """
+    with open(path, 'rb') as segmentation_file:
+        data = np.load(segmentation_file, allow_pickle=False)
+        if not isinstance(data, np.lib.npyio.NpzFile):
+            return data
+        # prefer the named array, but accept a file with a single array of
+        # any name, e.g., one saved with np.savez(path, array)
+        with data:
+            if NPZ_KEY in data.files:
+                return data[NPZ_KEY]
+            if len(data.files) == 1:
+                return data[data.files[0]]
+    raise ValueError('{} has no {} array'.format(path, repr(NPZ_KEY)))
+
+
+def _matches_palette(image: Image.Image, colors: np.ndarray) -> bool:
+    """
+    Return a boolean determining if a palette image uses the label colors.
+
+    Args:
+        image: the palette image
+        colors: the color of each class index
+
+    Returns:
+        True if the first entries of the palette are the label colors, so
+        the pixels of the image are class indexes
+
+    """
+    palette = image.getpalette() or []
+    expected = colors.astype(np.uint8).ravel().tolist()
+    return palette[:len(expected)] == expected
+
+
+def read_segmentation(path: str, colors: np.ndarray) -> np.ndarray:
+    """
+    Read a segmentation from a file, detecting its format.
+
+    Args:
+        path: the path of the file to read. .npy and .npz files and 8-bit
+              grayscale images contain class indexes, palette images
+              with the label colors are read as class indexes, and any
+              other image is read as RGB label colors
+        colors: the color of each class index
+
+    Returns:
+        the map of class indexes in the file with shape (height, width),
+        or the RGB label colors in the file with shape (height, width, 3)
+
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in NUMPY_EXTENSIONS:
+        return _check_indexes(_read_numpy(path), colors, path)
+    with Image.open(path) as image_file:
+        if image_file.mode == 'L':
+            return _check_indexes(np.array(image_file), colors, path)
+        if image_file.mode == 'P' and _matches_palette(image_file, colors):
+            return _check_indexes(np.array(image_file), colors, path)
+        return np.array(image_file.convert('RGB'))
+
+
+def load_segmentation(path: str, colors: np.ndarray) -> np.ndarray:
+    """
+    Load a segmentation from a file, detecting its format.
+
+    Args:
+        path: the path of the file to load, see read_segmentation
+        colors: the color of each class index
+
+    Returns:
+        the map of class indexes in the file, colors that aren't labels map
+        to the label with the nearest color
+
+    """
+    segmentation = read_segmentation(path, colors)
+    if segmentation.ndim == 3:
+        return rgb_to_index(segmentation, colors)
+    return segmentation
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    load_segmentation.__name__,
+    read_segmentation.__name__,
+    save_segmentation.__name__,
+]
@@ -0,0 +1,114 @@
+"""Methods for converting between RGB images and maps of class indexes."""
+import numpy as np
+
+
+def pack_rgb(rgb: np.ndarray) -> np.ndarray:
+    """
+    Pack the RGB colors of an image into 24-bit integers.
+
+    Args:
+        rgb: an array of colors with the RGB channels along the last axis
+
+    Returns:
+        an array of 24-bit integers with the shape of all the other axes
+
+    """
+    rgb = rgb[..., :3].astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def make_colors(rgb: list) -> np.ndarray:
+    """
+    Make a color lookup table from a list of label colors.
+
+    Args:
+        rgb: the RGB tuple for each label in order of their class indexes
+
+    Returns:
+        an array of shape (labels, 3) mapping class indexes to colors
+
+    """
+    colors = np.array(list(rgb), dtype=np.uint8).reshape(-1, 3)
+    # the class index maps are stored with one byte per pixel
+    if len(colors) > 256:
+        raise ValueError('at most 256 labels are supported, got {}'.format(
+            len(colors)
+        ))
+    return colors
+
+
+def make_lookup(colors: np.ndarray) -> np.ndarray:
+    """
+    Make a lookup table from packed 24-bit colors to class indexes.
+
+    Args:
+        colors: the color lookup table from make_colors
+
+    Returns:
+        an array of 2**24 class indexes indexed by packed colors. colors that
+        aren't in the color lookup table map to len(colors)
+
+    """
+    # the sentinel for unknown colors needs a value past the last label
+    dtype = np.uint8 if len(colors) < 256 else np.uint16
+    lookup = np.full(2**24, len(colors), dtype=dtype)
+    # assign in reverse so the first of any duplicate colors wins, as it
+    # does for the nearest color in rgb_to_index
+    indexes = np.arange(len(colors), dtype=dtype)
+    lookup[pack_rgb(colors[::-1])] = indexes[::-1]
+
+    return lookup
+
+
+def rgb_to_index(rgb: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """
+    Convert an RGB segmentation to a map of class indexes.
+
+    Args:
+        rgb: the RGB segmentation with shape (height, width, 3)
+        colors: the color lookup table from make_colors
+
+    Returns:
+        a map of class indexes with shape (height, width) and dtype uint8.
+        colors that aren't in the lookup table map to the label with the
+        nearest color
+
+    """
+    # find the unique colors in the image and the inverse mapping to them.
+    # images are labeled with a handful of colors, so the remainder of the
+    # conversion works on the unique colors instead of the pixels
+    packed = pack_rgb(rgb)
+    unique, inverse = np.unique(packed, return_inverse=True)
+    # unpack the unique colors and find the nearest label for each of them
+    unique_rgb = np.stack([unique >> 16, (unique >> 8) & 255, unique & 255])
+    unique_rgb = unique_rgb.T.astype(np.int32)
+    distance = unique_rgb[:, None, :] - colors[None, :, :].astype(np.int32)
+    distance = (distance ** 2).sum(axis=-1)
+    lookup = distance.argmin(axis=-1).astype(np.uint8)
+
+    return lookup[inverse].reshape(packed.shape)
+
+
+def index_to_rgb(index: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """
+    Convert a map of class indexes to an RGB segmentation.
+
+    Args:
+        index: the map of class indexes with shape (height, width)
+        colors: the color lookup table from make_colors
+
+    Returns:
+        an RGB segmentation with shape (height, width, 3) and dtype uint8
+
+    """
+    return colors[index]
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    index_to_rgb.__name__,
+    make_colors.__name__,
+    make_lookup.__name__,
+    pack_rgb.__name__,
+    rgb_to_index.__name__,
+]
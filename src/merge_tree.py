@@ -0,0 +1,142 @@
+"""A hierarchy of merges of the super pixels in a segmentation."""
+import heapq
+import numpy as np
+
+
+class MergeTree(object):
+    """A hierarchy of merges of the super pixels in a segmentation."""
+
+    def __init__(self, image: np.ndarray, segments: np.ndarray) -> None:
+        """
+        Initialize a new merge tree by greedily merging adjacent segments.
+
+        Args:
+            image: the image that was segmented
+            segments: the fine segmentation map of non-negative ids
+
+        Returns:
+            None
+
+        """
+        # relabel the segments sequentially so they index the nodes
+        ids, fine = np.unique(segments, return_inverse=True)
+        self._segments = fine.reshape(segments.shape).astype(np.int32)
+        self.num_segments = len(ids)
+        # find the mean color of each segment
+        flat = self._segments.ravel()
+        counts = np.bincount(flat, minlength=self.num_segments)
+        pixels = image.reshape(-1, image.shape[-1]).astype(float)
+        sums = np.stack([
+            np.bincount(flat, weights=channel, minlength=self.num_segments)
+            for channel in pixels.T
+        ], axis=1)
+        # find the pairs of segments that are adjacent
+        pairs = []
+        for a, b in [
+            (self._segments[:, :-1], self._segments[:, 1:]),
+            (self._segments[:-1, :], self._segments[1:, :]),
+        ]:
+            different = a != b
+            pairs.append(np.stack([a[different], b[different]]))
+        pairs = np.sort(np.concatenate(pairs, axis=1), axis=0)
+        pairs = np.unique(pairs, axis=1).T
+        # build the tree bottom up by merging the pair of adjacent regions
+        # with the closest mean colors. merged regions are new nodes that
+        # are numbered from the number of segments
+        neighbors = [set() for _ in range(self.num_segments)]
+        for a, b in pairs.tolist():
+            neighbors[a].add(b)
+            neighbors[b].add(a)
+        counts = counts.tolist()
+        sums = list(sums)
+        def cost(a, b):
+            return np.linalg.norm(sums[a] / counts[a] - sums[b] / counts[b])
+        heap = [(cost(a, b), a, b) for a, b in pairs.tolist()]
+        heapq.heapify(heap)
+        is_active = [True] * self.num_segments
+        merges = []
+        costs = []
+        while heap:
+            merge_cost, a, b = heapq.heappop(heap)
+            # skip pairs where either region was already merged
+            if not (is_active[a] and is_active[b]):
+                continue
+            node = len(is_active)
+            is_active[a] = is_active[b] = False
+            is_active.append(True)
+            counts.append(counts[a] + counts[b])
+            sums.append(sums[a] + sums[b])
+            # connect the new node to the neighbors of both regions
+            neighbors.append((neighbors[a] | neighbors[b]) - {a, b})
+            for neighbor in neighbors[node]:
+                neighbors[neighbor] -= {a, b}
+                neighbors[neighbor].add(node)
+                heapq.heappush(heap, (cost(node, neighbor), node, neighbor))
+            merges.append((a, b))
+            costs.append(merge_cost)
+        self._merges = np.array(merges, dtype=np.int64).reshape(-1, 2)
+        self.costs = np.array(costs)
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(segments={}, merges={})'.format(
+            self.__class__.__name__,
+            self.num_segments,
+            len(self._merges),
+        )
+
+    @property
+    def num_merges(self) -> int:
+        """Return the number of merges in the tree."""
+        return len(self._merges)
+
+    def lookup(self, merges: int) -> np.ndarray:
+        """
+        Return the lookup array from fine segments to merged regions.
+
+        Args:
+            merges: the number of merges to apply, in order of cost
+
+        Returns:
+            a vector mapping the id of each fine segment to the sequential id
+            of the region that it's in after the merges
+
+        """
+        merges = min(max(merges, 0), self.num_merges)
+        # point both children of each applied merge at their parent node
+        parent = np.arange(self.num_segments + merges)
+        nodes = np.arange(self.num_segments, self.num_segments + merges)
+        parent[self._merges[:merges, 0]] = nodes
+        parent[self._merges[:merges, 1]] = nodes
+        # jump the pointers until each segment points at its root
+        while True:
+            roots = parent[parent]
+            if np.array_equal(roots, parent):
+                break
+            parent = roots
+        # relabel the roots sequentially
+        _, lookup = np.unique(parent[:self.num_segments], return_inverse=True)
+
+        return lookup
+
+    def cut(self, granularity: float) -> np.ndarray:
+        """
+        Return the segmentation at a level of the tree.
+
+        Args:
+            granularity: the fraction of the merges to apply in [0, 1], where
+                         0 is the fine segmentation and 1 is the coarsest
+
+        Returns:
+            a segmentation map with the same shape as the fine segmentation
+
+        """
+        if not 0 <= granularity <= 1:
+            raise ValueError('granularity must be in [0, 1]')
+        lookup = self.lookup(round(granularity * self.num_merges))
+
+        return lookup[self._segments]
+
+
+# explicitly define the outward facing API of this module
+__all__ = [MergeTree.__name__]
@@ -0,0 +1,85 @@
+"""A table of the labels to segment and their colors."""
+import csv
+
+
+def _parse_rgb(value: str) -> tuple:
+    """
+    Parse an RGB color from a string.
+
+    Args:
+        value: the string of the color, e.g., "(128, 64, 128)"
+
+    Returns:
+        a tuple of the red, green, and blue channels in [0, 255]
+
+    """
+    try:
+        rgb = tuple(int(x) for x in value.strip().strip('()[]').split(','))
+    except ValueError:
+        rgb = ()
+    if len(rgb) != 3 or not all(0 <= x <= 255 for x in rgb):
+        raise ValueError('{} is not an RGB color'.format(repr(value)))
+
+    return rgb
+
+
+class Metadata(object):
+    """A table of the labels to segment and their colors."""
+
+    def __init__(self, labels: list, rgb: list) -> None:
+        """
+        Initialize a new metadata table.
+
+        Args:
+            labels: the name of each label in order of their class indexes
+            rgb: the RGB tuple of each label in order of their class indexes
+
+        Returns:
+            None
+
+        """
+        self.labels = list(labels)
+        self.rgb = [tuple(color) for color in rgb]
+        if len(self.labels) != len(self.rgb):
+            raise ValueError('there must be one color for each label')
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(labels={}, rgb={})'.format(
+            self.__class__.__name__,
+            self.labels,
+            self.rgb,
+        )
+
+    def __len__(self) -> int:
+        """Return the number of labels in the table."""
+        return len(self.labels)
+
+    def __getitem__(self, column: str) -> list:
+        """Return the 'label' or 'rgb' column of the table."""
+        return {'label': self.labels, 'rgb': self.rgb}[column]
+
+    @classmethod
+    def read_csv(cls, path: str) -> 'Metadata':
+        """
+        Read a metadata table from a .csv file.
+
+        Args:
+            path: the path of a .csv file with a label column and an rgb
+                  column of tuples, e.g., "(128, 64, 128)"
+
+        Returns:
+            the table of the labels and colors in the file
+
+        """
+        with open(path, newline='') as metadata_file:
+            rows = list(csv.DictReader(metadata_file))
+
+        return cls(
+            [row['label'] for row in rows],
+            [_parse_rgb(row['rgb']) for row in rows],
+        )
+
+
+# explicitly define the outward facing API of this module
+__all__ = [Metadata.__name__]
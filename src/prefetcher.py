@@ -0,0 +1,75 @@
+"""A background loader that prepares items before they're needed."""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+
+class Prefetcher(object):
+    """A background loader that prepares items before they're needed."""
+
+    def __init__(self, load) -> None:
+        """
+        Initialize a new prefetcher.
+
+        Args:
+            load: a callable that loads an item from its key
+
+        Returns:
+            None
+
+        """
+        self._load = load
+        # the executor is created on the first prefetch so that its thread
+        # runs in the process that prefetches
+        self._executor = None
+        self._futures = {}
+        # items may be prefetched on one thread and taken on another
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(load={})'.format(self.__class__.__name__, self._load)
+
+    def prefetch(self, keys: list) -> None:
+        """
+        Load items in the background, dropping items that aren't needed.
+
+        Args:
+            keys: the keys of the items that will be needed next, in order
+
+        Returns:
+            None
+
+        """
+        keys = list(keys)
+        with self._lock:
+            for key in list(self._futures):
+                if key not in keys:
+                    self._futures.pop(key).cancel()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+            for key in keys:
+                if key not in self._futures:
+                    future = self._executor.submit(self._load, key)
+                    self._futures[key] = future
+
+    def get(self, key):
+        """
+        Return an item, waiting for it if it's being prefetched.
+
+        Args:
+            key: the key of the item
+
+        Returns:
+            the item that the load callable returns for the key
+
+        """
+        with self._lock:
+            future = self._futures.pop(key, None)
+        # a cancelled item is loaded here instead
+        if future is None or future.cancelled():
+            return self._load(key)
+        return future.result()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [Prefetcher.__name__]
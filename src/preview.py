@@ -0,0 +1,88 @@
+"""Methods to preview super pixel segmentations at a lower resolution."""
+import numpy as np
+
+
+# the names of arguments that measure areas in pixels
+AREA_ARGUMENTS = ['min_size', 'scale']
+# the names of arguments that measure distances in pixels
+DISTANCE_ARGUMENTS = ['kernel_size', 'sigma']
+
+
+def downsample(image: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Downsample an image for previewing segmentations of it.
+
+    Args:
+        image: the RGB image to downsample
+        factor: the factor to divide the height and width by
+
+    Returns:
+        the anti-aliased, downsampled image with the same type
+
+    """
+    if factor < 1:
+        raise ValueError('factor must be at least 1')
+    shape = (
+        max(image.shape[0] // factor, 1),
+        max(image.shape[1] // factor, 1),
+        *image.shape[2:],
+    )
+    # skimage is slow to import, so import it on first use
+    from skimage.transform import resize
+    small = resize(image, shape, anti_aliasing=True, preserve_range=True)
+
+    return small.astype(image.dtype)
+
+
+def upsample(image: np.ndarray, shape: tuple) -> np.ndarray:
+    """
+    Upsample a segmentation map or image by nearest neighbor interpolation.
+
+    Args:
+        image: the map or image to upsample
+        shape: the height and width to upsample to
+
+    Returns:
+        the upsampled map or image with the same type
+
+    """
+    rows = np.arange(shape[0]) * image.shape[0] // shape[0]
+    columns = np.arange(shape[1]) * image.shape[1] // shape[1]
+
+    return image[rows[:, None], columns]
+
+
+def downsample_arguments(kwargs: dict, factor: int) -> dict:
+    """
+    Scale the arguments of a segmentation algorithm to a downsampled image.
+
+    Args:
+        kwargs: the key word arguments for the segmentation algorithm
+        factor: the factor that the image was downsampled by
+
+    Returns:
+        a copy of the arguments with sizes in pixels scaled to the image
+
+    """
+    def scale(value, divisor):
+        # keep integers as positive integers, e.g., for kernel sizes
+        if isinstance(value, int) and not isinstance(value, bool):
+            return max(round(value / divisor), 1)
+        return value / divisor
+    kwargs = dict(kwargs)
+    for name in AREA_ARGUMENTS:
+        if name in kwargs:
+            kwargs[name] = scale(kwargs[name], factor**2)
+    for name in DISTANCE_ARGUMENTS:
+        if name in kwargs:
+            kwargs[name] = scale(kwargs[name], factor)
+
+    return kwargs
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    downsample.__name__,
+    downsample_arguments.__name__,
+    upsample.__name__,
+]
@@ -1,50 +1,163 @@
 """A method to segment image."""
-from skimage.color import rgb2gray
-from skimage.filters import sobel
-from skimage.segmentation import felzenszwalb
-from skimage.segmentation import slic
-from skimage.segmentation import quickshift
-from skimage.segmentation import watershed
-from skimage.segmentation import mark_boundaries
-from skimage.util import img_as_float
+from functools import cached_property
+import importlib
+import numpy as np
+from .merge_tree import MergeTree
+from .tiled_segment import segment_tiled
 
 
-# a list of segmentation algorithms supported by this module
-SEGMENTATION_LIST = [felzenszwalb, slic, quickshift, watershed]
-# a mapping of string method names to their references in memory
-SEGMENTATION = {alg.__name__: alg for alg in SEGMENTATION_LIST}
+# a list of the names of the skimage segmentation algorithms supported by
+# this module. skimage is slow to import, so the algorithms (and the rest of
+# skimage) are imported on first use
+SEGMENTATION_LIST = ['felzenszwalb', 'slic', 'quickshift', 'watershed']
+# a mapping of algorithm names to the preprocessed image each one takes.
+# slic rescales the image before its own Lab conversion, so it takes the
+# float image instead of the Lab image
+INPUTS = {
+    'felzenszwalb': 'float_image',
+    'slic': 'float_image',
+    'quickshift': 'lab',
+    'watershed': 'gradient',
+}
 
 
-def segment(image, algorithm: str, **kwargs):
+class ImageContext(object):
+    """The preprocessed forms of an image, computed once and shared."""
+
+    def __init__(self, image: np.ndarray) -> None:
+        """
+        Initialize a new image context.
+
+        Args:
+            image: the RGB image to preprocess
+
+        Returns:
+            None
+
+        """
+        self.image = image
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(image.shape={})'.format(
+            self.__class__.__name__,
+            self.image.shape,
+        )
+
+    @cached_property
+    def float_image(self) -> np.ndarray:
+        """Return the image in [0, 1]."""
+        from skimage.util import img_as_float
+        return img_as_float(self.image)
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        """Return the grayscale image in [0, 1]."""
+        from skimage.color import rgb2gray
+        return rgb2gray(self.float_image)
+
+    @cached_property
+    def gradient(self) -> np.ndarray:
+        """Return the sobel gradient magnitude of the grayscale image."""
+        from skimage.filters import sobel
+        return sobel(self.gray)
+
+    @cached_property
+    def lab(self) -> np.ndarray:
+        """Return the image in the CIE Lab color space."""
+        from skimage.color import rgb2lab
+        return rgb2lab(self.float_image)
+
+
+def _algorithm(name: str):
+    """
+    Import a segmentation algorithm.
+
+    Args:
+        name: the string name of the skimage segmentation algorithm
+
+    Returns:
+        the function of the algorithm
+
+    """
+    if name not in SEGMENTATION_LIST:
+        raise ValueError('{} is not a valid segmentation algorithm'.format(
+            repr(name)
+        ))
+    return getattr(importlib.import_module('skimage.segmentation'), name)
+
+
+def _boundaries(segments: np.ndarray) -> np.ndarray:
+    """Return the boolean map of the boundaries between segments."""
+    from skimage.segmentation import find_boundaries
+    return find_boundaries(segments)
+
+
+def segment(image, algorithm: str,
+    tile_size: int=None,
+    workers: int=None,
+    **kwargs
+):
     """
     Segment an input image using given segmentation algorithm and params.
 
     Args:
-        image: the image to segment
+        image: the image or the ImageContext of the image to segment
         algorithm: the string name of the skimage segmentation algorithm to use
+        tile_size: the size of the tiles to segment the image in parallel in
+                   (None to segment the whole image at once)
+        workers: the number of processes to segment tiles on (the number of
+                 CPUs if None)
         kwargs: the key word arguments to pass to the segmentation algorithm
 
     Returns:
-        a segmented image if mark is true, otherwise a segmentation map
+        a tuple of the segmentation map and a boolean map of the boundaries
+        between segments
+
+    """
+    # import the method using its string name
+    segment_image = _algorithm(algorithm)
+    # get the preprocessed image that the algorithm takes from the context.
+    # the context computes each form once and keeps it for the next call
+    if not isinstance(image, ImageContext):
+        image = ImageContext(image)
+    image = getattr(image, INPUTS[algorithm])
+    # the Lab image is already converted, so quickshift shouldn't convert it
+    if algorithm == 'quickshift':
+        kwargs = dict(kwargs, convert2lab=False)
+    # apply the segmentation algorithm with given key word arguments, if the
+    # image is larger than a tile, segment it in tiles on a process pool
+    if tile_size is None or max(image.shape[:2]) <= tile_size:
+        segments = segment_image(image, **kwargs)
+    else:
+        segments = segment_tiled(image, segment_image, tile_size,
+            workers=workers,
+            **kwargs
+        )
+
+    return segments, _boundaries(segments)
+
+
+def segment_merged(tree: MergeTree, granularity: float):
+    """
+    Cut a merge tree of a segmentation into coarser segments.
+
+    Args:
+        tree: the merge tree of the fine segmentation of an image
+        granularity: the fraction of the merges in the tree to apply
+
+    Returns:
+        a tuple of the segmentation map and boundary map like segment
 
     """
-    # try to unwrap the method using string name
-    try:
-        segment_image = SEGMENTATION[algorithm]
-    except KeyError:
-        raise ValueError('{} is not a valid segmentation algorithm')
-    # if the image is in [0, 255], convert the image to [0, 1]
-    if str(image.dtype) == 'uint8':
-        image = img_as_float(image)
-    # if the algorithm is watershed, apply sobel and grayscale first
-    if algorithm == 'watershed':
-        image = sobel(rgb2gray(image))
-    # apply the segmentation algorithm with given key word arguments
-    segments = segment_image(image, **kwargs)
-    boundaries = mark_boundaries(image, segments, (1, 1, 1)).astype('uint8')
-
-    return segments, boundaries
+    segments = tree.cut(granularity)
+
+    return segments, _boundaries(segments)
 
 
 # define the outward facing API of this module
-__all__ = [segment.__name__]
+__all__ = [
+    ImageContext.__name__,
+    segment.__name__,
+    segment_merged.__name__,
+]
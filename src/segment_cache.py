@@ -0,0 +1,209 @@
+"""A cache of super pixel segmentations keyed by image and parameters."""
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import traceback
+import numpy as np
+from .file_mode import set_file_mode
+from .segment import ImageContext, segment
+
+
+class SegmentCache(object):
+    """A cache of super pixel segmentations keyed by image and parameters."""
+
+    def __init__(self,
+        max_bytes: int=256 * 2**20,
+        directory: str=None,
+    ) -> None:
+        """
+        Initialize a new segmentation cache.
+
+        Args:
+            max_bytes: the maximal number of bytes to keep in memory. when the
+                       cache exceeds the budget, the least recently used
+                       segmentations are dropped from memory
+            directory: an optional directory to store segmentations in as
+                       compressed .npz files that outlive the process
+
+        Returns:
+            None
+
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.nbytes = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # create the directory for the disk store if there is one
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(max_bytes={}, directory={})'.format(
+            self.__class__.__name__,
+            self.max_bytes,
+            repr(self.directory),
+        )
+
+    # the version of the format of cached segmentations. changing the format
+    # changes the keys so that old files in the disk store are ignored
+    FORMAT = 2
+
+    @staticmethod
+    def image_key(image: np.ndarray) -> str:
+        """
+        Return a key for the contents of an image.
+
+        Args:
+            image: the image (or the ImageContext of the image) to hash
+
+        Returns:
+            a hex digest of the shape, type, and pixels of the image
+
+        """
+        if isinstance(image, ImageContext):
+            image = image.image
+        digest = hashlib.sha1()
+        digest.update(str((image.shape, image.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    @classmethod
+    def key(cls, image_key: str, algorithm: str, kwargs: dict) -> str:
+        """
+        Return a key for a segmentation of an image.
+
+        Args:
+            image_key: the key of the image from image_key
+            algorithm: the name of the segmentation algorithm
+            kwargs: the key word arguments to the segmentation algorithm
+
+        Returns:
+            a hex digest of the image key, the algorithm, and the arguments
+            with numbers normalized so that e.g., 100 and 100.0 are equal
+
+        """
+        def normalize(value):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value)
+            return value
+        kwargs = sorted((k, normalize(v)) for k, v in kwargs.items())
+        key = [cls.FORMAT, image_key, algorithm, kwargs]
+        key = json.dumps(key, default=str)
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """Return the path of the file for a key in the disk store."""
+        return os.path.join(self.directory, '{}.npz'.format(key))
+
+    def get(self, key: str) -> tuple:
+        """
+        Return the segmentation for a key.
+
+        Args:
+            key: the key of the segmentation from key
+
+        Returns:
+            the tuple of arrays from segment or None if the key isn't cached
+
+        """
+        with self._lock:
+            # if the key is in memory, mark it as the most recently used
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        # if the key is in the disk store, load it back into memory
+        if self.directory is not None and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as data:
+                value = data['segments'], data['boundaries']
+            self._put_memory(key, value)
+            return value
+        return None
+
+    def _put_memory(self, key: str, value: tuple) -> None:
+        """Put a segmentation in memory and drop any over the budget."""
+        # make the arrays read-only so callers can't corrupt the cache
+        for array in value:
+            array.setflags(write=False)
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = value
+            self.nbytes += sum(array.nbytes for array in value)
+            # drop the least recently used segmentations over the budget
+            while self.nbytes > self.max_bytes and self._cache:
+                _, dropped = self._cache.popitem(last=False)
+                self.nbytes -= sum(array.nbytes for array in dropped)
+
+    def put(self, key: str, value: tuple) -> None:
+        """
+        Put a segmentation in the cache.
+
+        Args:
+            key: the key of the segmentation from key
+            value: the tuple of arrays from segment
+
+        Returns:
+            None
+
+        """
+        self._put_memory(key, value)
+        if self.directory is None or os.path.exists(self._path(key)):
+            return
+        # write to a temporary file and move it into place so that other
+        # processes never read a partial file. the segmentation is already
+        # in memory, so a failed write, e.g., on a full disk, only costs the
+        # disk store
+        path = None
+        try:
+            handle, path = tempfile.mkstemp(dir=self.directory, suffix='.npz')
+            with os.fdopen(handle, 'wb') as npz_file:
+                segments, boundaries = value
+                np.savez_compressed(npz_file,
+                    segments=segments,
+                    boundaries=boundaries,
+                )
+            set_file_mode(path, self._path(key))
+            os.replace(path, self._path(key))
+        except OSError:
+            traceback.print_exc()
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    def segment(self, image: np.ndarray, algorithm: str,
+        image_key: str=None,
+        workers: int=None,
+        **kwargs
+    ) -> tuple:
+        """
+        Segment an image, using a cached result if there is one.
+
+        Args:
+            image: the image (or the ImageContext of the image) to segment
+            algorithm: the string name of the segmentation algorithm to use
+            image_key: the key of the image (computed from the image if None)
+            workers: the number of processes to segment tiles on. the result
+                     doesn't depend on it, so it isn't part of the key
+            kwargs: the key word arguments to pass to the algorithm
+
+        Returns:
+            the tuple of arrays from segment
+
+        """
+        if image_key is None:
+            image_key = self.image_key(image)
+        key = self.key(image_key, algorithm, kwargs)
+        value = self.get(key)
+        # if the segmentation isn't cached, compute it and cache it
+        if value is None:
+            value = segment(image, algorithm, workers=workers, **kwargs)
+            self.put(key, value)
+        return value
+
+
+# explicitly define the outward facing API of this module
+__all__ = [SegmentCache.__name__]
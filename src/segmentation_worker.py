@@ -0,0 +1,111 @@
+"""A background worker that runs the latest super pixel segmentation."""
+import threading
+import traceback
+import types
+
+
+class SegmentationWorker(object):
+    """A background worker that runs the latest super pixel segmentation."""
+
+    def __init__(self, work, publish) -> None:
+        """
+        Initialize a new segmentation worker.
+
+        Args:
+            work: a callable that computes a result from a request, or a
+                  generator function that yields successively refined results
+            publish: a callable that publishes a result that wasn't superseded
+
+        Returns:
+            None
+
+        """
+        self._work = work
+        self._publish = publish
+        self._condition = threading.Condition()
+        # setup the slot for the latest request. requests that arrive while
+        # another is pending replace it, i.e., the queue coalesces to the
+        # latest request
+        self._pending = None
+        self._has_pending = False
+        self._latest = 0
+        self._is_busy = False
+        # the thread is started on the first request so that it runs in the
+        # process that submits requests
+        self._thread = None
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(work={}, publish={})'.format(
+            self.__class__.__name__,
+            self._work,
+            self._publish,
+        )
+
+    @property
+    def is_busy(self) -> bool:
+        """Return a boolean determining if there is work pending or running."""
+        with self._condition:
+            return self._is_busy or self._has_pending
+
+    def wait(self) -> None:
+        """Block until the worker finishes all of its work."""
+        with self._condition:
+            while self._is_busy or self._has_pending:
+                self._condition.wait()
+
+    def submit(self, request) -> None:
+        """
+        Submit a request, superseding any requests before it.
+
+        Args:
+            request: the request to pass to the work callable
+
+        Returns:
+            None
+
+        """
+        with self._condition:
+            self._latest += 1
+            self._pending = request
+            self._has_pending = True
+            # start the worker thread if it isn't running yet
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        """Run requests from the queue forever."""
+        while True:
+            # wait for a request and dequeue it
+            with self._condition:
+                while not self._has_pending:
+                    self._condition.wait()
+                request, request_id = self._pending, self._latest
+                self._pending = None
+                self._has_pending = False
+                self._is_busy = True
+            # run the work, reporting errors without killing the worker
+            try:
+                results = self._work(request)
+                if not isinstance(results, types.GeneratorType):
+                    results = iter([results])
+                # publish each result, stopping the work early if a request
+                # arrived while working
+                for result in results:
+                    with self._condition:
+                        if request_id != self._latest:
+                            break
+                        self._publish(result)
+                if isinstance(results, types.GeneratorType):
+                    results.close()
+            except Exception:
+                traceback.print_exc()
+            with self._condition:
+                self._is_busy = False
+                self._condition.notify_all()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [SegmentationWorker.__name__]
@@ -0,0 +1,219 @@
+"""A session of images to label one after another."""
+import csv
+import os
+from collections import namedtuple
+import numpy as np
+from PIL import Image
+from .label_file import NUMPY_EXTENSIONS, load_segmentation
+
+
+# an image to label, its a priori segmentation (or None), and the file to
+# save its segmentation to
+SessionItem = namedtuple('SessionItem', ['image', 'segmentation', 'output'])
+# the extensions of the files to label in a directory
+IMAGE_EXTENSIONS = {'.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff'}
+# the extensions of label files in a directory
+LABEL_EXTENSIONS = IMAGE_EXTENSIONS | NUMPY_EXTENSIONS
+# the extension of the segmentations saved for a directory of images. the
+# images may be lossy, e.g., JPEG, but the labels can't be
+OUTPUT_EXTENSION = '.png'
+
+
+def _find_label(directory: str, stem: str) -> str:
+    """
+    Find the label file with a name in a directory.
+
+    Args:
+        directory: the directory of label files
+        stem: the name of the label file without its extension
+
+    Returns:
+        the path of the label file, preferring a .png file (or None if there
+        is no label file with the name)
+
+    """
+    extensions = [OUTPUT_EXTENSION]
+    extensions += sorted(LABEL_EXTENSIONS - {OUTPUT_EXTENSION})
+    for extension in extensions:
+        for name in (stem + extension, stem + extension.upper()):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def read_image(path: str) -> np.ndarray:
+    """
+    Read an image file into an array.
+
+    Args:
+        path: the path of the image file
+
+    Returns:
+        the pixels of the image
+
+    """
+    with Image.open(path) as image_file:
+        return np.array(image_file)
+
+
+class Session(object):
+    """A session of images to label one after another."""
+
+    def __init__(self, items: list) -> None:
+        """
+        Initialize a new session.
+
+        Args:
+            items: the list of SessionItems to label in order
+
+        Returns:
+            None
+
+        """
+        self.items = list(items)
+        if not self.items:
+            raise ValueError('a session needs at least one image')
+        # the window and the shared buffers are sized for the first image, so
+        # every image must match it. reading the headers is cheap
+        shapes = {}
+        for item in self.items:
+            with Image.open(item.image) as image_file:
+                shapes.setdefault(image_file.size, item.image)
+        if len(shapes) > 1:
+            sizes = ', '.join('{} is {}x{}'.format(path, *size[::-1])
+                for size, path in shapes.items()
+            )
+            raise ValueError('images in a session must match: ' + sizes)
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(items={})'.format(self.__class__.__name__, len(self))
+
+    def __len__(self) -> int:
+        """Return the number of images in the session."""
+        return len(self.items)
+
+    def __getitem__(self, index: int) -> SessionItem:
+        """Return an item of the session."""
+        return self.items[index]
+
+    @classmethod
+    def from_directory(cls, images: str,
+        segmentations: str=None,
+        outputs: str=None,
+    ) -> 'Session':
+        """
+        Create a session from a directory of images.
+
+        Args:
+            images: the directory of the images to label
+            segmentations: the directory of a priori segmentations with the
+                           same file names as the images, in any label
+                           format (or None)
+            outputs: the directory to save segmentations to as .png files
+                     with the same names as the images (None to save them
+                     next to the a priori segmentations)
+
+        Returns:
+            a session of the images in the directory in order of name
+
+        """
+        if outputs is None:
+            outputs = segmentations
+        if outputs is None:
+            raise ValueError('a directory of images needs an output directory')
+        items = []
+        names = {}
+        for name in sorted(os.listdir(images)):
+            stem, extension = os.path.splitext(name)
+            if extension.lower() not in IMAGE_EXTENSIONS:
+                continue
+            # images with the same name would save over each other
+            if stem in names:
+                raise ValueError('{} and {} save to the same file'.format(
+                    names[stem],
+                    name,
+                ))
+            names[stem] = name
+            segmentation = None
+            if segmentations is not None:
+                segmentation = _find_label(segmentations, stem)
+            items.append(SessionItem(
+                os.path.join(images, name),
+                segmentation,
+                os.path.join(outputs, stem + OUTPUT_EXTENSION),
+            ))
+        return cls(items)
+
+    @classmethod
+    def from_manifest(cls, path: str) -> 'Session':
+        """
+        Create a session from a manifest of images.
+
+        Args:
+            path: the path of a .csv file with an image column and optional
+                  segmentation and output columns. relative paths are
+                  relative to the manifest and a missing output is the a
+                  priori segmentation
+
+        Returns:
+            a session of the images in the manifest in order
+
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        def resolve(value):
+            if not value:
+                return None
+            return os.path.join(directory, value)
+        items = []
+        with open(path, newline='') as manifest_file:
+            for row in csv.DictReader(manifest_file):
+                image = resolve(row['image'])
+                segmentation = resolve(row.get('segmentation'))
+                output = resolve(row.get('output')) or segmentation
+                if output is None:
+                    raise ValueError('{} has no output file'.format(image))
+                items.append(SessionItem(image, segmentation, output))
+        return cls(items)
+
+    def load_image(self, index: int) -> np.ndarray:
+        """
+        Load the image of an item.
+
+        Args:
+            index: the index of the item
+
+        Returns:
+            the pixels of the image
+
+        """
+        return read_image(self.items[index].image)
+
+    def load_segmentation(self, index: int, colors: np.ndarray) -> np.ndarray:
+        """
+        Load the segmentation of an item to start labeling from.
+
+        Args:
+            index: the index of the item
+            colors: the color of each class index
+
+        Returns:
+            the map of class indexes in the output file if it was saved
+            before, otherwise the a priori segmentation (or None)
+
+        """
+        item = self.items[index]
+        if os.path.exists(item.output):
+            return load_segmentation(item.output, colors)
+        if item.segmentation is None:
+            return None
+        return load_segmentation(item.segmentation, colors)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    read_image.__name__,
+    Session.__name__,
+    SessionItem.__name__,
+]
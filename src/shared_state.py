@@ -0,0 +1,106 @@
+"""A block of integer state in shared memory with lock-free reads."""
+from multiprocessing import shared_memory
+import multiprocessing
+import numpy as np
+
+
+class SharedState(object):
+    """A block of integer state in shared memory with lock-free reads."""
+
+    def __init__(self, **fields) -> None:
+        """
+        Initialize a new block of shared state.
+
+        Args:
+            fields: the names of the integer fields and their initial values
+
+        Returns:
+            None
+
+        """
+        self.names = list(fields.keys())
+        self._index = {name: i + 1 for i, name in enumerate(self.names)}
+        # create a block of 64-bit words in shared memory. the first word is
+        # the sequence number of the seqlock, which is odd while a write is
+        # in progress, and each field follows it in its own word
+        size = 8 * (len(self.names) + 1)
+        self._memory = shared_memory.SharedMemory(create=True, size=size)
+        self._words = np.ndarray((len(self.names) + 1,), np.int64,
+            self._memory.buf,
+        )
+        self._words[0] = 0
+        self._words[1:] = list(fields.values())
+        # writes are rare, so writers serialize on a lock. readers never take
+        # it and retry instead if they overlap a write
+        self._write_lock = multiprocessing.Lock()
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}({})'.format(
+            self.__class__.__name__,
+            ', '.join('{}={}'.format(*item) for item in self.read().items()),
+        )
+
+    def __getitem__(self, name: str) -> int:
+        """
+        Return the value of a single field.
+
+        Args:
+            name: the name of the field
+
+        Returns:
+            the value of the field. each field is an aligned 64-bit word, so
+            the value is never torn, but use read for several fields that
+            must be consistent with each other
+
+        """
+        return int(self._words[self._index[name]])
+
+    def read(self) -> dict:
+        """
+        Return a consistent snapshot of all the fields without locking.
+
+        Returns:
+            a dictionary mapping the names of the fields to their values
+
+        """
+        while True:
+            sequence = self._words[0]
+            # if a write is in progress, wait for it to finish
+            if sequence % 2:
+                continue
+            values = self._words[1:].tolist()
+            # if a write started while copying the fields, retry
+            if self._words[0] == sequence:
+                return dict(zip(self.names, values))
+
+    def write(self, **values) -> None:
+        """
+        Write new values to some of the fields.
+
+        Args:
+            values: the names of the fields to write and their new values
+
+        Returns:
+            None
+
+        """
+        with self._write_lock:
+            # make the sequence odd so readers retry until the write is done
+            self._words[0] += 1
+            for name, value in values.items():
+                self._words[self._index[name]] = value
+            self._words[0] += 1
+
+    def close(self) -> None:
+        """Close the view of the shared memory in this process."""
+        self._words = None
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """Destroy the block of shared memory (from the creating process)."""
+        self._memory.unlink()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [SharedState.__name__]
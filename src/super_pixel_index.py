@@ -0,0 +1,119 @@
+"""An index of the pixels in each segment of a super pixel segmentation."""
+import numpy as np
+
+
+class SuperPixelIndex(object):
+    """An index of the pixels in each segment of a super pixel segmentation."""
+
+    def __init__(self, segments: np.ndarray) -> None:
+        """
+        Initialize a new super pixel index.
+
+        Args:
+            segments: the super pixel segmentation map of non-negative ids
+
+        Returns:
+            None
+
+        """
+        # keep a copy of the map so the index is consistent with it even if
+        # the source of the map is overwritten by a new segmentation
+        self._segments = np.array(segments, copy=True)
+        self.shape = segments.shape
+        flat = self._segments.ravel()
+        # sort the flat pixel indexes by segment id so that the pixels of each
+        # segment are contiguous, i.e., a CSR layout of segment -> pixels
+        self._pixels = np.argsort(flat, kind='stable').astype(np.int32)
+        counts = np.bincount(flat)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        # find the bounding rectangle of each non-empty segment
+        rows, columns = np.divmod(self._pixels, self.shape[1])
+        starts = self._offsets[:-1][counts > 0]
+        self._rects = np.zeros((len(counts), 4), dtype=np.int32)
+        self._rects[counts > 0, 0] = np.minimum.reduceat(rows, starts)
+        self._rects[counts > 0, 1] = np.minimum.reduceat(columns, starts)
+        self._rects[counts > 0, 2] = np.maximum.reduceat(rows, starts) + 1
+        self._rects[counts > 0, 3] = np.maximum.reduceat(columns, starts) + 1
+        # setup the value that each segment was last filled with (-1 if the
+        # segment may have changed since it was last filled)
+        self._filled = np.full(len(counts), -1, dtype=np.int16)
+
+    def __repr__(self) -> str:
+        """Return an executable string representing this object."""
+        return '{}(shape={}, segments={})'.format(
+            self.__class__.__name__,
+            self.shape,
+            len(self._filled),
+        )
+
+    def segment_at(self, row: int, column: int) -> int:
+        """
+        Return the id of the segment at a pixel.
+
+        Args:
+            row: the row of the pixel
+            column: the column of the pixel
+
+        Returns:
+            the id of the segment or None if the pixel is outside of the map
+
+        """
+        if not (0 <= row < self.shape[0] and 0 <= column < self.shape[1]):
+            return None
+        return int(self._segments[row, column])
+
+    def pixels(self, segment: int) -> np.ndarray:
+        """
+        Return the flat indexes of the pixels in a segment.
+
+        Args:
+            segment: the id of the segment
+
+        Returns:
+            a vector of indexes into the flattened segmentation map
+
+        """
+        return self._pixels[self._offsets[segment]:self._offsets[segment + 1]]
+
+    def rect(self, segment: int) -> tuple:
+        """
+        Return the bounding rectangle of a segment.
+
+        Args:
+            segment: the id of the segment
+
+        Returns:
+            the (top, left, bottom, right) rectangle around the segment
+
+        """
+        return tuple(int(edge) for edge in self._rects[segment])
+
+    def fill(self, image: np.ndarray, segment: int, value: int) -> tuple:
+        """
+        Fill the pixels of a segment in an image with a value.
+
+        Args:
+            image: the image with the same height and width as the map
+            segment: the id of the segment to fill
+            value: the value to fill the segment with
+
+        Returns:
+            the (top, left, bottom, right) rectangle that was filled, or None
+            if the segment was already filled with the value
+
+        """
+        # skip segments that haven't changed since they were last filled
+        if self._filled[segment] == value:
+            return None
+        np.put(image, self.pixels(segment), value)
+        self._filled[segment] = value
+
+        return self.rect(segment)
+
+    def invalidate(self) -> None:
+        """Signal that the pixels of any segment may have been changed."""
+        self._filled[:] = -1
+
+
+# explicitly define the outward facing API of this module
+__all__ = [SuperPixelIndex.__name__]
@@ -0,0 +1,49 @@
+"""Test cases for the brush module."""
+from unittest import TestCase
+import numpy as np
+from ..brush import paint_capsule, paint_circle
+from ..graphics.cursor import make_circle
+
+
+class ShouldPaintCircleInsideImage(TestCase):
+    def test(self):
+        image = np.zeros((9, 9), dtype=np.uint8)
+        rect = paint_circle(image, 4, 4, 3, 7)
+        self.assertEqual((1, 1, 8, 8), rect)
+        expected = 7 * np.pad(make_circle(3), 1)
+        self.assertTrue(np.array_equal(expected, image))
+
+
+class ShouldPaintCircleClippedByImage(TestCase):
+    def test(self):
+        image = np.zeros((4, 4), dtype=np.uint8)
+        rect = paint_circle(image, 0, 0, 3, 1)
+        self.assertEqual((0, 0, 4, 4), rect)
+        expected = make_circle(3)[3:, 3:]
+        self.assertTrue(np.array_equal(expected, image))
+
+
+class ShouldNotPaintCircleOutsideImage(TestCase):
+    def test(self):
+        image = np.zeros((4, 4), dtype=np.uint8)
+        self.assertIsNone(paint_circle(image, -10, 2, 3, 1))
+        self.assertFalse(image.any())
+
+
+class ShouldPaintCapsuleWithEqualEndsAsCircle(TestCase):
+    def test(self):
+        circle = np.zeros((20, 20), dtype=np.uint8)
+        capsule = np.zeros((20, 20), dtype=np.uint8)
+        paint_circle(circle, 3, 15, 6, 1)
+        rect = paint_capsule(capsule, (3, 15), (3, 15), 6, 1)
+        self.assertEqual((0, 9, 10, 20), rect)
+        self.assertTrue(np.array_equal(circle, capsule))
+
+
+class ShouldPaintCapsuleWithoutGaps(TestCase):
+    def test(self):
+        image = np.zeros((5, 30), dtype=np.uint8)
+        rect = paint_capsule(image, (2, 3), (2, 26), 1, 1)
+        self.assertEqual((1, 2, 4, 28), rect)
+        self.assertTrue(np.all(image[2, 3:27] == 1))
+        self.assertEqual(24, image.sum())
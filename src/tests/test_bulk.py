@@ -0,0 +1,35 @@
+"""Test cases for the bulk module."""
+import os
+import tempfile
+from unittest import TestCase
+from ..bulk import find_files, map_unordered
+
+
+def _square(value: int) -> int:
+    """Return the square of a value."""
+    return value * value
+
+
+class ShouldFindLabelFiles(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ['b.png', 'a.npz', 'c.txt', 'd.PNG']:
+                open(os.path.join(directory, name), 'w').close()
+            extra = os.path.join(directory, 'c.txt')
+            actual = [os.path.basename(path)
+                for path in find_files([directory, extra])
+            ]
+        self.assertEqual(['a.npz', 'b.png', 'd.PNG', 'c.txt'], actual)
+
+
+class ShouldMapInProcess(TestCase):
+    def test(self):
+        actual = list(map_unordered(_square, range(5), workers=1))
+        self.assertEqual([0, 1, 4, 9, 16], actual)
+
+
+class ShouldMapOnPool(TestCase):
+    def test(self):
+        # more items than the window of tasks in flight
+        actual = map_unordered(_square, iter(range(50)), workers=2)
+        self.assertEqual([x * x for x in range(50)], sorted(actual))
@@ -0,0 +1,80 @@
+"""Test cases for the convert module."""
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from PIL import Image
+from ..convert import convert, main, to_index
+from ..label_file import load_segmentation
+from ..label_map import make_colors, make_lookup
+
+
+COLORS = make_colors([(0, 0, 0), (128, 64, 128), (244, 35, 232)])
+METADATA = ',label,rgb\n0,a,"(0, 0, 0)"\n1,b,"(128, 64, 128)"\n' \
+    '2,c,"(244, 35, 232)"\n'
+
+
+def _write_labels(directory: str) -> np.ndarray:
+    """Write RGB label files and return their class indexes."""
+    segmentation = np.array([[0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+    for name in ['a.png', 'b.png']:
+        Image.fromarray(COLORS[segmentation]).save(
+            os.path.join(directory, name)
+        )
+    return segmentation
+
+
+class ShouldConvertRGBWithLookup(TestCase):
+    def test(self):
+        rgb = np.array([[[244, 35, 232], [0, 0, 0], [1, 1, 0]]], np.uint8)
+        index, unknown = to_index(rgb, COLORS, make_lookup(COLORS))
+        self.assertTrue(np.array_equal([[2, 0, 0]], index))
+        self.assertEqual({0x010100: 1}, unknown)
+
+
+class ShouldConvertDirectory(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            labels = os.path.join(directory, 'labels')
+            os.mkdir(labels)
+            segmentation = _write_labels(labels)
+            outputs = os.path.join(directory, 'outputs')
+            for workers in [1, 2]:
+                results = list(convert([labels], COLORS,
+                    output_dir=outputs,
+                    file_format='npz',
+                    workers=workers,
+                ))
+                self.assertEqual(2, len(results))
+                for result in results:
+                    self.assertIsNone(result.error)
+                    self.assertEqual({}, result.unknown)
+                    actual = load_segmentation(result.output, COLORS)
+                    self.assertTrue(np.array_equal(segmentation, actual))
+            self.assertEqual(['a.npz', 'b.npz'], sorted(os.listdir(outputs)))
+
+
+class ShouldReportUnknownColorsAndErrors(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            metadata = os.path.join(directory, 'metadata.csv')
+            with open(metadata, 'w') as metadata_file:
+                metadata_file.write(METADATA)
+            labels = os.path.join(directory, 'labels')
+            os.mkdir(labels)
+            _write_labels(labels)
+            self.assertEqual(0, main([labels, '-m', metadata, '-w', '1']))
+            # an unknown color fails a strict conversion
+            rgb = np.full((2, 3, 3), 7, dtype=np.uint8)
+            Image.fromarray(rgb).save(os.path.join(labels, 'c.png'))
+            arguments = [labels, '-m', metadata, '-w', '1']
+            self.assertEqual(0, main(arguments))
+            outputs = os.path.join(directory, 'outputs')
+            arguments += ['-o', outputs, '--strict']
+            self.assertEqual(1, main(arguments))
+            self.assertEqual(['a.png', 'b.png'], sorted(os.listdir(outputs)))
+            # a file that isn't an image fails any conversion
+            os.remove(os.path.join(labels, 'c.png'))
+            with open(os.path.join(labels, 'd.png'), 'w') as label_file:
+                label_file.write('not an image')
+            self.assertEqual(1, main([labels, '-m', metadata, '-w', '1']))
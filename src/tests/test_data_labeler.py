@@ -0,0 +1,129 @@
+"""Test cases for the data_labeler module."""
+from contextlib import redirect_stderr, redirect_stdout
+from copy import deepcopy
+import io
+from multiprocessing import Process
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from .. import data_labeler
+from ..data_labeler import DataLabeler
+from ..graphics.palette import Palette
+from ..journal import Journal
+from ..metadata import Metadata
+
+
+# the path of the dummy metadata of the repository
+METADATA = os.path.join(os.path.dirname(__file__), '..', '..', 'dummy',
+    'metadata.csv',
+)
+
+
+class _View(object):
+    """A stand-in for the window of the labeler that needs no display."""
+
+    zoom_level = 1.0
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize a new view that ignores its arguments."""
+
+    def __getattr__(self, name: str):
+        """Return a method that does nothing for any other attribute."""
+        return lambda *args, **kwargs: None
+
+
+class LabelerTestCase(TestCase):
+    """A test case that creates labelers without a window."""
+
+    def setUp(self):
+        self._image_view = data_labeler.ImageView
+        data_labeler.ImageView = _View
+        self.directory = tempfile.TemporaryDirectory()
+        self.metadata = Metadata.read_csv(METADATA)
+        self.labelers = []
+
+    def tearDown(self):
+        for labeler in self.labelers:
+            if labeler._journal is not None:
+                labeler._journal.close()
+            for shared in (labeler._state, labeler._super_pixels):
+                shared.close()
+                shared.unlink()
+        self.directory.cleanup()
+        data_labeler.ImageView = self._image_view
+
+    def make_labeler(self, image, **kwargs):
+        """Return a new labeler of an image that saves to the directory."""
+        output = os.path.join(self.directory.name, 'label.png')
+        labeler = DataLabeler(image, self.metadata, output, **kwargs)
+        self.labelers.append(labeler)
+        return labeler
+
+
+class ShouldFillSuperPixelsFromPaletteProcess(LabelerTestCase):
+    def test(self):
+        image = np.zeros((64, 64, 3), dtype=np.uint8)
+        image[16:48, 16:48] = 255
+        labeler = self.make_labeler(image, preview_scale=None)
+        palette_data = deepcopy(Palette.DEFAULTS)
+        palette_data['paint'] = 'super_pixel'
+        palette_data['label'] = self.metadata['label'][1]
+        # segment the super pixels in a child process like the palette
+        def run():
+            labeler._on_palette_change(palette_data)
+            labeler._super_pixel_worker.wait()
+        process = Process(target=run)
+        process.start()
+        process.join()
+        self.assertEqual(0, process.exitcode)
+        # index the published super pixels in the background of this process
+        # like a poll of the window does
+        generation = labeler._super_pixels.generation
+        labeler._super_pixel_index_worker.submit(generation)
+        labeler._super_pixel_index_worker.wait()
+        self.assertEqual(generation, labeler._indexed_super_pixels[0])
+        # fill the super pixel at the center of the square from this process
+        labeler._on_mouse_press(32, 32)
+        labeler._on_mouse_release()
+        segments = labeler._super_pixels.front['segments']
+        expected = segments == segments[32, 32]
+        self.assertTrue(expected.any())
+        self.assertTrue(np.array_equal(expected, labeler._segmentation == 1))
+
+
+class ShouldNotPrefetchWithoutSession(LabelerTestCase):
+    def test(self):
+        labeler = self.make_labeler(np.zeros((8, 8, 3), dtype=np.uint8))
+        labeler._sync_item()
+        self.assertEqual(0, labeler._palette_item)
+        self.assertFalse(labeler._super_pixel_prefetcher._futures)
+
+
+class ShouldStartFreshJournalOverCorruptJournal(LabelerTestCase):
+    def test(self):
+        journal_path = os.path.join(self.directory.name, 'label.png.journal')
+        with open(journal_path, 'wb') as journal_file:
+            journal_file.write(b'not a journal')
+        segmentation = np.ones((8, 8), dtype=np.uint8)
+        with redirect_stderr(io.StringIO()), redirect_stdout(io.StringIO()):
+            labeler = self.make_labeler(np.zeros((8, 8, 3), dtype=np.uint8),
+                segmentation=segmentation,
+            )
+        self.assertTrue(np.array_equal(segmentation, labeler._segmentation))
+        self.assertEqual(0, labeler._journal.size)
+        with open(journal_path + '.bad', 'rb') as journal_file:
+            self.assertEqual(b'not a journal', journal_file.read())
+
+
+class ShouldStartFreshJournalOverJournalOfOtherImage(LabelerTestCase):
+    def test(self):
+        journal_path = os.path.join(self.directory.name, 'label.png.journal')
+        journal = Journal(journal_path, (4, 4))
+        journal.circle(1, 1, 1, 2)
+        journal.close()
+        with redirect_stderr(io.StringIO()), redirect_stdout(io.StringIO()):
+            labeler = self.make_labeler(np.zeros((8, 8, 3), dtype=np.uint8))
+        self.assertFalse(labeler._segmentation.any())
+        self.assertEqual((8, 8), labeler._journal.shape)
+        self.assertTrue(os.path.exists(journal_path + '.bad'))
@@ -0,0 +1,95 @@
+"""Test cases for the dataset_stats module."""
+import csv
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from unittest import TestCase
+import numpy as np
+from PIL import Image
+from ..dataset_stats import collect, count_classes, main, Statistics
+from ..label_map import make_colors
+
+
+COLORS = make_colors([(0, 0, 0), (128, 64, 128), (244, 35, 232)])
+METADATA = 'label,rgb\na,"(0, 0, 0)"\nb,"(128, 64, 128)"\n' \
+    'c,"(244, 35, 232)"\n'
+
+
+class ShouldCountClasses(TestCase):
+    def test(self):
+        segmentation = np.array([[0, 0, 1], [2, 2, 1]], dtype=np.uint8)
+        pixels, adjacency = count_classes(segmentation, 4)
+        self.assertEqual([2, 2, 2, 0], pixels.tolist())
+        expected = np.zeros((4, 4), dtype=np.int64)
+        # 0-1 and 2-1 side by side, 0-2 twice and 1-1 above one another
+        expected[0, 1] = 1
+        expected[1, 2] = 1
+        expected[0, 2] = 2
+        self.assertTrue(np.array_equal(expected, adjacency))
+
+
+class ShouldCollectAndMergeStatistics(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            index = np.array([[0, 1], [1, 1]], dtype=np.uint8)
+            Image.fromarray(COLORS[index]).save(
+                os.path.join(directory, 'a.png')
+            )
+            # an unknown color counts as the last class
+            rgb = np.full((2, 2, 3), 7, dtype=np.uint8)
+            rgb[0, 0] = COLORS[2]
+            Image.fromarray(rgb).save(os.path.join(directory, 'b.png'))
+            statistics = Statistics(['a', 'b', 'c'])
+            for workers in [1, 2]:
+                for _, record, is_cached in collect([directory], COLORS,
+                    workers=workers,
+                ):
+                    self.assertIsNone(record.error)
+                    self.assertFalse(is_cached)
+                    statistics.add(record)
+        self.assertEqual(4, statistics.files)
+        self.assertEqual([2, 6, 2, 6], statistics.pixels.tolist())
+        self.assertEqual([2, 2, 2, 2], statistics.images.tolist())
+        self.assertEqual(4, statistics.adjacency[0, 1])
+        self.assertEqual(4, statistics.adjacency[3, 2])
+        self.assertTrue(np.array_equal(
+            statistics.adjacency,
+            statistics.adjacency.T,
+        ))
+
+
+class ShouldOnlyReadChangedFilesIncrementally(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            metadata = os.path.join(directory, 'metadata.csv')
+            with open(metadata, 'w') as metadata_file:
+                metadata_file.write(METADATA)
+            labels = os.path.join(directory, 'labels')
+            os.mkdir(labels)
+            for name, value in [('a.png', 0), ('b.png', 1), ('c.png', 2)]:
+                Image.fromarray(np.full((2, 3), value, dtype=np.uint8)).save(
+                    os.path.join(labels, name)
+                )
+            outputs = os.path.join(directory, 'outputs')
+            arguments = [labels, '-m', metadata, '-o', outputs, '-w', '1']
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(0, main(arguments + ['-I']))
+                # replace one file and remove another
+                Image.fromarray(np.full((2, 3), 2, dtype=np.uint8)).save(
+                    os.path.join(labels, 'a.png')
+                )
+                os.utime(os.path.join(labels, 'a.png'), ns=(0, 0))
+                os.remove(os.path.join(labels, 'b.png'))
+                self.assertEqual(0, main(arguments + ['-I']))
+            lines = output.getvalue().splitlines()
+            self.assertEqual('3 files, 3 read, 0 failed', lines[0])
+            self.assertEqual('2 files, 1 read, 0 failed', lines[1])
+            with open(os.path.join(outputs, 'statistics.json')) as stats:
+                self.assertEqual([0, 0, 12, 0], json.load(stats)['pixels'])
+            with open(os.path.join(outputs, 'images.csv')) as images:
+                rows = list(csv.reader(images))
+            self.assertEqual(['path', 'a', 'b', 'c', '(unknown)'], rows[0])
+            self.assertEqual(3, len(rows))
@@ -0,0 +1,63 @@
+"""Test cases for the double_buffer module."""
+from unittest import TestCase
+import multiprocessing
+import numpy as np
+from ..double_buffer import DoubleBuffer
+
+
+FIELDS = {'a': ((3, 5), np.int32), 'b': ((7,), np.uint8)}
+
+
+class ShouldStartWithEmptyFrontBuffer(TestCase):
+    def test(self):
+        buffer = DoubleBuffer(FIELDS)
+        self.assertEqual(0, buffer.generation)
+        self.assertEqual((3, 5), buffer.front['a'].shape)
+        self.assertFalse(buffer.front['a'].any())
+        self.assertFalse(buffer.front['b'].any())
+        buffer.close()
+        buffer.unlink()
+
+
+class ShouldFlipBackBufferToFront(TestCase):
+    def test(self):
+        buffer = DoubleBuffer(FIELDS)
+        buffer.back['a'][:] = 4
+        self.assertFalse(buffer.front['a'].any())
+        buffer.flip()
+        self.assertEqual(1, buffer.generation)
+        self.assertTrue(np.all(buffer.front['a'] == 4))
+        generation, total = buffer.read(lambda front: front['a'].sum())
+        self.assertEqual((1, 60), (generation, total))
+        buffer.close()
+        buffer.unlink()
+
+
+class ShouldSupportScalarFields(TestCase):
+    def test(self):
+        buffer = DoubleBuffer({'item': ((), np.int64)})
+        self.assertEqual(0, buffer.front['item'])
+        buffer.back['item'][...] = 3
+        buffer.flip()
+        self.assertEqual(3, buffer.front['item'])
+        buffer.close()
+        buffer.unlink()
+
+
+def write(buffer):
+    """Write a generation to a buffer in another process."""
+    buffer.back['b'][:] = 9
+    buffer.flip()
+
+
+class ShouldShareBufferWithForkedProcess(TestCase):
+    def test(self):
+        buffer = DoubleBuffer(FIELDS)
+        context = multiprocessing.get_context('fork')
+        process = context.Process(target=write, args=(buffer,))
+        process.start()
+        process.join()
+        self.assertEqual(1, buffer.generation)
+        self.assertTrue(np.all(buffer.front['b'] == 9))
+        buffer.close()
+        buffer.unlink()
@@ -0,0 +1,81 @@
+"""Test cases for the history module."""
+from unittest import TestCase
+import numpy as np
+from ..history import SNAPSHOT_TILE_SIZE, History
+
+
+def edit(history, image, rect, value):
+    """Edit a rectangle of an image with a value and record it."""
+    history.begin()
+    history.will_change(rect)
+    image[rect[0]:rect[2], rect[1]:rect[3]] = value
+    history.commit()
+
+
+class ShouldUndoAndRedoEdits(TestCase):
+    def test(self):
+        image = np.zeros((8, 8), dtype=np.uint8)
+        history = History(image)
+        edit(history, image, (1, 1, 4, 4), 3)
+        edited = image.copy()
+        edit(history, image, (2, 2, 6, 6), 5)
+        self.assertEqual((2, 2, 6, 6), history.undo())
+        self.assertTrue(np.array_equal(edited, image))
+        self.assertEqual((1, 1, 4, 4), history.undo())
+        self.assertFalse(image.any())
+        self.assertIsNone(history.undo())
+        self.assertEqual((1, 1, 4, 4), history.redo())
+        self.assertTrue(np.array_equal(edited, image))
+
+
+class ShouldShrinkEditToChangedPixels(TestCase):
+    def test(self):
+        image = np.zeros((8, 8), dtype=np.uint8)
+        history = History(image)
+        edit(history, image, (0, 0, 8, 8), 0)
+        self.assertFalse(history.can_undo)
+        history.begin()
+        history.will_change((0, 0, 8, 8))
+        image[3, 5] = 1
+        self.assertEqual((3, 5, 4, 6), history.undo())
+
+
+class ShouldClearRedoOnNewEdit(TestCase):
+    def test(self):
+        image = np.zeros((8, 8), dtype=np.uint8)
+        history = History(image)
+        edit(history, image, (1, 1, 4, 4), 3)
+        history.undo()
+        edit(history, image, (0, 0, 2, 2), 1)
+        self.assertFalse(history.can_redo)
+
+
+class ShouldDropOldestEditsOverBudget(TestCase):
+    def test(self):
+        image = np.zeros((64, 64), dtype=np.uint8)
+        history = History(image, max_bytes=1000)
+        for value in range(1, 6):
+            edit(history, image, (0, 0, 16, 16), value)
+        self.assertLessEqual(history.nbytes, 1000)
+        while history.can_undo:
+            history.undo()
+        self.assertTrue(np.all(image[:16, :16] > 0))
+
+
+class ShouldOnlySnapshotTilesOfEdit(TestCase):
+    def test(self):
+        image = np.zeros((512, 512), dtype=np.uint8)
+        history = History(image)
+        history.begin()
+        # a stroke across the corner of four tiles
+        for rect in [(60, 60, 68, 68), (62, 62, 70, 70)]:
+            history.will_change(rect)
+            image[rect[0]:rect[2], rect[1]:rect[3]] = 7
+        snapshot = sum(tile.nbytes for tile in history._snapshot.values())
+        self.assertEqual(4 * SNAPSHOT_TILE_SIZE**2, snapshot)
+        history.commit()
+        self.assertFalse(history._snapshot)
+        self.assertEqual((60, 60, 70, 70), history.undo())
+        self.assertFalse(image.any())
+        self.assertEqual((60, 60, 70, 70), history.redo())
+        self.assertEqual(2 * 8 * 8 - 6 * 6, np.count_nonzero(image))
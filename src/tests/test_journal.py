@@ -0,0 +1,134 @@
+"""Test cases for the journal module."""
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from ..brush import paint_capsule, paint_circle
+from ..journal import Journal, replay
+
+
+def _record_edits(journal: Journal, image: np.ndarray) -> None:
+    """Edit an image and record each edit in a journal."""
+    paint_circle(image, 5, 5, 3, 1)
+    journal.circle(5, 5, 3, 1)
+    paint_capsule(image, (10, 2), (12, 18), 2, 2)
+    journal.capsule((10, 2), (12, 18), 2, 2)
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[1:3, 2:] = True
+    image[14:18, 10:15][mask] = 3
+    journal.fill((14, 10, 18, 15), mask, 3)
+    pixels = np.arange(6, dtype=np.uint8).reshape(2, 3)
+    image[0:2, 17:20] = pixels
+    journal.region((0, 17, 2, 20), pixels)
+
+
+class ShouldReplayEdits(TestCase):
+    def test(self):
+        expected = np.zeros((20, 20), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png.journal')
+            journal = Journal(path, expected.shape)
+            _record_edits(journal, expected)
+            journal.close()
+            actual = np.zeros_like(expected)
+            self.assertEqual(4, replay(path, actual))
+            self.assertTrue(np.array_equal(expected, actual))
+
+
+class ShouldReplayNothingWithoutJournal(TestCase):
+    def test(self):
+        image = np.zeros((4, 4), dtype=np.uint8)
+        self.assertEqual(0, replay('/does/not/exist.journal', image))
+
+
+class ShouldBufferRecordsUntilFlush(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png.journal')
+            journal = Journal(path, (20, 20), flush_interval=3600)
+            size = os.path.getsize(path)
+            journal.circle(5, 5, 3, 1)
+            journal.poll()
+            self.assertEqual(size, os.path.getsize(path))
+            journal.flush()
+            self.assertLess(size, os.path.getsize(path))
+            journal.close()
+
+
+class ShouldIgnoreTornRecord(TestCase):
+    def test(self):
+        image = np.zeros((20, 20), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png.journal')
+            journal = Journal(path, image.shape)
+            journal.circle(5, 5, 3, 1)
+            journal.circle(15, 15, 3, 2)
+            journal.close()
+            # cut the last record short as if a crash interrupted the write
+            with open(path, 'r+b') as journal_file:
+                journal_file.truncate(os.path.getsize(path) - 2)
+            self.assertEqual(1, replay(path, image.copy()))
+            # reopening drops the torn record and appends after the last one
+            journal = Journal(path, image.shape)
+            journal.circle(1, 1, 1, 3)
+            journal.close()
+            self.assertEqual(2, replay(path, image.copy()))
+
+
+class ShouldRaiseErrorOnShapeMismatch(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png.journal')
+            Journal(path, (20, 20)).close()
+            image = np.zeros((10, 20), dtype=np.uint8)
+            self.assertRaises(ValueError, replay, path, image)
+            self.assertRaises(ValueError, Journal, path, image.shape)
+
+
+class ShouldCompactJournal(TestCase):
+    def test(self):
+        expected = np.zeros((20, 20), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png.journal')
+            journal = Journal(path, expected.shape)
+            _record_edits(journal, expected)
+            # checkpoint after the first edits and keep editing
+            checkpoint = expected.copy()
+            offset = journal.offset
+            paint_circle(expected, 15, 3, 2, 4)
+            journal.circle(15, 3, 2, 4)
+            journal.compact(offset)
+            self.assertEqual(journal.offset - offset, journal.size)
+            journal.close()
+            self.assertEqual(1, replay(path, checkpoint))
+            self.assertTrue(np.array_equal(expected, checkpoint))
+
+
+class _EditingJournal(Journal):
+    """A journal that records an edit while it's being compacted."""
+
+    def _swap(self, journal_file, temp_file, temp_path, offset):
+        if not hasattr(self, 'edited'):
+            self.edited = True
+            self.circle(3, 15, 2, 5)
+            self.flush()
+        return super()._swap(journal_file, temp_file, temp_path, offset)
+
+
+class ShouldKeepEditsRecordedWhileCompacting(TestCase):
+    def test(self):
+        expected = np.zeros((20, 20), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png.journal')
+            journal = _EditingJournal(path, expected.shape)
+            _record_edits(journal, expected)
+            checkpoint = expected.copy()
+            offset = journal.offset
+            paint_circle(expected, 15, 3, 2, 4)
+            journal.circle(15, 3, 2, 4)
+            paint_circle(expected, 3, 15, 2, 5)
+            journal.compact(offset)
+            self.assertEqual(journal.offset - offset, journal.size)
+            journal.close()
+            self.assertEqual(2, replay(path, checkpoint))
+            self.assertTrue(np.array_equal(expected, checkpoint))
@@ -0,0 +1,144 @@
+"""Test cases for the label_file module."""
+import os
+import stat
+import tempfile
+from unittest import TestCase
+import numpy as np
+from PIL import Image
+from ..file_mode import FILE_MODE
+from ..label_file import load_segmentation, save_segmentation
+from ..label_map import make_colors
+
+
+COLORS = make_colors([(0, 0, 0), (128, 64, 128), (244, 35, 232)])
+
+
+class ShouldSaveSegmentationAsRGB(TestCase):
+    def test(self):
+        segmentation = np.array([[0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png')
+            save_segmentation(path, segmentation, COLORS, compress_level=1)
+            with Image.open(path) as image_file:
+                actual = np.array(image_file)
+            self.assertTrue(np.array_equal(COLORS[segmentation], actual))
+            # the temporary file should be moved into place
+            self.assertEqual(['label.png'], os.listdir(directory))
+
+
+class ShouldReplaceExistingSegmentation(TestCase):
+    def test(self):
+        segmentation = np.ones((4, 4), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png')
+            save_segmentation(path, 0 * segmentation, COLORS)
+            save_segmentation(path, segmentation, COLORS, compress_level=9)
+            with Image.open(path) as image_file:
+                actual = np.array(image_file)
+            self.assertTrue(np.array_equal(COLORS[segmentation], actual))
+
+
+class ShouldRemoveTemporaryFileOnError(TestCase):
+    def test(self):
+        segmentation = np.ones((4, 4), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png')
+            # a directory can't be replaced by a file
+            os.mkdir(path)
+            with self.assertRaises(OSError):
+                save_segmentation(path, segmentation, COLORS)
+            self.assertEqual(['label.png'], os.listdir(directory))
+
+
+class ShouldLoadSegmentation(TestCase):
+    def test(self):
+        segmentation = np.array([[0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png')
+            save_segmentation(path, segmentation, COLORS)
+            actual = load_segmentation(path, COLORS)
+            self.assertTrue(np.array_equal(segmentation, actual))
+
+
+class ShouldRoundTripEachFormat(TestCase):
+    def test(self):
+        segmentation = np.array([[0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            for name, file_format in [
+                ('rgb.png', 'rgb'),
+                ('palette.png', 'palette'),
+                ('index.png', 'index'),
+                ('label.npy', 'rgb'),
+                ('label.npz', 'rgb'),
+            ]:
+                path = os.path.join(directory, name)
+                save_segmentation(path, segmentation, COLORS,
+                    file_format=file_format,
+                )
+                actual = load_segmentation(path, COLORS)
+                self.assertEqual(np.uint8, actual.dtype)
+                self.assertTrue(np.array_equal(segmentation, actual))
+
+
+class ShouldEmbedColorsInPalette(TestCase):
+    def test(self):
+        segmentation = np.array([[0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png')
+            save_segmentation(path, segmentation, COLORS,
+                file_format='palette',
+            )
+            with Image.open(path) as image_file:
+                self.assertEqual('P', image_file.mode)
+                self.assertTrue(np.array_equal(segmentation, image_file))
+                actual = np.array(image_file.convert('RGB'))
+            self.assertTrue(np.array_equal(COLORS[segmentation], actual))
+
+
+class ShouldLoadPaletteWithOtherColorsAsRGB(TestCase):
+    def test(self):
+        segmentation = np.array([[0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png')
+            # the palette lists the label colors in reverse order
+            save_segmentation(path, segmentation, COLORS[::-1],
+                file_format='palette',
+            )
+            actual = load_segmentation(path, COLORS)
+            self.assertTrue(np.array_equal(2 - segmentation, actual))
+
+
+class ShouldRaiseErrorOnInvalidIndexes(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.npy')
+            np.save(path, np.full((2, 3), 3, dtype=np.uint8))
+            self.assertRaises(ValueError, load_segmentation, path, COLORS)
+            np.save(path, np.zeros((2, 3, 3), dtype=np.uint8))
+            self.assertRaises(ValueError, load_segmentation, path, COLORS)
+
+
+class ShouldRaiseErrorOnInvalidFormat(TestCase):
+    def test(self):
+        segmentation = np.zeros((2, 3), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png')
+            self.assertRaises(ValueError, save_segmentation, path,
+                segmentation,
+                COLORS,
+                file_format='jpeg',
+            )
+            self.assertEqual([], os.listdir(directory))
+
+
+class ShouldSaveWithPermissionsOfRegularFiles(TestCase):
+    def test(self):
+        segmentation = np.zeros((2, 3), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'label.png')
+            save_segmentation(path, segmentation, COLORS)
+            self.assertEqual(FILE_MODE, stat.S_IMODE(os.stat(path).st_mode))
+            # replacing a file keeps its permissions
+            os.chmod(path, 0o640)
+            save_segmentation(path, segmentation, COLORS)
+            self.assertEqual(0o640, stat.S_IMODE(os.stat(path).st_mode))
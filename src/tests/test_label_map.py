@@ -0,0 +1,52 @@
+"""Test cases for the label_map module."""
+from unittest import TestCase
+import numpy as np
+from ..label_map import make_colors, rgb_to_index, index_to_rgb, pack_rgb
+from ..label_map import make_lookup
+
+
+COLORS = make_colors([(0, 0, 0), (128, 64, 128), (244, 35, 232)])
+
+
+class ShouldPackRGBColors(TestCase):
+    def test(self):
+        packed = pack_rgb(np.array([[1, 2, 3], [255, 255, 255]]))
+        self.assertEqual([0x010203, 0xFFFFFF], packed.tolist())
+
+
+class ShouldRaiseErrorOnTooManyLabels(TestCase):
+    def test(self):
+        self.assertRaises(ValueError, make_colors, 257 * [(0, 0, 0)])
+
+
+class ShouldConvertRGBToIndex(TestCase):
+    def test(self):
+        index = np.array([[0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+        rgb = COLORS[index]
+        actual = rgb_to_index(rgb, COLORS)
+        self.assertEqual(np.uint8, actual.dtype)
+        self.assertTrue(np.array_equal(index, actual))
+
+
+class ShouldConvertUnknownRGBToNearestIndex(TestCase):
+    def test(self):
+        rgb = np.array([[[243, 35, 232], [1, 1, 0], [127, 64, 129]]])
+        actual = rgb_to_index(rgb, COLORS)
+        self.assertTrue(np.array_equal([[2, 0, 1]], actual))
+
+
+class ShouldConvertIndexToRGB(TestCase):
+    def test(self):
+        index = np.array([[1, 2]], dtype=np.uint8)
+        rgb = index_to_rgb(index, COLORS)
+        expected = [[[128, 64, 128], [244, 35, 232]]]
+        self.assertTrue(np.array_equal(expected, rgb))
+
+
+class ShouldLookUpPackedColors(TestCase):
+    def test(self):
+        lookup = make_lookup(COLORS)
+        rgb = np.array([[[244, 35, 232], [0, 0, 0], [1, 1, 0]]])
+        actual = lookup[pack_rgb(rgb)]
+        self.assertEqual(np.uint8, actual.dtype)
+        self.assertTrue(np.array_equal([[2, 0, len(COLORS)]], actual))
@@ -0,0 +1,32 @@
+"""Test cases for the modules that are imported at startup."""
+import subprocess
+import sys
+from unittest import TestCase
+
+
+# the modules that should only be imported when they're first used
+HEAVY_MODULES = [
+    'appJar',
+    'pandas',
+    'skimage.color',
+    'skimage.segmentation',
+    'skimage.transform',
+]
+
+
+class ShouldNotImportHeavyModulesAtStartup(TestCase):
+    def test(self):
+        # import the modules in a new interpreter, the test process may have
+        # imported the heavy modules already
+        statement = '; '.join([
+            'import sys',
+            'import src.graphics.palette, src.metadata, src.preview',
+            'import src.segment, src.segment_cache, src.session',
+            'print(" ".join(m for m in {} if m in sys.modules))'.format(
+                HEAVY_MODULES
+            ),
+        ])
+        output = subprocess.check_output([sys.executable, '-c', statement],
+            universal_newlines=True,
+        )
+        self.assertEqual('', output.strip())
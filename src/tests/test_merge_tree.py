@@ -0,0 +1,37 @@
+"""Test cases for the merge_tree module."""
+from unittest import TestCase
+import numpy as np
+from ..merge_tree import MergeTree
+
+
+# four quadrants where the left quadrants are nearly the same color
+SEGMENTS = np.array([
+    [0, 0, 1, 1],
+    [0, 0, 1, 1],
+    [2, 2, 3, 3],
+    [2, 2, 3, 3],
+])
+COLORS = np.array([[0, 0, 0], [200, 0, 0], [10, 0, 0], [0, 0, 200]])
+IMAGE = COLORS[SEGMENTS]
+
+
+class ShouldKeepFineSegmentationAtZero(TestCase):
+    def test(self):
+        tree = MergeTree(IMAGE, SEGMENTS)
+        self.assertEqual(3, tree.num_merges)
+        self.assertTrue(np.array_equal(SEGMENTS, tree.cut(0)))
+
+
+class ShouldMergeClosestColorsFirst(TestCase):
+    def test(self):
+        tree = MergeTree(IMAGE, SEGMENTS)
+        lookup = tree.lookup(1)
+        self.assertEqual(lookup[0], lookup[2])
+        self.assertEqual(3, len(np.unique(lookup)))
+
+
+class ShouldMergeEverythingAtOne(TestCase):
+    def test(self):
+        tree = MergeTree(IMAGE, SEGMENTS)
+        self.assertTrue(np.all(tree.cut(1) == 0))
+        self.assertRaises(ValueError, tree.cut, 2)
@@ -0,0 +1,45 @@
+"""Test cases for the metadata module."""
+import os
+import tempfile
+from unittest import TestCase
+from ..metadata import Metadata
+
+
+class ShouldReadMetadataFromCSV(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metadata.csv')
+            with open(path, 'w') as metadata_file:
+                metadata_file.write(',label,rgb\n')
+                metadata_file.write('0,Void,"(0, 0, 0)"\n')
+                metadata_file.write('1,Road,"(128, 64, 128)"\n')
+            metadata = Metadata.read_csv(path)
+        self.assertEqual(2, len(metadata))
+        self.assertEqual(['Void', 'Road'], metadata['label'])
+        self.assertEqual([(0, 0, 0), (128, 64, 128)], metadata['rgb'])
+
+
+class ShouldRaiseErrorOnInvalidColor(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metadata.csv')
+            for rgb in ['(0, 0)', '(0, 0, 256)', 'red']:
+                with open(path, 'w') as metadata_file:
+                    metadata_file.write('label,rgb\n')
+                    metadata_file.write('Void,"{}"\n'.format(rgb))
+                self.assertRaises(ValueError, Metadata.read_csv, path)
+
+
+class ShouldRaiseErrorOnMissingColors(TestCase):
+    def test(self):
+        self.assertRaises(ValueError, Metadata, ['Void', 'Road'], [(0, 0, 0)])
+
+
+class ShouldReadDummyMetadata(TestCase):
+    def test(self):
+        path = os.path.join(os.path.dirname(__file__), '..', '..', 'dummy',
+            'metadata.csv',
+        )
+        metadata = Metadata.read_csv(path)
+        self.assertEqual('Void', metadata['label'][0])
+        self.assertEqual((128, 64, 128), metadata['rgb'][1])
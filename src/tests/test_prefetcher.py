@@ -0,0 +1,41 @@
+"""Test cases for the prefetcher module."""
+import threading
+from unittest import TestCase
+from ..prefetcher import Prefetcher
+
+
+class ShouldLoadWithoutPrefetch(TestCase):
+    def test(self):
+        prefetcher = Prefetcher(lambda key: key * 2)
+        self.assertEqual(6, prefetcher.get(3))
+
+
+class ShouldPrefetchInBackground(TestCase):
+    def test(self):
+        threads = []
+        def load(key):
+            threads.append(threading.current_thread())
+            return key * 2
+        prefetcher = Prefetcher(load)
+        prefetcher.prefetch([1, 2])
+        self.assertEqual(2, prefetcher.get(1))
+        self.assertEqual(4, prefetcher.get(2))
+        self.assertNotIn(threading.current_thread(), threads)
+
+
+class ShouldDropItemsThatArentNeeded(TestCase):
+    def test(self):
+        loaded = []
+        def load(key):
+            loaded.append(key)
+            return key
+        prefetcher = Prefetcher(load)
+        prefetcher.prefetch([1])
+        prefetcher.get(1)
+        prefetcher.prefetch([2])
+        prefetcher.prefetch([3])
+        prefetcher.get(3)
+        self.assertNotIn(2, prefetcher._futures)
+        # the item is loaded again once it's taken
+        prefetcher.get(1)
+        self.assertEqual(2, loaded.count(1))
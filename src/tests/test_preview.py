@@ -0,0 +1,35 @@
+"""Test cases for the preview module."""
+from unittest import TestCase
+import numpy as np
+from ..preview import downsample, downsample_arguments, upsample
+
+
+class ShouldDownsampleImage(TestCase):
+    def test(self):
+        image = np.full((40, 30, 3), 200, dtype=np.uint8)
+        small = downsample(image, 4)
+        self.assertEqual((10, 7, 3), small.shape)
+        self.assertEqual(np.uint8, small.dtype)
+        self.assertTrue(np.all(small == 200))
+
+
+class ShouldUpsampleByNearestNeighbor(TestCase):
+    def test(self):
+        labels = np.array([[0, 1], [2, 3]])
+        expected = np.array([
+            [0, 0, 0, 1, 1],
+            [0, 0, 0, 1, 1],
+            [2, 2, 2, 3, 3],
+            [2, 2, 2, 3, 3],
+        ])
+        self.assertTrue(np.array_equal(expected, upsample(labels, (4, 5))))
+
+
+class ShouldScaleArgumentsInPixels(TestCase):
+    def test(self):
+        kwargs = {'min_size': 50, 'sigma': 0.5, 'kernel_size': 3, 'ratio': 1}
+        actual = downsample_arguments(kwargs, 4)
+        self.assertEqual(3, actual['min_size'])
+        self.assertEqual(0.125, actual['sigma'])
+        self.assertEqual(1, actual['kernel_size'])
+        self.assertEqual(1, actual['ratio'])
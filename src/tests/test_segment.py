@@ -0,0 +1,33 @@
+"""Test cases for the segment module."""
+from unittest import TestCase
+import numpy as np
+from skimage.segmentation import quickshift
+from skimage.util import img_as_float
+from ..segment import ImageContext, segment
+
+
+IMAGE = np.random.RandomState(0).randint(0, 256, (24, 32, 3)).astype('uint8')
+
+
+class ShouldPreprocessImageOnce(TestCase):
+    def test(self):
+        context = ImageContext(IMAGE)
+        self.assertIs(context.lab, context.lab)
+        self.assertIs(context.gray, context.gray)
+        self.assertEqual((24, 32), context.gradient.shape)
+
+
+class ShouldReturnBooleanBoundaries(TestCase):
+    def test(self):
+        for algorithm in ['felzenszwalb', 'slic', 'quickshift', 'watershed']:
+            segments, boundaries = segment(ImageContext(IMAGE), algorithm)
+            self.assertEqual((24, 32), segments.shape)
+            self.assertEqual(bool, boundaries.dtype)
+            self.assertEqual((24, 32), boundaries.shape)
+
+
+class ShouldMatchQuickshiftOnRGB(TestCase):
+    def test(self):
+        expected = quickshift(img_as_float(IMAGE), kernel_size=3, max_dist=6)
+        actual, _ = segment(IMAGE, 'quickshift', kernel_size=3, max_dist=6)
+        self.assertTrue(np.array_equal(expected, actual))
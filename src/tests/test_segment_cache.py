@@ -0,0 +1,71 @@
+"""Test cases for the segment_cache module."""
+from contextlib import redirect_stderr
+import io
+import os
+from unittest import TestCase
+import tempfile
+import numpy as np
+from ..segment_cache import SegmentCache
+
+
+IMAGE = np.random.RandomState(0).randint(0, 256, (32, 32, 3)).astype('uint8')
+
+
+class ShouldNormalizeKeyArguments(TestCase):
+    def test(self):
+        key_a = SegmentCache.key('a', 'slic', {'n_segments': 10, 'sigma': 1})
+        key_b = SegmentCache.key('a', 'slic', {'sigma': 1.0, 'n_segments': 10})
+        key_c = SegmentCache.key('a', 'slic', {'sigma': 2, 'n_segments': 10})
+        self.assertEqual(key_a, key_b)
+        self.assertNotEqual(key_a, key_c)
+
+
+class ShouldReturnCachedSegmentation(TestCase):
+    def test(self):
+        cache = SegmentCache()
+        first = cache.segment(IMAGE, 'felzenszwalb', scale=10)
+        second = cache.segment(IMAGE, 'felzenszwalb', scale=10.0)
+        self.assertIs(first, second)
+
+
+class ShouldDropLeastRecentlyUsedOverBudget(TestCase):
+    def test(self):
+        value = np.zeros(10, dtype=np.uint8), np.zeros(10, dtype=np.uint8)
+        cache = SegmentCache(max_bytes=60)
+        for key in 'abc':
+            cache.put(key, tuple(array.copy() for array in value))
+        cache.get('a')
+        cache.put('d', tuple(array.copy() for array in value))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(60, cache.nbytes)
+
+
+class ShouldLoadSegmentationFromDisk(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            expected = SegmentCache(directory=directory).segment(
+                IMAGE, 'felzenszwalb', scale=10
+            )
+            cache = SegmentCache(directory=directory)
+            image_key = cache.image_key(IMAGE)
+            key = cache.key(image_key, 'felzenszwalb', {'scale': 10})
+            actual = cache.get(key)
+            self.assertTrue(np.array_equal(expected[0], actual[0]))
+            self.assertTrue(np.array_equal(expected[1], actual[1]))
+
+
+class ShouldSegmentWhenDiskStoreFails(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            class BrokenCache(SegmentCache):
+                def _path(self, key):
+                    # a file in a directory that doesn't exist
+                    return os.path.join(directory, 'missing', key + '.npz')
+            cache = BrokenCache(directory=directory)
+            with redirect_stderr(io.StringIO()):
+                actual = cache.segment(IMAGE, 'felzenszwalb', scale=10)
+            self.assertEqual(IMAGE.shape[:2], actual[0].shape)
+            # the temporary file is removed and the result stays in memory
+            self.assertEqual([], os.listdir(directory))
+            self.assertEqual(1, len(cache._cache))
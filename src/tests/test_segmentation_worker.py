@@ -0,0 +1,97 @@
+"""Test cases for the segmentation_worker module."""
+from unittest import TestCase
+import threading
+import time
+from ..segmentation_worker import SegmentationWorker
+
+
+def wait(worker):
+    """Wait for a worker to finish its work."""
+    while worker.is_busy:
+        time.sleep(0.001)
+
+
+class ShouldPublishResultOfRequest(TestCase):
+    def test(self):
+        published = []
+        worker = SegmentationWorker(lambda x: 2 * x, published.append)
+        worker.submit(3)
+        wait(worker)
+        self.assertEqual([6], published)
+
+
+class ShouldCoalesceToLatestRequest(TestCase):
+    def test(self):
+        started = threading.Event()
+        release = threading.Event()
+        worked = []
+        published = []
+        def work(request):
+            worked.append(request)
+            started.set()
+            release.wait()
+            return request
+        worker = SegmentationWorker(work, published.append)
+        worker.submit(1)
+        started.wait()
+        worker.submit(2)
+        worker.submit(3)
+        release.set()
+        wait(worker)
+        self.assertEqual([1, 3], worked)
+        self.assertEqual([3], published)
+
+
+class ShouldSurviveErrorsInWork(TestCase):
+    def test(self):
+        published = []
+        worker = SegmentationWorker(lambda x: 1 / x, published.append)
+        worker.submit(0)
+        wait(worker)
+        worker.submit(2)
+        wait(worker)
+        self.assertEqual([0.5], published)
+
+
+class ShouldPublishEachRefinedResult(TestCase):
+    def test(self):
+        published = []
+        def work(request):
+            yield request
+            yield 2 * request
+        worker = SegmentationWorker(work, published.append)
+        worker.submit(3)
+        wait(worker)
+        self.assertEqual([3, 6], published)
+
+
+class ShouldStopRefiningSupersededRequest(TestCase):
+    def test(self):
+        release = threading.Event()
+        published = []
+        def work(request):
+            yield request
+            release.wait()
+            yield 2 * request
+        worker = SegmentationWorker(work, published.append)
+        worker.submit(1)
+        while not published:
+            time.sleep(0.001)
+        worker.submit(5)
+        release.set()
+        wait(worker)
+        self.assertEqual([1, 5, 10], published)
+
+
+class ShouldWaitForWork(TestCase):
+    def test(self):
+        published = []
+        def work(request):
+            time.sleep(0.05)
+            return request
+        worker = SegmentationWorker(work, published.append)
+        worker.wait()
+        worker.submit(1)
+        worker.wait()
+        self.assertEqual([1], published)
+        self.assertFalse(worker.is_busy)
@@ -0,0 +1,118 @@
+"""Test cases for the session module."""
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from PIL import Image
+from ..label_map import make_colors
+from ..session import Session, SessionItem
+
+
+# the colors of the constant images that _write creates
+COLORS = make_colors([(0, 0, 0), (1, 1, 1), (2, 2, 2)])
+
+
+def _write(path: str, shape: tuple=(4, 6, 3), value: int=0) -> None:
+    """Write an image file with a constant value."""
+    Image.fromarray(np.full(shape, value, dtype=np.uint8)).save(path)
+
+
+class ShouldCreateSessionFromDirectory(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            images = os.path.join(directory, 'x')
+            labels = os.path.join(directory, 'y')
+            os.mkdir(images)
+            os.mkdir(labels)
+            for name in ['b.png', 'a.png']:
+                _write(os.path.join(images, name))
+            _write(os.path.join(labels, 'a.png'))
+            with open(os.path.join(images, 'notes.txt'), 'w') as notes:
+                notes.write('not an image')
+            session = Session.from_directory(images, labels)
+            self.assertEqual(2, len(session))
+            self.assertEqual(SessionItem(
+                os.path.join(images, 'a.png'),
+                os.path.join(labels, 'a.png'),
+                os.path.join(labels, 'a.png'),
+            ), session[0])
+            self.assertIsNone(session[1].segmentation)
+            self.assertRaises(ValueError, Session.from_directory, images)
+
+
+class ShouldMatchLabelsOfJPEGImagesByName(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            images = os.path.join(directory, 'x')
+            labels = os.path.join(directory, 'y')
+            outputs = os.path.join(directory, 'z')
+            for path in [images, labels, outputs]:
+                os.mkdir(path)
+            for name in ['a.jpg', 'b.jpg', 'c.jpg']:
+                _write(os.path.join(images, name))
+            _write(os.path.join(labels, 'a.png'))
+            np.save(os.path.join(labels, 'b.npy'), np.zeros((4, 6), np.uint8))
+            session = Session.from_directory(images, labels, outputs)
+            self.assertEqual(SessionItem(
+                os.path.join(images, 'a.jpg'),
+                os.path.join(labels, 'a.png'),
+                os.path.join(outputs, 'a.png'),
+            ), session[0])
+            self.assertEqual(os.path.join(labels, 'b.npy'),
+                session[1].segmentation,
+            )
+            self.assertIsNone(session[2].segmentation)
+            # labels are saved losslessly next to a priori segmentations
+            session = Session.from_directory(images, labels)
+            self.assertEqual(os.path.join(labels, 'c.png'), session[2].output)
+            # images with the same name would save to the same file
+            _write(os.path.join(images, 'a.png'))
+            self.assertRaises(ValueError, Session.from_directory,
+                images,
+                outputs=outputs,
+            )
+
+
+class ShouldCreateSessionFromManifest(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _write(os.path.join(directory, 'x.png'))
+            path = os.path.join(directory, 'manifest.csv')
+            with open(path, 'w') as manifest:
+                manifest.write('image,segmentation,output\n')
+                manifest.write('x.png,y.png,\n')
+                manifest.write('x.png,,z.png\n')
+            session = Session.from_manifest(path)
+            self.assertEqual(SessionItem(
+                os.path.join(directory, 'x.png'),
+                os.path.join(directory, 'y.png'),
+                os.path.join(directory, 'y.png'),
+            ), session[0])
+            self.assertIsNone(session[1].segmentation)
+            output = os.path.join(directory, 'z.png')
+            self.assertEqual(output, session[1].output)
+
+
+class ShouldRaiseErrorOnMismatchedImages(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _write(os.path.join(directory, 'a.png'), shape=(4, 6, 3))
+            _write(os.path.join(directory, 'b.png'), shape=(6, 4, 3))
+            self.assertRaises(ValueError, Session.from_directory,
+                directory,
+                outputs=directory,
+            )
+
+
+class ShouldLoadSavedSegmentationFirst(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, x + '.png') for x in 'xyz']
+            _write(paths[0])
+            session = Session([SessionItem(paths[0], None, paths[2])])
+            self.assertIsNone(session.load_segmentation(0, COLORS))
+            _write(paths[1], value=1)
+            session = Session([SessionItem(*paths)])
+            self.assertEqual(1, session.load_segmentation(0, COLORS).max())
+            _write(paths[2], value=2)
+            self.assertEqual(2, session.load_segmentation(0, COLORS).max())
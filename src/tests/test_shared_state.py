@@ -0,0 +1,43 @@
+"""Test cases for the shared_state module."""
+from unittest import TestCase
+import multiprocessing
+from ..shared_state import SharedState
+
+
+class ShouldReadInitialValues(TestCase):
+    def test(self):
+        state = SharedState(a=1, b=-2)
+        self.assertEqual(1, state['a'])
+        self.assertEqual({'a': 1, 'b': -2}, state.read())
+        state.close()
+        state.unlink()
+
+
+class ShouldWriteSomeFields(TestCase):
+    def test(self):
+        state = SharedState(a=1, b=2, c=3)
+        state.write(a=4, c=True)
+        self.assertEqual({'a': 4, 'b': 2, 'c': 1}, state.read())
+        state.close()
+        state.unlink()
+
+
+def write(state):
+    """Write consistent pairs of values to the state in another process."""
+    for value in range(1000):
+        state.write(a=value, b=-value)
+
+
+class ShouldReadConsistentSnapshotsDuringWrites(TestCase):
+    def test(self):
+        state = SharedState(a=0, b=0)
+        context = multiprocessing.get_context('fork')
+        process = context.Process(target=write, args=(state,))
+        process.start()
+        while process.is_alive():
+            values = state.read()
+            self.assertEqual(values['a'], -values['b'])
+        process.join()
+        self.assertEqual({'a': 999, 'b': -999}, state.read())
+        state.close()
+        state.unlink()
@@ -0,0 +1,44 @@
+"""Test cases for the super_pixel_index module."""
+from unittest import TestCase
+import numpy as np
+from ..super_pixel_index import SuperPixelIndex
+
+
+SEGMENTS = np.array([
+    [0, 0, 1, 1],
+    [0, 2, 2, 1],
+    [3, 3, 2, 1],
+], dtype=np.int32)
+
+
+class ShouldIndexPixelsOfSegment(TestCase):
+    def test(self):
+        index = SuperPixelIndex(SEGMENTS)
+        expected = np.flatnonzero(SEGMENTS == 2)
+        self.assertEqual(expected.tolist(), sorted(index.pixels(2).tolist()))
+
+
+class ShouldIndexRectOfSegment(TestCase):
+    def test(self):
+        index = SuperPixelIndex(SEGMENTS)
+        self.assertEqual((0, 2, 3, 4), index.rect(1))
+        self.assertEqual((2, 0, 3, 2), index.rect(3))
+
+
+class ShouldReturnNoSegmentOutsideMap(TestCase):
+    def test(self):
+        index = SuperPixelIndex(SEGMENTS)
+        self.assertEqual(2, index.segment_at(1, 1))
+        self.assertIsNone(index.segment_at(-1, 1))
+        self.assertIsNone(index.segment_at(1, 4))
+
+
+class ShouldFillSegmentOnce(TestCase):
+    def test(self):
+        index = SuperPixelIndex(SEGMENTS)
+        image = np.zeros(SEGMENTS.shape, dtype=np.uint8)
+        self.assertEqual((1, 1, 3, 3), index.fill(image, 2, 5))
+        self.assertTrue(np.array_equal(5 * (SEGMENTS == 2), image))
+        self.assertIsNone(index.fill(image, 2, 5))
+        index.invalidate()
+        self.assertEqual((1, 1, 3, 3), index.fill(image, 2, 5))
@@ -0,0 +1,44 @@
+"""Test cases for the tiled_segment module."""
+from unittest import TestCase
+import numpy as np
+from skimage.segmentation import felzenszwalb, find_boundaries
+from ..tiled_segment import segment_tiled, tiles
+
+
+class ShouldCoverImageWithTiles(TestCase):
+    def test(self):
+        covered = np.zeros((50, 70), dtype=int)
+        for core, window in tiles((50, 70), 32, overlap=4):
+            covered[core[0]:core[2], core[1]:core[3]] += 1
+            self.assertLessEqual(window[0], core[0])
+            self.assertGreaterEqual(window[3], core[3])
+        self.assertTrue(np.all(covered == 1))
+
+
+class ShouldMergeSegmentsAcrossSeams(TestCase):
+    def test(self):
+        image = np.zeros((64, 64, 3))
+        image[:, 40:] = 1
+        image[20:30, 5:60] = 0.5
+        kwargs = dict(scale=1, sigma=0, min_size=1)
+        expected = felzenszwalb(image, **kwargs)
+        actual = segment_tiled(image, felzenszwalb, 16,
+            overlap=8,
+            workers=1,
+            **kwargs
+        )
+        self.assertEqual((64, 64), actual.shape)
+        self.assertEqual(3, len(np.unique(actual)))
+        self.assertTrue(np.array_equal(
+            find_boundaries(expected),
+            find_boundaries(actual),
+        ))
+
+
+class ShouldSegmentDeterministicallyInParallel(TestCase):
+    def test(self):
+        image = np.random.RandomState(0).rand(96, 80, 3)
+        serial = segment_tiled(image, felzenszwalb, 32, workers=1, scale=10)
+        parallel = segment_tiled(image, felzenszwalb, 32, workers=2, scale=10)
+        self.assertTrue(np.array_equal(serial, parallel))
+        self.assertEqual(serial.max() + 1, len(np.unique(serial)))
@@ -0,0 +1,215 @@
+"""A method to segment large images in overlapping tiles on a process pool."""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+from .graphics import rectangle
+
+
+# the default number of pixels that each tile overlaps its neighbors by
+TILE_OVERLAP = 32
+# the names of arguments that count segments over the whole image. they are
+# scaled to the area of each tile so the tiled segmentation has about as
+# many segments as the whole segmentation would have
+COUNT_ARGUMENTS = ['n_segments', 'markers']
+
+
+def tiles(shape: tuple, tile_size: int, overlap: int=TILE_OVERLAP) -> list:
+    """
+    Return the tiles to segment an image in.
+
+    Args:
+        shape: the shape of the image
+        tile_size: the height and width of the core of each tile
+        overlap: the number of pixels each tile overlaps its neighbors by
+
+    Returns:
+        a list of tuples of the core rectangle of each tile and the window
+        rectangle around it with the overlap, in row-major order
+
+    """
+    if tile_size <= 0:
+        raise ValueError('tile_size must be positive')
+    if overlap < 0:
+        raise ValueError('overlap must be non-negative')
+    height, width = shape[:2]
+    grid = []
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            core = (
+                top,
+                left,
+                min(top + tile_size, height),
+                min(left + tile_size, width),
+            )
+            window = (
+                max(core[0] - overlap, 0),
+                max(core[1] - overlap, 0),
+                min(core[2] + overlap, height),
+                min(core[3] + overlap, width),
+            )
+            grid.append((core, window))
+
+    return grid
+
+
+def _segment_window(segment_image, image: np.ndarray, kwargs: dict):
+    """Segment the image in a window of a tile (in a worker process)."""
+    return segment_image(image, **kwargs)
+
+
+def _window_arguments(kwargs: dict, window: tuple, shape: tuple) -> dict:
+    """Return the arguments to segment a window with."""
+    kwargs = dict(kwargs)
+    area = (window[2] - window[0]) * (window[3] - window[1])
+    for name in COUNT_ARGUMENTS:
+        value = kwargs.get(name)
+        # scale integer counts, leaving e.g., arrays of markers as they are
+        if isinstance(value, int) and not isinstance(value, bool):
+            kwargs[name] = max(1, round(value * area / (shape[0] * shape[1])))
+    return kwargs
+
+
+def _find(parent: np.ndarray, label: int) -> int:
+    """Return the root of a label in a union-find forest."""
+    while parent[label] != label:
+        parent[label] = parent[parent[label]]
+        label = parent[label]
+    return label
+
+
+def _merge_seam(parent: np.ndarray,
+    tile_a: tuple,
+    tile_b: tuple,
+    axis: int,
+    overlap: int,
+) -> None:
+    """
+    Merge the segments of two neighboring tiles that match across a seam.
+
+    Args:
+        parent: the union-find forest over the labels of all the tiles
+        tile_a: the core, window, and labels of the top or left tile
+        tile_b: the core, window, and labels of the bottom or right tile
+        axis: the axis that the tiles neighbor each other on
+        overlap: the number of pixels each tile overlaps its neighbors by
+
+    Returns:
+        None
+
+    """
+    (core_a, window_a, labels_a), (_, window_b, labels_b) = tile_a, tile_b
+    # find the band around the seam that both windows cover
+    seam = core_a[2 + axis]
+    band = list(core_a)
+    band[axis] = max(seam - overlap // 2, window_b[axis])
+    band[2 + axis] = min(seam + overlap // 2, window_a[2 + axis])
+    if band[axis] >= band[2 + axis]:
+        return
+    # get the labels from both tiles in the band
+    def crop(labels, window):
+        rect = (
+            band[0] - window[0],
+            band[1] - window[1],
+            band[2] - window[0],
+            band[3] - window[1],
+        )
+        return labels[rectangle.to_slice(rect)].ravel()
+    a, b = crop(labels_a, window_a), crop(labels_b, window_b)
+    # count the pixels of each pair of overlapping labels
+    pairs, counts = np.unique(np.stack([a, b]), axis=1, return_counts=True)
+    # order the pairs by count, breaking ties by label, and find the best
+    # match in the other tile for each label
+    order = np.lexsort((pairs[1], pairs[0], -counts))
+    pairs = pairs[:, order]
+    best_a = np.unique(pairs[0], return_index=True)[1]
+    best_b = np.unique(pairs[1], return_index=True)[1]
+    # merge the labels that are each other's best match
+    for index in np.intersect1d(best_a, best_b):
+        root_a = _find(parent, pairs[0, index])
+        root_b = _find(parent, pairs[1, index])
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def segment_tiled(image: np.ndarray, segment_image,
+    tile_size: int,
+    overlap: int=TILE_OVERLAP,
+    workers: int=None,
+    **kwargs
+) -> np.ndarray:
+    """
+    Segment an image in overlapping tiles on a pool of processes.
+
+    Args:
+        image: the image to segment
+        segment_image: the segmentation algorithm to apply to each tile
+        tile_size: the height and width of the core of each tile
+        overlap: the number of pixels each tile overlaps its neighbors by
+        workers: the number of processes to use (the number of CPUs if None)
+        kwargs: the key word arguments to pass to the segmentation algorithm
+
+    Returns:
+        a segmentation map with sequential labels from 0 that is the same
+        for any number of workers
+
+    """
+    shape = image.shape[:2]
+    grid = tiles(shape, tile_size, overlap)
+    windows = [image[rectangle.to_slice(window)] for _, window in grid]
+    arguments = [_window_arguments(kwargs, w, shape) for _, w in grid]
+    # segment the windows in this process if there is no work to share
+    if workers == 1 or len(grid) == 1:
+        results = list(map(_segment_window,
+            repeat(segment_image),
+            windows,
+            arguments,
+        ))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_segment_window,
+                repeat(segment_image),
+                windows,
+                arguments,
+            ))
+    # relabel each window into its own range of a global label space and
+    # copy the core of each tile into the segmentation map
+    segments = np.empty(shape, dtype=np.int64)
+    tile_labels = []
+    offset = 0
+    for (core, window), result in zip(grid, results):
+        _, labels = np.unique(result, return_inverse=True)
+        labels = labels.reshape(result.shape) + offset
+        offset = int(labels.max()) + 1
+        tile_labels.append((core, window, labels))
+        rect = (
+            core[0] - window[0],
+            core[1] - window[1],
+            core[2] - window[0],
+            core[3] - window[1],
+        )
+        segments[rectangle.to_slice(core)] = labels[rectangle.to_slice(rect)]
+    # merge the segments that continue across the seams between tiles. the
+    # tiles are visited in a fixed order and the union keeps the smallest
+    # label, so the result is deterministic
+    parent = np.arange(offset)
+    columns = -(-shape[1] // tile_size)
+    for index, tile in enumerate(tile_labels):
+        if (index + 1) % columns:
+            right = tile_labels[index + 1]
+            _merge_seam(parent, tile, right, 1, overlap)
+        if index + columns < len(tile_labels):
+            bottom = tile_labels[index + columns]
+            _merge_seam(parent, tile, bottom, 0, overlap)
+    # flatten the forest so each label points to its root
+    while True:
+        roots = parent[parent]
+        if np.array_equal(roots, parent):
+            break
+        parent = roots
+    # relabel the merged segments sequentially from 0
+    _, segments = np.unique(parent[segments], return_inverse=True)
+
+    return segments.reshape(shape)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [segment_tiled.__name__, tiles.__name__]